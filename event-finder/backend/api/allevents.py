@@ -1,7 +1,9 @@
-import requests
 import json
 from bs4 import BeautifulSoup
 from typing import Dict, Any, Optional
+from api.http_client import get_session, conditional_get, remember_response
+from api.filters import filter_events
+from api.models import Event
 
 def extract_price(item: Dict) -> float:
     offers = item.get("offers", {})
@@ -14,19 +16,19 @@ def extract_price(item: Dict) -> float:
         pass
     return 0.0
 
-def process_event(item: Dict, default_loc: str) -> Dict:
-    return {
-        "name": item.get("name", ""),
-        "date": item.get("startDate", "")[:10],
-        "end_date": item.get("endDate", "")[:10],
-        "location": item.get("location", {}).get("name", default_loc),
-        "image": item.get("image", ""),
-        "url": item.get("url", ""),
-        "price": extract_price(item),
-        "description": item.get("description", ""),
-        "type": item.get("@type", ""),
-        "source": "All Events"
-    }
+def process_event(item: Dict, default_loc: str) -> Event:
+    return Event(
+        name=item.get("name", ""),
+        date=item.get("startDate", "")[:10],
+        end_date=item.get("endDate", "")[:10],
+        location=item.get("location", {}).get("name", default_loc),
+        image=item.get("image", ""),
+        url=item.get("url", ""),
+        price=extract_price(item),
+        description=item.get("description", ""),
+        type=item.get("@type", ""),
+        source="All Events"
+    )
 
 def fetch_events(
     location: str,
@@ -47,54 +49,47 @@ def fetch_events(
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
+        response, cached_events = conditional_get(get_session(), url, headers=headers, timeout=10)
+        if cached_events is not None:
+            # Page unchanged since last fetch: reuse the parsed events
+            raw_events = [ev.copy() for ev in cached_events]
+        else:
+            response.raise_for_status()
+            soup = BeautifulSoup(response.text, "html.parser")
         
-        scripts = soup.find_all("script", type="application/ld+json")
-        raw_events = []
+            scripts = soup.find_all("script", type="application/ld+json")
+            raw_events = []
         
-        for script in scripts:
-            try:
-                data = json.loads(script.string)
-                items = data if isinstance(data, list) else [data]
-                
-                for item in items:
-                    if item.get("@type") == "ItemList":
-                        item_list = item.get("itemListElement", [])
-                        for element in item_list:
-                            ev = element.get("item", {})
-                            if ev.get("@type") in ["Event", "MusicEvent", "SocialEvent"]:
-                                raw_events.append(process_event(ev, location))
-                    elif item.get("@type") in ["Event", "MusicEvent", "SocialEvent"]:
-                        raw_events.append(process_event(item, location))
-            except:
-                continue
-                
-        filtered_events = []
-        for ev in raw_events:
-            if start_date and ev["date"] and ev["date"] < start_date:
-                continue
-            if end_date and ev["date"] and ev["date"] > end_date:
-                continue
+            for script in scripts:
+                try:
+                    data = json.loads(script.string)
+                    items = data if isinstance(data, list) else [data]
                 
-            if min_price is not None and ev["price"] < min_price:
-                continue
-            if max_price is not None and ev["price"] > max_price:
-                continue
-                
-            if event_type:
-                etype_query = event_type.lower()
-                if etype_query not in ev["type"].lower() and etype_query not in ev["name"].lower():
-                    continue
-                    
-            if category:
-                cat_query = category.lower()
-                if cat_query not in ev["name"].lower() and cat_query not in ev["description"].lower():
+                    for item in items:
+                        if item.get("@type") == "ItemList":
+                            item_list = item.get("itemListElement", [])
+                            for element in item_list:
+                                ev = element.get("item", {})
+                                if ev.get("@type") in ["Event", "MusicEvent", "SocialEvent"]:
+                                    raw_events.append(process_event(ev, location))
+                        elif item.get("@type") in ["Event", "MusicEvent", "SocialEvent"]:
+                            raw_events.append(process_event(item, location))
+                except:
                     continue
-            # keep the description property so the UI can show it in a modal
-            filtered_events.append(ev)
-                
+
+            remember_response(url, response, raw_events)
+
+        # keep the description property so the UI can show it in a modal
+        filtered_events = filter_events(
+            raw_events,
+            start_date=start_date,
+            end_date=end_date,
+            event_types=event_type,
+            categories=category,
+            min_price=min_price,
+            max_price=max_price,
+        )
+
         return {"events": filtered_events, "total": len(filtered_events), "source": "allevents"}
 
     except Exception as e:
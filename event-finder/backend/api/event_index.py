@@ -0,0 +1,150 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from api.filters import EventFilter, search_fields
+
+# Token lookups remembered per index (cleared when full).
+TOKEN_MEMO_SIZE = 256
+
+
+def _sorted_column(values: List[Tuple[Any, int]]) -> Tuple[List[Any], List[int]]:
+    """Split (value, event id) pairs, sorted by value, into parallel lists."""
+    values.sort()
+    return [v for v, _ in values], [i for _, i in values]
+
+
+class EventIndex:
+    """
+    Inverted index over one cached event list, answering EventFilter
+    queries with the same result (and order) as EventFilter.apply().
+
+    - Text: word -> event ids. Text is whitespace-normalized, so a query
+      token is a substring of an event's text only if each of its words is
+      a substring of one of the event's words; those postings are
+      intersected and multi-word tokens are then verified on the text.
+      The tokens of one multi-select filter are a set union.
+    - Price and dates: ids sorted by low/high price and first/last day, so
+      each bound is one bisect. Events without a price or date always match.
+    - Durations are checked on the remaining candidates.
+    """
+
+    __slots__ = (
+        "events", "_texts", "_postings", "_memo",
+        "_lows", "_low_ids", "_highs", "_high_ids", "_unpriced",
+        "_firsts", "_first_ids", "_lasts", "_last_ids", "_undated",
+    )
+
+    def __init__(self, events: List[Dict[str, Any]]):
+        self.events = events
+        self._texts: List[str] = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._memo: Dict[str, FrozenSet[int]] = {}
+        lows, highs, firsts, lasts = [], [], [], []
+        unpriced, undated = [], []
+        for i, ev in enumerate(events):
+            fields = search_fields(ev)
+            self._texts.append(fields.text)
+            for word in set(fields.text.split()):
+                self._postings.setdefault(word, set()).add(i)
+            if fields.price_min is None:
+                unpriced.append(i)
+            else:
+                lows.append((fields.price_min, i))
+                highs.append((fields.price_max, i))
+            if fields.start_day is None:
+                undated.append(i)
+            else:
+                firsts.append((fields.start_day, i))
+                lasts.append((fields.end_day, i))
+        self._lows, self._low_ids = _sorted_column(lows)
+        self._highs, self._high_ids = _sorted_column(highs)
+        self._firsts, self._first_ids = _sorted_column(firsts)
+        self._lasts, self._last_ids = _sorted_column(lasts)
+        self._unpriced = frozenset(unpriced)
+        self._undated = frozenset(undated)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    # -- text ---------------------------------------------------------------
+
+    def _token_ids(self, token: str) -> FrozenSet[int]:
+        ids = self._memo.get(token)
+        if ids is not None:
+            return ids
+        found: Optional[Set[int]] = None
+        for piece in token.split(" "):
+            piece_ids: Set[int] = set()
+            for word, posting in self._postings.items():
+                if piece in word:
+                    piece_ids |= posting
+            found = piece_ids if found is None else found & piece_ids
+            if not found:
+                break
+        if found and " " in token:
+            found = {i for i in found if token in self._texts[i]}
+        ids = frozenset(found or ())
+        if len(self._memo) >= TOKEN_MEMO_SIZE:
+            self._memo.clear()
+        self._memo[token] = ids
+        return ids
+
+    def _any_token_ids(self, tokens: Tuple[str, ...]) -> Set[int]:
+        ids: Set[int] = set()
+        for token in tokens:
+            ids |= self._token_ids(token)
+        return ids
+
+    # -- ranges -------------------------------------------------------------
+
+    @staticmethod
+    def _at_least(values: List[Any], ids: List[int], bound: Any) -> List[int]:
+        return ids[bisect_left(values, bound):]
+
+    @staticmethod
+    def _at_most(values: List[Any], ids: List[int], bound: Any) -> List[int]:
+        return ids[:bisect_right(values, bound)]
+
+    def _price_ids(self, min_price: Optional[float], max_price: Optional[float]) -> Set[int]:
+        ids: Optional[Set[int]] = None
+        if min_price is not None:
+            ids = set(self._at_least(self._highs, self._high_ids, min_price))
+        if max_price is not None:
+            below = self._at_most(self._lows, self._low_ids, max_price)
+            ids = set(below) if ids is None else ids.intersection(below)
+        return ids | self._unpriced
+
+    def _date_ids(self, start_day: Optional[str], end_day: Optional[str]) -> Set[int]:
+        ids: Optional[Set[int]] = None
+        if start_day:
+            ids = set(self._at_least(self._lasts, self._last_ids, start_day))
+        if end_day:
+            before = self._at_most(self._firsts, self._first_ids, end_day)
+            ids = set(before) if ids is None else ids.intersection(before)
+        return ids | self._undated
+
+    # -- query --------------------------------------------------------------
+
+    def query(self, flt: EventFilter) -> List[Dict[str, Any]]:
+        """Events matching *flt*, in list order. Returns the list itself when nothing is filtered."""
+        if not flt:
+            return self.events
+        constraints: List[Set[int]] = []
+        if flt.type_tokens:
+            constraints.append(self._any_token_ids(flt.type_tokens))
+        if flt.category_tokens:
+            constraints.append(self._any_token_ids(flt.category_tokens))
+        if flt.min_price is not None or flt.max_price is not None:
+            constraints.append(self._price_ids(flt.min_price, flt.max_price))
+        if flt.start_day or flt.end_day:
+            constraints.append(self._date_ids(flt.start_day, flt.end_day))
+
+        if constraints:
+            constraints.sort(key=len)
+            ids = constraints[0].intersection(*constraints[1:])
+            matched = [self.events[i] for i in sorted(ids)]
+        else:
+            matched = list(self.events)
+        if flt.durations:
+            matched = [ev for ev in matched if flt.matches(ev)]
+        return matched
@@ -0,0 +1,188 @@
+import sys
+import threading
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from api.filters import EventFilter, event_key, search_fields
+
+# ---------------------------------------------------------------------------
+# Interned sources
+# ---------------------------------------------------------------------------
+# Source names are stored as small integer codes shared by every EventSet,
+# so sets built separately can be concatenated and compared directly.
+_source_codes: Dict[str, int] = {}
+_source_names: List[str] = []
+_source_lock = threading.Lock()
+
+
+def source_code(name: Any) -> int:
+    name = str(name or "")
+    code = _source_codes.get(name)
+    if code is None:
+        with _source_lock:
+            code = _source_codes.get(name)
+            if code is None:
+                code = len(_source_names)
+                _source_names.append(sys.intern(name))
+                _source_codes[name] = code
+    return code
+
+
+def source_name(code: int) -> str:
+    return _source_names[code]
+
+
+def _float_or_nan(value: Any) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+# ---------------------------------------------------------------------------
+# Columnar event set
+# ---------------------------------------------------------------------------
+
+class EventSet:
+    """
+    Columnar view of an event list: one NumPy array per field filters
+    and dedup need (first/last day, price range, duration, lat/lng,
+    source code) plus interned text and dedup keys. Unknown values are NaN
+    or NaT. The event dicts are kept as rows and only gathered back by
+    to_dicts(), at serialization.
+    """
+
+    __slots__ = (
+        "rows", "texts", "keys", "start", "end",
+        "price_min", "price_max", "duration_h", "lat", "lng", "source",
+    )
+
+    def __init__(self, rows, texts, keys, start, end, price_min, price_max, duration_h, lat, lng, source):
+        self.rows: List[Dict[str, Any]] = rows
+        self.texts: List[str] = texts
+        self.keys: np.ndarray = keys
+        self.start: np.ndarray = start
+        self.end: np.ndarray = end
+        self.price_min: np.ndarray = price_min
+        self.price_max: np.ndarray = price_max
+        self.duration_h: np.ndarray = duration_h
+        self.lat: np.ndarray = lat
+        self.lng: np.ndarray = lng
+        self.source: np.ndarray = source
+
+    @classmethod
+    def from_events(cls, events: Sequence[Dict[str, Any]]) -> "EventSet":
+        rows = list(events)
+        texts, keys, start, end = [], [], [], []
+        price_min, price_max, duration_h, lat, lng, source = [], [], [], [], [], []
+        for ev in rows:
+            fields = search_fields(ev)
+            texts.append(sys.intern(fields.text))
+            keys.append(sys.intern(event_key(ev.get("name"), ev.get("date"))))
+            start.append(fields.start_day or "NaT")
+            end.append(fields.end_day or "NaT")
+            price_min.append(_float_or_nan(fields.price_min))
+            price_max.append(_float_or_nan(fields.price_max))
+            duration_h.append(_float_or_nan(fields.duration_h))
+            lat.append(_float_or_nan(ev.get("latitude")))
+            lng.append(_float_or_nan(ev.get("longitude")))
+            source.append(source_code(ev.get("source")))
+        return cls(
+            rows,
+            texts,
+            np.array(keys, dtype=object),
+            np.array(start, dtype="datetime64[D]"),
+            np.array(end, dtype="datetime64[D]"),
+            np.array(price_min, dtype=np.float64),
+            np.array(price_max, dtype=np.float64),
+            np.array(duration_h, dtype=np.float64),
+            np.array(lat, dtype=np.float64),
+            np.array(lng, dtype=np.float64),
+            np.array(source, dtype=np.int32),
+        )
+
+    @classmethod
+    def concat(cls, sets: Sequence["EventSet"]) -> "EventSet":
+        if not sets:
+            return cls.from_events([])
+        if len(sets) == 1:
+            return sets[0]
+        return cls(
+            [row for s in sets for row in s.rows],
+            [text for s in sets for text in s.texts],
+            *(np.concatenate([getattr(s, col) for s in sets]) for col in cls.__slots__[2:]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def take(self, idx: np.ndarray) -> "EventSet":
+        """The rows at integer positions (or boolean mask) *idx*, in that order."""
+        positions = np.flatnonzero(idx) if idx.dtype == bool else idx
+        return EventSet(
+            [self.rows[i] for i in positions],
+            [self.texts[i] for i in positions],
+            *(getattr(self, col)[positions] for col in self.__slots__[2:]),
+        )
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return list(self.rows)
+
+    # -- dedup --------------------------------------------------------------
+
+    def unique(self) -> "EventSet":
+        """First row of each (name, day) key, in order."""
+        if len(self) < 2:
+            return self
+        _, first = np.unique(self.keys, return_index=True)
+        if len(first) == len(self):
+            return self
+        return self.take(np.sort(first))
+
+    # -- filtering ----------------------------------------------------------
+
+    def mask(self, flt: EventFilter) -> np.ndarray:
+        """Boolean mask of the rows matching *flt* (same semantics as EventFilter.matches)."""
+        keep = np.ones(len(self), dtype=bool)
+        for tokens in (flt.type_tokens, flt.category_tokens):
+            if tokens:
+                keep &= np.fromiter((any(t in text for t in tokens) for text in self.texts), dtype=bool, count=len(self))
+
+        if flt.min_price is not None or flt.max_price is not None:
+            priced = ~np.isnan(self.price_min)
+            in_range = priced.copy()
+            if flt.min_price is not None:
+                in_range &= self.price_max >= flt.min_price
+            if flt.max_price is not None:
+                in_range &= self.price_min <= flt.max_price
+            keep &= ~priced | in_range
+
+        if flt.start_day or flt.end_day:
+            dated = ~np.isnat(self.start)
+            in_range = dated.copy()
+            if flt.start_day:
+                in_range &= self.end >= np.datetime64(flt.start_day, "D")
+            if flt.end_day:
+                in_range &= self.start <= np.datetime64(flt.end_day, "D")
+            keep &= ~dated | in_range
+
+        if flt.durations:
+            hours = self.duration_h
+            fits = np.zeros(len(self), dtype=bool)
+            for rule in flt.durations:
+                fits |= rule(hours)
+            keep &= np.isnan(hours) | fits
+        return keep
+
+    def filter(self, flt: EventFilter) -> "EventSet":
+        if not flt:
+            return self
+        return self.take(self.mask(flt))
+
+    # -- geo ----------------------------------------------------------------
+
+    def coords(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Latitude and longitude of the rows that have both."""
+        located = ~(np.isnan(self.lat) | np.isnan(self.lng))
+        return self.lat[located], self.lng[located]
@@ -1,27 +1,14 @@
 import os
 import json
-import ssl
-import urllib3
-import cloudscraper
 from bs4 import BeautifulSoup
 from typing import Dict, Any, Optional
 from pathlib import Path
 from dotenv import load_dotenv, dotenv_values
-from requests.adapters import HTTPAdapter
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-
-class _SSLAdapter(HTTPAdapter):
-    """
-    Mounts an SSL context with certificate verification disabled.
-    """
-    def init_poolmanager(self, *args, **kwargs):
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-        kwargs["ssl_context"] = ctx
-        return super().init_poolmanager(*args, **kwargs)
+from api.http_client import get_scraper, conditional_get, remember_response
+from api.openai_client import create_chat_completion
+from api.extraction_cache import extraction_key, get_extraction, store_extraction
+from api.filters import filter_events
+from api.models import Event
 
 
 # ---------------------------------------------------------
@@ -115,42 +102,6 @@ def _resolve_state(location: str) -> Optional[str]:
     return None
 
 
-# ---------------------------------------------------------
-# Post-extraction filtering
-# ---------------------------------------------------------
-
-def _filter_events(events, start_date=None, end_date=None, event_type=None, category=None, min_price=None, max_price=None):
-    filtered = []
-    for ev in events:
-        ev_date = ev.get("date", "")
-        if start_date and ev_date and ev_date < start_date[:10]:
-            continue
-        if end_date and ev_date and ev_date > end_date[:10]:
-            continue
-        if event_type:
-            ev_type = (ev.get("type") or "").lower()
-            ev_name = (ev.get("name") or "").lower()
-            if event_type.lower() not in ev_type and event_type.lower() not in ev_name:
-                continue
-        if category:
-            ev_name = (ev.get("name") or "").lower()
-            ev_type = (ev.get("type") or "").lower()
-            if category.lower() not in ev_name and category.lower() not in ev_type:
-                continue
-        if min_price is not None or max_price is not None:
-            price_str = str(ev.get("price", "Unknown"))
-            try:
-                price_val = float(price_str.replace("$", "").replace(",", "").strip())
-                if min_price is not None and price_val < min_price:
-                    continue
-                if max_price is not None and price_val > max_price:
-                    continue
-            except (ValueError, TypeError):
-                pass  # Keep events with non-numeric prices (Free, Unknown)
-        filtered.append(ev)
-    return filtered
-
-
 # ---------------------------------------------------------
 # Core: scrape Eventbrite
 # ---------------------------------------------------------
@@ -184,45 +135,46 @@ def scrape_eventbrite(
 
     # --- fetch page ---
     try:
-        scraper = cloudscraper.create_scraper(
-            browser={"browser": "chrome", "platform": "windows", "desktop": True}
-        )
-        scraper.mount("https://", _SSLAdapter())
-        res = scraper.get(url, timeout=15, verify=False)
+        # A 304 reuses the previous page text; the extraction cache then skips the LLM
+        res, cached_text = conditional_get(get_scraper(), url, timeout=15, verify=False)
 
         if res.status_code == 403:
             return {"error": "HTTP 403 Forbidden -- Eventbrite is blocking the scraper.", "url": url}
         if res.status_code == 429:
             return {"error": "HTTP 429 Too Many Requests -- rate limited.", "url": url}
-        res.raise_for_status()
+        if cached_text is not None:
+            page_text = cached_text
+        else:
+            res.raise_for_status()
 
-        soup = BeautifulSoup(res.text, "html.parser")
+            soup = BeautifulSoup(res.text, "html.parser")
 
-        # Extract image URLs from the page before stripping tags
-        img_tags = soup.find_all("img")
-        image_info = []
-        for img in img_tags:
-            src = img.get("src") or img.get("data-src") or ""
-            alt = img.get("alt", "")
-            if src and ("eventbrite" in src or "img.evbuc" in src):
-                image_info.append(f"[IMAGE: alt=\"{alt}\" src=\"{src}\"]")
+            # Extract image URLs from the page before stripping tags
+            img_tags = soup.find_all("img")
+            image_info = []
+            for img in img_tags:
+                src = img.get("src") or img.get("data-src") or ""
+                alt = img.get("alt", "")
+                if src and ("eventbrite" in src or "img.evbuc" in src):
+                    image_info.append(f"[IMAGE: alt=\"{alt}\" src=\"{src}\"]")
 
-        for tag in soup(["script", "style"]):
-            tag.extract()
+            for tag in soup(["script", "style"]):
+                tag.extract()
 
-        page_text = soup.get_text(separator=" ", strip=True)[:35000]
-        if image_info:
-            page_text += "\n\nEXTRACTED IMAGES:\n" + "\n".join(image_info[:50])
+            page_text = soup.get_text(separator=" ", strip=True)[:35000]
+            if image_info:
+                page_text += "\n\nEXTRACTED IMAGES:\n" + "\n".join(image_info[:50])
 
-        if len(page_text) < 500:
-            return {"error": "Page appears empty; Eventbrite may require JS rendering.", "url": url}
+            if len(page_text) < 500:
+                return {"error": "Page appears empty; Eventbrite may require JS rendering.", "url": url}
+
+            remember_response(url, res, page_text)
 
     except Exception as e:
         return {"error": f"Failed to fetch Eventbrite: {str(e)}", "url": url}
 
     # --- LLM extraction ---
     model = os.getenv("OPENAI_ROUTER_MODEL", "gpt-4.1-mini")
-    client = OpenAI(api_key=api_key)
 
     response_format = {
         "type": "json_schema",
@@ -266,47 +218,63 @@ def scrape_eventbrite(
     For image: Extract the event image/thumbnail URL if available. If not found, output an empty string.
     """
 
-    try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": instructions.strip()},
-                {"role": "user", "content": f"Here is the webpage text:\n\n{page_text}"},
-            ],
-            response_format=response_format,
-            temperature=0.1,
-        )
-        result = json.loads(resp.choices[0].message.content)
-        raw_events = result.get("events", [])
-
-        # Normalize each event to match the standard event format
-        normalized = []
-        for ev in raw_events:
-            evt = {
-                "name": ev.get("name", ""),
-                "date": (ev.get("start_date") or "")[:10],
-                "time": (ev.get("start_date") or "")[11:] if "T" in (ev.get("start_date") or "") else "",
-                "end_date": (ev.get("end_date") or "")[:10],
-                "location": location,
-                "venue": "",
-                "image": ev.get("image", ""),
-                "url": url,
-                "price": ev.get("price", "Unknown"),
-                "type": ev.get("event_type", ""),
-                "latitude": ev.get("latitude"),
-                "longitude": ev.get("longitude"),
-                "source": "Eventbrite",
-            }
-            normalized.append(evt)
-
-        # Apply filters
-        filtered = _filter_events(normalized, start_date, end_date, event_type, category, min_price, max_price)
-
-        return {
-            "source": "eventbrite",
-            "url_scraped": url,
-            "events": filtered,
-            "total": len(filtered),
-        }
-    except Exception as e:
-        return {"error": f"OpenAI API Error: {str(e)}"}
+    # Skip the LLM if this exact listing page was extracted before
+    cache_key = extraction_key(page_text, model, response_format, f"{instructions}|{url}")
+    normalized = get_extraction(cache_key)
+    if normalized is None:
+        try:
+            resp = create_chat_completion(
+                api_key,
+                model=model,
+                messages=[
+                    {"role": "system", "content": instructions.strip()},
+                    {"role": "user", "content": f"Here is the webpage text:\n\n{page_text}"},
+                ],
+                response_format=response_format,
+                temperature=0.1,
+            )
+            result = json.loads(resp.choices[0].message.content)
+            raw_events = result.get("events", [])
+
+            # Normalize each event to match the standard event format
+            normalized = []
+            for ev in raw_events:
+                evt = Event(
+                    name=ev.get("name", ""),
+                    date=(ev.get("start_date") or "")[:10],
+                    time=(ev.get("start_date") or "")[11:] if "T" in (ev.get("start_date") or "") else "",
+                    end_date=(ev.get("end_date") or "")[:10],
+                    location=location,
+                    venue="",
+                    image=ev.get("image", ""),
+                    url=url,
+                    price=ev.get("price", "Unknown"),
+                    type=ev.get("event_type", ""),
+                    latitude=ev.get("latitude"),
+                    longitude=ev.get("longitude"),
+                    source="Eventbrite",
+                )
+                normalized.append(evt)
+        except Exception as e:
+            return {"error": f"OpenAI API Error: {str(e)}"}
+        store_extraction(cache_key, normalized)
+    else:
+        normalized = [ev.copy() for ev in normalized]
+
+    # Apply filters
+    filtered = filter_events(
+        normalized,
+        start_date=start_date,
+        end_date=end_date,
+        event_types=event_type,
+        categories=category,
+        min_price=min_price,
+        max_price=max_price,
+    )
+
+    return {
+        "source": "eventbrite",
+        "url_scraped": url,
+        "events": filtered,
+        "total": len(filtered),
+    }
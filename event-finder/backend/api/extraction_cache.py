@@ -0,0 +1,53 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from api.lru_cache import LRUCache
+from api.models import json_default
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", "256"))
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+# Content-addressed, so entries never go stale; the TTL only bounds how
+# long an unpopular page occupies memory.
+EXTRACTION_CACHE_TTL_S = float(os.getenv("EXTRACTION_CACHE_TTL_S", str(7 * 24 * 3600)))
+
+_cache = LRUCache(
+    max_entries=EXTRACTION_CACHE_SIZE,
+    ttl_s=EXTRACTION_CACHE_TTL_S,
+    max_bytes=EXTRACTION_CACHE_MAX_BYTES,
+)
+
+
+def extraction_key(page_text: str, model: str, schema: Dict[str, Any], context: str = "") -> str:
+    """
+    Hash of everything that determines the LLM's output: the cleaned page
+    text, the model, the response schema and the prompt *context*
+    (instructions, source URL, location).
+
+    Whitespace runs in the page text are collapsed and schema keys are
+    sorted, so re-renders that differ only in layout share an entry.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps([model, schema, context], sort_keys=True).encode("utf-8"))
+    h.update(b"\0")
+    h.update(" ".join(page_text.split()).encode("utf-8"))
+    return h.hexdigest()
+
+
+def get_extraction(key: str) -> Optional[Any]:
+    """Return the cached extraction for *key*, or None on a miss."""
+    return _cache.get(key)
+
+
+def store_extraction(key: str, result: Any) -> None:
+    """Cache a successful extraction (normalized, pre-filter events)."""
+    size = len(json.dumps(result, default=json_default).encode("utf-8"))
+    _cache.put(key, result, size=size)
+
+
+def extraction_cache_stats() -> Dict[str, Any]:
+    return _cache.stats()
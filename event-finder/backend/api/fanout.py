@@ -0,0 +1,228 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Deque, Dict, Iterator, NamedTuple, Optional
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "16"))
+# Provider calls abandoned past their deadline keep running until they
+# return; up to this many give their worker slot back meanwhile.
+FANOUT_MAX_ABANDONED = int(os.getenv("FANOUT_MAX_ABANDONED", "16"))
+# How long a task may wait for a free worker before it is given up on.
+FANOUT_QUEUE_TIMEOUT_S = float(os.getenv("FANOUT_QUEUE_TIMEOUT_S", "30"))
+DEFAULT_PROVIDER_TIMEOUT_S = float(os.getenv("FANOUT_PROVIDER_TIMEOUT_S", "45"))
+
+# Per-provider deadlines (seconds), counted from when the call starts
+# running. LLM-backed scrapers get more headroom than the plain HTTP
+# providers.
+PROVIDER_TIMEOUTS: Dict[str, float] = {
+    "ticketmaster": float(os.getenv("FANOUT_TIMEOUT_TICKETMASTER_S", "15")),
+    "allevents": float(os.getenv("FANOUT_TIMEOUT_ALLEVENTS_S", "15")),
+    "eventbrite": float(os.getenv("FANOUT_TIMEOUT_EVENTBRITE_S", "45")),
+    "openscraper": float(os.getenv("FANOUT_TIMEOUT_OPENSCRAPER_S", "60")),
+    "uploaded": float(os.getenv("FANOUT_TIMEOUT_UPLOADED_S", "10")),
+}
+
+
+class FanoutResult(NamedTuple):
+    name: str
+    data: Dict[str, Any]
+    latency_ms: int
+    timed_out: bool
+
+
+# ---------------------------------------------------------------------------
+# Worker pool
+# ---------------------------------------------------------------------------
+
+class _Task:
+    __slots__ = ("fn", "future", "started_at", "released")
+
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+        self.future: Future = Future()
+        self.started_at: Optional[float] = None
+        self.released = False
+
+
+class FanoutPool:
+    """
+    Process-wide pool shared by every request's fan-out: at most
+    *max_workers* tasks run at once, the rest wait in FIFO order.
+
+    Python threads can't be killed, so a call abandoned past its deadline
+    keeps running. abandon() hands its slot to the next queued task, so
+    stuck providers don't starve later requests; at most *max_abandoned*
+    calls are handed off like that, beyond which they keep their slot
+    until they return.
+    """
+
+    def __init__(self, max_workers: int = FANOUT_MAX_WORKERS, max_abandoned: int = FANOUT_MAX_ABANDONED):
+        self.max_workers = max_workers
+        self.max_abandoned = max_abandoned
+        self._queue: Deque[_Task] = deque()
+        self._running = 0
+        self._abandoned = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[[], Any]) -> _Task:
+        task = _Task(fn)
+        with self._lock:
+            self._queue.append(task)
+            self._dispatch()
+        return task
+
+    def _dispatch(self) -> None:
+        while self._queue and self._running < self.max_workers:
+            task = self._queue.popleft()
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            self._running += 1
+            task.started_at = time.monotonic()
+            threading.Thread(target=self._run, args=(task,), name="fanout", daemon=True).start()
+
+    def _run(self, task: _Task) -> None:
+        try:
+            result = task.fn()
+        except BaseException as e:
+            task.future.set_exception(e)
+        else:
+            task.future.set_result(result)
+        finally:
+            with self._lock:
+                if task.released:
+                    self._abandoned -= 1
+                else:
+                    self._running -= 1
+                self._dispatch()
+
+    def cancel(self, task: _Task) -> bool:
+        """Drop a task that hasn't started. Returns False if it already has."""
+        with self._lock:
+            if not task.future.cancel():
+                return False
+            self._queue.remove(task)
+            return True
+
+    def abandon(self, task: _Task) -> None:
+        """Stop counting a started task that missed its deadline against the pool, if allowed."""
+        with self._lock:
+            if task.future.done() or task.released or self._abandoned >= self.max_abandoned:
+                return
+            task.released = True
+            self._abandoned += 1
+            self._running -= 1
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"running": self._running, "queued": len(self._queue), "abandoned": self._abandoned}
+
+
+_pool = FanoutPool()
+
+
+def _timeout_for(name: str, timeouts: Optional[Dict[str, float]]) -> float:
+    if timeouts and name in timeouts:
+        return timeouts[name]
+    return PROVIDER_TIMEOUTS.get(name, DEFAULT_PROVIDER_TIMEOUT_S)
+
+
+def _run_task(fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    result = fn()
+    return result if isinstance(result, dict) else {"events": list(result or [])}
+
+
+def iter_fanout(
+    tasks: Dict[str, Callable[[], Dict[str, Any]]],
+    timeouts: Optional[Dict[str, float]] = None,
+    deadline_s: Optional[float] = None,
+) -> Iterator[FanoutResult]:
+    """
+    Run every task concurrently and yield a FanoutResult as each one finishes.
+
+    Each task gets its own deadline (PROVIDER_TIMEOUTS, overridable via
+    *timeouts*), counted from when a worker starts it; a task still queued
+    after FANOUT_QUEUE_TIMEOUT_S is dropped. *deadline_s* optionally caps
+    the whole fan-out. A task that misses its deadline is reported as
+    {"events": [], "error": ...} with timed_out=True so callers can return
+    partial results. A started one is left to finish in the background
+    (see FanoutPool.abandon).
+    """
+    started = time.monotonic()
+    overall = started + deadline_s if deadline_s is not None else None
+
+    pending = {}
+    for name, fn in tasks.items():
+        task = _pool.submit(lambda fn=fn: _run_task(fn))
+        pending[task.future] = (name, task, _timeout_for(name, timeouts))
+
+    def _due(task: _Task, timeout: float, now: float) -> float:
+        if task.started_at is not None:
+            due = task.started_at + timeout
+        else:
+            # Not started yet: wake up no later than it could be due if it
+            # started now, and give up once it has queued too long.
+            due = min(now + timeout, started + FANOUT_QUEUE_TIMEOUT_S)
+        return min(due, overall) if overall is not None else due
+
+    while pending:
+        now = time.monotonic()
+        next_due = min(_due(task, timeout, now) for _, task, timeout in pending.values())
+        done, _ = wait(list(pending), timeout=max(0.0, next_due - now), return_when=FIRST_COMPLETED)
+
+        for fut in done:
+            name, _, _ = pending.pop(fut)
+            latency_ms = int((time.monotonic() - started) * 1000)
+            try:
+                data = fut.result()
+            except Exception as e:
+                print(f"[fanout] {name} failed: {e}")
+                data = {"events": [], "error": str(e)}
+            yield FanoutResult(name, data, latency_ms, False)
+
+        now = time.monotonic()
+        for fut, (name, task, timeout) in list(pending.items()):
+            if task.started_at is not None and now >= _due(task, timeout, now):
+                pending.pop(fut)
+                _pool.abandon(task)
+                budget = round(now - task.started_at, 1)
+                print(f"[fanout] {name} missed its deadline after {budget}s; returning partial results")
+            elif task.started_at is None and (
+                now - started >= FANOUT_QUEUE_TIMEOUT_S or (overall is not None and now >= overall)
+            ):
+                if not _pool.cancel(task):
+                    continue  # a worker picked it up just now
+                pending.pop(fut)
+                budget = round(now - started, 1)
+                print(f"[fanout] {name} never got a worker in {budget}s; returning partial results")
+            else:
+                continue
+            yield FanoutResult(
+                name,
+                {"events": [], "error": f"Timed out after {budget}s", "timed_out": True},
+                int((now - started) * 1000),
+                True,
+            )
+
+
+def run_fanout(
+    tasks: Dict[str, Callable[[], Dict[str, Any]]],
+    timeouts: Optional[Dict[str, float]] = None,
+    deadline_s: Optional[float] = None,
+) -> Dict[str, FanoutResult]:
+    """Blocking form of iter_fanout: returns {task name: FanoutResult}."""
+    return {r.name: r for r in iter_fanout(tasks, timeouts, deadline_s)}
+
+
+def provider_status(data: Optional[Dict[str, Any]]) -> str:
+    """Map a provider result to the *_status string returned by the API."""
+    if not data:
+        return "ok"
+    if data.get("timed_out"):
+        return "timeout"
+    return "error" if "error" in data else "ok"
@@ -0,0 +1,295 @@
+import re
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# ---------------------------------------------------------------------------
+# Per-event fields
+# ---------------------------------------------------------------------------
+# Fields searched by event type / category tokens.
+TEXT_KEYS = ("name", "title", "event_name", "description", "summary", "category", "type", "event_type")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_text(value: str) -> str:
+    """Lowercase, trim and collapse whitespace."""
+    return _WHITESPACE_RE.sub(" ", value.strip().lower())
+
+
+def day_of(value: Any) -> Optional[str]:
+    """Return the YYYY-MM-DD prefix of a date string, or None ("TBD", "")."""
+    day = str(value or "")[:10]
+    try:
+        date.fromisoformat(day)
+    except ValueError:
+        return None
+    return day
+
+
+def event_key(name: Any, date_str: Any) -> str:
+    """Dedup key of an event: its lowercased name and day."""
+    name_norm = str(name).lower().strip()
+    date_norm = str(date_str)[:10] if date_str else "unknown-date"
+    return f"{name_norm}|{date_norm}"
+
+
+def event_text(event: Dict[str, Any]) -> str:
+    """Normalized text blob of the event's searchable fields."""
+    parts = []
+    for k in TEXT_KEYS:
+        v = event.get(k)
+        if isinstance(v, str):
+            parts.append(v)
+        elif isinstance(v, list):
+            parts.extend(str(x) for x in v if x)
+    return normalize_text(" ".join(parts))
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def event_price_range(event: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    (low, high) price of the event, or (None, None) if unknown. Understands
+    min/max keys, Ticketmaster's priceRange / priceRanges, and the scrapers'
+    "price" (a number, "$25", "$20 - $40" or "Free").
+    """
+    for min_k, max_k in (("min_price", "max_price"), ("price_min", "price_max"), ("minPrice", "maxPrice")):
+        if event.get(min_k) is not None or event.get(max_k) is not None:
+            low, high = _to_float(event.get(min_k)), _to_float(event.get(max_k))
+            return (low if low is not None else high), (high if high is not None else low)
+
+    pr = event.get("priceRange")
+    if not isinstance(pr, dict):
+        ranges = event.get("priceRanges")
+        pr = ranges[0] if isinstance(ranges, list) and ranges and isinstance(ranges[0], dict) else None
+    if pr:
+        low, high = _to_float(pr.get("min")), _to_float(pr.get("max"))
+        if low is not None or high is not None:
+            return (low if low is not None else high), (high if high is not None else low)
+
+    price = event.get("price")
+    if isinstance(price, (int, float)) and not isinstance(price, bool):
+        return float(price), float(price)
+    if isinstance(price, str):
+        text = price.lower().replace(",", "")
+        if "free" in text:
+            return 0.0, 0.0
+        numbers = [float(n) for n in _NUMBER_RE.findall(text)]
+        if numbers:
+            return min(numbers), max(numbers)
+    return None, None
+
+
+def event_days(event: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """(first day, last day) of the event as YYYY-MM-DD, or (None, None) if undated."""
+    start = day_of(event.get("date"))
+    if start is None:
+        return None, None
+    return start, max(day_of(event.get("end_date")) or start, start)
+
+
+def _parse_dt(value: Any) -> Optional[datetime]:
+    """Best-effort ISO parse (2026-03-05T11:45, 2026-03-05 11:45, ...); None if unknown."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return None
+
+
+def event_duration_hours(event: Dict[str, Any]) -> Optional[float]:
+    start = _parse_dt(event.get("start") or event.get("start_date") or event.get("startDate") or event.get("datetime"))
+    end = _parse_dt(event.get("end") or event.get("end_date") or event.get("endDate"))
+    if not start or not end:
+        return None
+    try:
+        return (end - start).total_seconds() / 3600.0
+    except TypeError:  # naive vs aware
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Precomputed search fields
+# ---------------------------------------------------------------------------
+# Events are annotated once, when ingested or loaded from the cache, with
+# the values every filter needs, held as a SearchFields object under
+# SEARCH_FIELD. Stored copies keep them as a plain dict (to_dict()); bump
+# SEARCH_VERSION when the derivation changes and stale copies are
+# recomputed.
+SEARCH_FIELD = "_search"
+SEARCH_VERSION = 1
+
+
+class SearchFields:
+    """Typed search values of one event; None where a field is unknown."""
+
+    __slots__ = ("text", "price_min", "price_max", "start_day", "end_day", "duration_h")
+
+    def __init__(
+        self,
+        text: str,
+        price_min: Optional[float],
+        price_max: Optional[float],
+        start_day: Optional[str],
+        end_day: Optional[str],
+        duration_h: Optional[float],
+    ):
+        self.text = text
+        self.price_min = price_min
+        self.price_max = price_max
+        self.start_day = start_day
+        self.end_day = end_day
+        self.duration_h = duration_h
+
+    @classmethod
+    def from_stored(cls, value: Any) -> Optional["SearchFields"]:
+        """A SearchFields from its stored form, or None if *value* isn't a current one."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict) and value.get("v") == SEARCH_VERSION:
+            return cls(*(value.get(k) for k in cls.__slots__))
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"v": SEARCH_VERSION}
+        for k in self.__slots__:
+            out[k] = getattr(self, k)
+        return out
+
+
+def compute_search_fields(event: Dict[str, Any]) -> SearchFields:
+    price_min, price_max = event_price_range(event)
+    start_day, end_day = event_days(event)
+    return SearchFields(event_text(event), price_min, price_max, start_day, end_day, event_duration_hours(event))
+
+
+def search_fields(event: Dict[str, Any]) -> SearchFields:
+    """The event's precomputed search fields, computed (not stored) if absent or outdated."""
+    return SearchFields.from_stored(event.get(SEARCH_FIELD)) or compute_search_fields(event)
+
+
+def annotate_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Store search fields on each event in place (reusing current ones). Returns *events*."""
+    for ev in events:
+        stored = ev.get(SEARCH_FIELD)
+        if not isinstance(stored, SearchFields):
+            ev[SEARCH_FIELD] = SearchFields.from_stored(stored) or compute_search_fields(ev)
+    return events
+
+
+# ---------------------------------------------------------------------------
+# Compiled filter
+# ---------------------------------------------------------------------------
+# UI duration labels -> predicate on hours (also applied to NumPy arrays)
+_DURATION_RULES: Tuple[Tuple[str, Callable[[float], bool]], ...] = (
+    ("less than 2", lambda h: h < 2),
+    ("2-4", lambda h: (h >= 2) & (h <= 4)),
+    ("4+", lambda h: h >= 4),
+    ("multi-day", lambda h: h >= 24),
+)
+
+TokenInput = Union[str, Sequence[str], None]
+
+
+def _tokens(values: TokenInput) -> Tuple[str, ...]:
+    if not values:
+        return ()
+    if isinstance(values, str):
+        values = [values]
+    return tuple(t for t in (normalize_text(v) for v in values if v) if t)
+
+
+class EventFilter:
+    """
+    An event query compiled once: tokens are normalized, bounds parsed and
+    duration labels resolved up front, then matches() / apply() evaluate it
+    in a single pass.
+
+    Semantics (shared by every filtering path):
+    - event_types / categories: each list must have at least one token that
+      is a substring of the event's text (name, description, type, ...).
+    - price: the event's [low, high] range must overlap [min_price, max_price].
+    - dates: the event's [date, end_date] days must overlap the range.
+    - durations: the event's length must fit one of the selected labels.
+    A field that can't be determined for an event (no price, no date, ...)
+    never excludes it.
+    """
+
+    __slots__ = ("type_tokens", "category_tokens", "min_price", "max_price", "start_day", "end_day", "durations")
+
+    def __init__(
+        self,
+        event_types: TokenInput = None,
+        categories: TokenInput = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        durations: TokenInput = None,
+    ):
+        self.type_tokens = _tokens(event_types)
+        self.category_tokens = _tokens(categories)
+        self.min_price = float(min_price) if min_price is not None else None
+        self.max_price = float(max_price) if max_price is not None else None
+        self.start_day = day_of(start_date)
+        self.end_day = day_of(end_date)
+        self.durations = tuple(rule for label in _tokens(durations) for key, rule in _DURATION_RULES if key in label)
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.type_tokens or self.category_tokens
+            or self.min_price is not None or self.max_price is not None
+            or self.start_day or self.end_day or self.durations
+        )
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        fields = search_fields(event)
+        if self.type_tokens or self.category_tokens:
+            text = fields.text
+            if self.type_tokens and not any(t in text for t in self.type_tokens):
+                return False
+            if self.category_tokens and not any(t in text for t in self.category_tokens):
+                return False
+
+        if self.min_price is not None or self.max_price is not None:
+            low, high = fields.price_min, fields.price_max
+            if low is not None:
+                if self.min_price is not None and high < self.min_price:
+                    return False
+                if self.max_price is not None and low > self.max_price:
+                    return False
+
+        if self.start_day or self.end_day:
+            first, last = fields.start_day, fields.end_day
+            if first is not None:
+                if self.start_day and last < self.start_day:
+                    return False
+                if self.end_day and first > self.end_day:
+                    return False
+
+        if self.durations:
+            hours = fields.duration_h
+            if hours is not None and not any(rule(hours) for rule in self.durations):
+                return False
+
+        return True
+
+    def apply(self, events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Events that match, in order. Returns *events* itself when nothing is filtered."""
+        if not self:
+            return events if isinstance(events, list) else list(events)
+        return [ev for ev in events if self.matches(ev)]
+
+
+def filter_events(events: Iterable[Dict[str, Any]], **criteria) -> List[Dict[str, Any]]:
+    """Compile EventFilter(**criteria) and apply it."""
+    return EventFilter(**criteria).apply(events)
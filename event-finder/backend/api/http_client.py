@@ -0,0 +1,164 @@
+import json
+import os
+import ssl
+import threading
+from typing import Any, Optional, Tuple
+import urllib3
+import cloudscraper
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from api.lru_cache import LRUCache
+from api.models import json_default
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+# Number of per-host pools kept alive, and keep-alive connections per host.
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "20"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+
+# Retry policy for transient failures (connection errors, 429 and 5xx).
+# Other 4xx are returned at once; so is the last 429/5xx once retries run
+# out, and callers report it as a scrape failure. Every wait is capped at
+# HTTP_BACKOFF_MAX_S (Retry-After is not honoured) so retries stay inside
+# the provider deadlines.
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+HTTP_BACKOFF_MAX_S = float(os.getenv("HTTP_BACKOFF_MAX_S", "2"))
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+DEFAULT_TIMEOUT_S = float(os.getenv("HTTP_TIMEOUT_S", "10"))
+
+# ETag / Last-Modified validators (plus the parsed payload to reuse on a 304)
+VALIDATOR_CACHE_SIZE = int(os.getenv("HTTP_VALIDATOR_CACHE_SIZE", "512"))
+VALIDATOR_CACHE_MAX_BYTES = int(os.getenv("HTTP_VALIDATOR_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_BROWSER = {"browser": "chrome", "platform": "windows", "desktop": True}
+
+_lock = threading.Lock()
+_session = None
+_scraper = None
+_validators = LRUCache(max_entries=VALIDATOR_CACHE_SIZE, max_bytes=VALIDATOR_CACHE_MAX_BYTES)
+
+
+def _retry_policy() -> Retry:
+    return Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        backoff_max=HTTP_BACKOFF_MAX_S,
+        respect_retry_after_header=False,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+
+
+def _pooled_adapter() -> HTTPAdapter:
+    return HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=_retry_policy(),
+    )
+
+
+class SSLAdapter(HTTPAdapter):
+    """
+    Pooled adapter that mounts an SSL context with certificate verification disabled.
+    Required for urllib3 2.x + OpenSSL 3.x where passing verify=False alone
+    raises 'Cannot set verify_mode to CERT_NONE when check_hostname is enabled'.
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault("pool_connections", HTTP_POOL_CONNECTIONS)
+        kwargs.setdefault("pool_maxsize", HTTP_POOL_MAXSIZE)
+        kwargs.setdefault("max_retries", _retry_policy())
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        kwargs["ssl_context"] = ctx
+        return super().init_poolmanager(*args, **kwargs)
+
+
+def get_session() -> requests.Session:
+    """
+    Process-wide requests session for API calls (Ticketmaster, AllEvents).
+    Connections are kept alive per host, so repeated searches skip the
+    TCP + TLS handshake.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                s = requests.Session()
+                s.mount("https://", _pooled_adapter())
+                s.mount("http://", _pooled_adapter())
+                _session = s
+    return _session
+
+
+def get_scraper() -> requests.Session:
+    """
+    Process-wide cloudscraper session for HTML scraping (open scraper, Eventbrite).
+    Created once so the browser/challenge setup and the unverified-SSL pool
+    are reused across requests. Call with verify=False.
+    """
+    global _scraper
+    if _scraper is None:
+        with _lock:
+            if _scraper is None:
+                s = cloudscraper.create_scraper(browser=_BROWSER)
+                s.mount("https://", SSLAdapter())
+                s.mount("http://", _pooled_adapter())
+                _scraper = s
+    return _scraper
+
+
+# ---------------------------------------------------------------------------
+# Conditional GET
+# ---------------------------------------------------------------------------
+
+def conditional_get(session: requests.Session, url: str, **kwargs) -> Tuple[requests.Response, Optional[Any]]:
+    """
+    GET *url*, sending If-None-Match / If-Modified-Since from the last
+    response remembered for it.
+
+    Returns (response, payload). On a 304, payload is whatever the caller
+    stored with remember_response, so parsing can be skipped; otherwise
+    payload is None and the caller handles the response as usual.
+    """
+    entry = _validators.get(url)
+    headers = dict(kwargs.pop("headers", None) or {})
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    res = session.get(url, headers=headers, **kwargs)
+    if res.status_code == 304 and entry:
+        print(f"[http] 304 Not Modified: {url}")
+        return res, entry["payload"]
+    return res, None
+
+
+def remember_response(url: str, response: requests.Response, payload: Any) -> None:
+    """
+    Store the response's validators with the caller's parsed *payload*.
+    Responses without ETag or Last-Modified are not remembered.
+    """
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not etag and not last_modified:
+        _validators.pop(url)
+        return
+    size = len(json.dumps(payload, default=json_default).encode("utf-8"))
+    _validators.put(url, {"etag": etag, "last_modified": last_modified, "payload": payload}, size=size)
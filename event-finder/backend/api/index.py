@@ -4,14 +4,43 @@ from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from api.llm_router import route_and_fetch_events
 from api import ticketmaster, allevents
-from api.open_scraper import find_event_site_url, scrape_events_from_url, scrape_events_with_location
+from api.open_scraper import scrape_events_from_url, scrape_events_with_location
 from api.eventbrite_scraper import scrape_eventbrite
-from firebase_database.cache import check_cache, store_cache, apply_local_filters, get_uploaded_events_near
+from firebase_database.cache import (
+    generate_cache_key,
+    check_cache_entry,
+    store_cache_async,
+    flush_cache_writes,
+    cache_write_stats,
+    refresh_in_background,
+    CACHE_BACKGROUND_REFRESH,
+    filter_cache_entry,
+    get_uploaded_events_near,
+    store_uploaded_url,
+    start_uploaded_index_sync,
+    UPLOADED_INDEX_ENABLED,
+    uploaded_index_stats,
+    l1_cache_stats,
+)
+from firebase_database.site_cache import resolve_event_site_url, record_scrape_result
+from api.fanout import iter_fanout, run_fanout, provider_status
+from api.sources import (
+    SOURCE_LABELS,
+    build_source_tasks,
+    fetch_cacheable_events,
+    combine_source_results,
+    merge_unique,
+)
+from api.extraction_cache import extraction_cache_stats
+from api.singleflight import SingleFlight
+from api.event_set import EventSet
+from api.filters import EventFilter
+from api.models import serialize_events, serialize_result
+from firebase_database.geo import centroid
+from firebase_database.prewarm import PREWARM_ENABLED, start_prewarm_thread, stop_prewarm_thread
 import json
-import threading
-import datetime
-from typing import Any, Dict, List, Optional, Tuple
-import re
+import os
+from typing import Any, Dict, List, Optional
 
 load_dotenv()
 
@@ -25,6 +54,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def start_background_jobs():
+    if UPLOADED_INDEX_ENABLED:
+        start_uploaded_index_sync()
+    if PREWARM_ENABLED:
+        start_prewarm_thread()
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    stop_prewarm_thread()
+    # Don't lose cache entries still waiting in the write-behind queue
+    flush_cache_writes()
+
 @app.get("/")
 def read_root():
     return {"Hello": "World", "Platform": "Vercel"}
@@ -33,6 +75,17 @@ def read_root():
 def health_check():
     return {"status": "ok", "service": "event-finder-backend"}
 
+@app.get("/api/cache-stats")
+def cache_stats():
+    """Hit/miss counters for the in-process caches."""
+    return {
+        "event_cache_l1": l1_cache_stats(),
+        "extraction": extraction_cache_stats(),
+        "inflight": _inflight.stats(),
+        "cache_writes": cache_write_stats(),
+        "uploaded_index": uploaded_index_stats(),
+    }
+
 @app.get("/api/router-test")
 def router_test(
     location: str = "Los Angeles",
@@ -74,7 +127,7 @@ def search_events(
     max_price: Optional[float] = None,
 ):
     if lat is not None and lon is not None:
-        return ticketmaster.fetch_events(
+        return serialize_result(ticketmaster.fetch_events(
             location=location or "",
             start_date=start_date,
             end_date=end_date,
@@ -85,7 +138,7 @@ def search_events(
             lat=lat,
             lon=lon,
             radius=radius,  
-        )
+        ))
     if not location:
         return {"error": "Provide location (city, state) or lat and lon.", "events": []}
     res = route_and_fetch_events(
@@ -97,84 +150,8 @@ def search_events(
         min_price=min_price,
         max_price=max_price
     )
-    return {"events": res.get("events", []), "total": res.get("total", 0)}
+    return {"events": serialize_events(res.get("events", [])), "total": res.get("total", 0)}
     
-def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", s.strip().lower())
-
-def _parse_dt(value: Any) -> Optional[datetime.datetime]:
-    """Best-effort parse; returns None if unknown format."""
-    if not value:
-        return None
-    if isinstance(value, datetime.datetime):
-        return value
-    if isinstance(value, str):
-        # Handles ISO-like: 2026-03-05T11:45, 2026-03-05T11:45:00, 2026-03-05 11:45
-        try:
-            return datetime.fromisoformat(value.replace("Z", "+00:00"))
-        except Exception:
-            return None
-    return None
-
-def _extract_text_blob(event: Dict[str, Any]) -> str:
-    parts = []
-    for k in ("name", "title", "event_name", "description", "summary", "category", "type", "event_type"):
-        v = event.get(k)
-        if isinstance(v, str):
-            parts.append(v)
-        elif isinstance(v, list):
-            parts.extend([str(x) for x in v if x])
-    return _norm(" ".join(parts))
-
-def _extract_price_range(event: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
-    """
-    Return (min_price, max_price) if we can find it, else (None, None).
-    Supports a few common representations.
-    """
-    # Common direct keys
-    for min_k, max_k in [
-        ("min_price", "max_price"),
-        ("price_min", "price_max"),
-        ("minPrice", "maxPrice"),
-    ]:
-        if event.get(min_k) is not None or event.get(max_k) is not None:
-            try:
-                mn = float(event[min_k]) if event.get(min_k) is not None else None
-            except Exception:
-                mn = None
-            try:
-                mx = float(event[max_k]) if event.get(max_k) is not None else None
-            except Exception:
-                mx = None
-            return mn, mx
-
-    # Ticketmaster-like: priceRanges: [{"min": 20, "max": 80}]
-    pr = event.get("priceRanges")
-    if isinstance(pr, list) and pr:
-        obj = pr[0] if isinstance(pr[0], dict) else None
-        if obj:
-            try:
-                mn = float(obj["min"]) if obj.get("min") is not None else None
-            except Exception:
-                mn = None
-            try:
-                mx = float(obj["max"]) if obj.get("max") is not None else None
-            except Exception:
-                mx = None
-            return mn, mx
-
-    return None, None
-
-def _extract_start_end(event: Dict[str, Any]) -> Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]:
-    # Try common keys
-    start = _parse_dt(event.get("start") or event.get("start_date") or event.get("startDate") or event.get("datetime"))
-    end = _parse_dt(event.get("end") or event.get("end_date") or event.get("endDate"))
-    return start, end
-
-def _matches_any_token(text_blob: str, tokens: List[str]) -> bool:
-    # tokens already normalized
-    return any(t in text_blob for t in tokens)
-
 def apply_post_filters(
     events: List[Dict[str, Any]],
     event_types: Optional[List[str]] = None,
@@ -187,58 +164,142 @@ def apply_post_filters(
     Conservative filtering:
     - If we can't determine a field for an event (e.g., no price info), we keep it rather than incorrectly dropping it.
     """
-    types_norm = [_norm(x) for x in (event_types or []) if x]
-    cats_norm = [_norm(x) for x in (categories or []) if x]
-    durs_norm = [_norm(x) for x in (durations or []) if x]
-
-    out = []
-    for e in events:
-        blob = _extract_text_blob(e)
-
-        # event type/category match: if user selected any, event must match at least one
-        if types_norm and not _matches_any_token(blob, types_norm):
-            continue
-        if cats_norm and not _matches_any_token(blob, cats_norm):
-            continue
-
-        # price filter (best effort)
-        if min_price is not None or max_price is not None:
-            ev_min, ev_max = _extract_price_range(e)
-            # If event has no price info, don't drop it (conservative).
-            if ev_min is not None or ev_max is not None:
-                # If only one side exists, treat it as both for overlap checks
-                low = ev_min if ev_min is not None else ev_max
-                high = ev_max if ev_max is not None else ev_min
-                if low is None or high is None:
-                    pass
-                else:
-                    if min_price is not None and high < float(min_price):
-                        continue
-                    if max_price is not None and low > float(max_price):
-                        continue
-
-        # duration filter (only if we can compute duration)
-        if durs_norm:
-            start, end = _extract_start_end(e)
-            if start and end:
-                hours = (end - start).total_seconds() / 3600.0
-                ok = False
-                for d in durs_norm:
-                    if "less than 2" in d and hours < 2:
-                        ok = True
-                    elif "2-4" in d and 2 <= hours <= 4:
-                        ok = True
-                    elif "4+" in d and hours >= 4:
-                        ok = True
-                    elif "multi-day" in d and hours >= 24:
-                        ok = True
-                if not ok:
-                    continue
-            # If we can't compute duration, keep event (conservative).
-
-        out.append(e)
-
-    return out
+    return EventFilter(
+        event_types=event_types,
+        categories=categories,
+        min_price=min_price,
+        max_price=max_price,
+        durations=durations,
+    ).apply(events)
+
+
+# ---------------------------------------------------------------------------
+# Provider fan-out shared by /api/events and /api/events-stream
+# ---------------------------------------------------------------------------
+
+# Concurrent cache misses for the same key (location + date range) share a
+# single fan-out, across both /api/events and /api/events-stream.
+_inflight = SingleFlight()
+# How long a coalesced request waits for the in-flight fetch before
+# fetching on its own.
+INFLIGHT_WAIT_S = float(os.getenv("INFLIGHT_WAIT_S", "90"))
+
+
+def _store_unless_partial(
+    store: bool,
+    location: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    events: List[Dict[str, Any]],
+    timed_out: List[str],
+) -> None:
+    # Partial results (a provider missed its deadline) are served but not
+    # cached, so the next request gets a chance at the full set.
+    if store and not timed_out:
+        store_cache_async(location, start_date, end_date, events)
+    elif timed_out:
+        print(f"[cache] Not storing partial results (timed out: {', '.join(timed_out)})")
+
+
+def _fetch_sources(
+    tasks: Dict[str, Any],
+    location: Optional[str],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    store: bool,
+) -> Dict[str, Any]:
+    """
+    Run the source fan-out and combine the results. With *store*, the full
+    combined set is written to the event cache unless a provider timed out.
+    Returns {"events", "results", "timed_out"}, the payload shared with
+    coalesced requests.
+    """
+    fanout = run_fanout(tasks)
+    results = {name: r.data for name, r in fanout.items()}
+    timed_out = [name for name, r in fanout.items() if r.timed_out]
+
+    combined_events, counts = combine_source_results(results)
+
+    print("TM events:", counts["ticketmaster"])
+    print("AE events:", counts["allevents"])
+    print("EB events:", counts["eventbrite"])
+    print("OS events:", counts["openscraper"])
+
+    _store_unless_partial(store, location, start_date, end_date, combined_events, timed_out)
+    return {"events": combined_events, "results": results, "timed_out": timed_out}
+
+
+def _store_range(location: str, start_date: Optional[str], end_date: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Fetch the cacheable dataset for a range and store it (unless partial)."""
+    events = fetch_cacheable_events(location, start_date, end_date)
+    if events is not None:
+        store_cache_async(location, start_date, end_date, events)
+    return events
+
+
+def _fill_missing_ranges(location: str, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Fetch and store the day ranges a day-bucket cache entry is missing, and
+    merge them into its events and columns. Returns None (a full miss) if any
+    range came back partial.
+    """
+    events, columns = entry["events"], entry.get("columns")
+    for range_sd, range_ed in entry["missing_ranges"]:
+        print(f"[cache] Filling {range_sd}..{range_ed} for '{location}'")
+        fetched = _inflight.do(
+            ("fill", generate_cache_key(location, range_sd, range_ed)),
+            lambda: _store_range(location, range_sd, range_ed),
+            timeout=INFLIGHT_WAIT_S,
+        )
+        if fetched is None:
+            return None
+        if columns is not None:
+            # Keep the columns in step with the events filter_cache_entry serves
+            columns = EventSet.concat([columns, EventSet.from_events(fetched)]).unique()
+            events = columns.to_dicts()
+        else:
+            events = merge_unique(events, fetched)
+    return dict(entry, events=events, columns=columns, missing_ranges=[])
+
+
+def _refresh_stale_ranges(
+    location: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    entry: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Refresh the stale parts of a cache entry and return the entry to serve.
+    Background refreshes serve the stale entry meanwhile; with
+    CACHE_BACKGROUND_REFRESH=0 the refresh has already landed, so the
+    refreshed entry is read back and served instead.
+    """
+    if not entry["stale"]:
+        return entry
+    for range_sd, range_ed in entry["refresh_ranges"]:
+        refresh_in_background(
+            location, range_sd, range_ed,
+            lambda sd=range_sd, ed=range_ed: fetch_cacheable_events(location, sd, ed),
+        )
+    if CACHE_BACKGROUND_REFRESH:
+        return entry
+    refreshed = check_cache_entry(location, start_date, end_date)
+    if refreshed is None or refreshed["missing_ranges"]:
+        return entry  # refresh came back partial; the stale entry still beats nothing
+    return refreshed
+
+
+def _uploaded_events_near_centroid(columns: EventSet) -> Dict[str, Any]:
+    """Query uploaded URLs around the centroid of the given events' coordinates."""
+    center = centroid(*columns.coords())
+    if center is None:
+        return {"events": []}
+    centroid_lat, centroid_lng = center
+    try:
+        return {"events": get_uploaded_events_near(centroid_lat, centroid_lng, 50)}
+    except Exception as e:
+        print(f"Error fetching uploaded URLs (city/state): {e}")
+        return {"events": []}
 
 
 @app.get("/api/events")
@@ -292,7 +353,7 @@ def get_events(
           "routing_reason": res.get("routing", {}).get("reason"),
           "router_debug": res.get("routing"),
           "errors": res.get("errors"),
-          "events": personalized_events,
+          "events": serialize_events(personalized_events),
           "total": len(personalized_events),
         }
 
@@ -300,19 +361,22 @@ def get_events(
     # --- CACHE CHECK (location-string queries only) ---
     use_cache = bool(location)
     if use_cache:
-        cached_events = check_cache(location, start_date, end_date)
-        if cached_events is not None:
-            filtered = apply_local_filters(
-                cached_events, event_type_one, category_one, min_price, max_price
-            )
+        entry = check_cache_entry(location, start_date, end_date)
+        if entry is not None and entry["missing_ranges"]:
+            entry = _fill_missing_ranges(location, entry)
+        if entry is not None:
+            entry = _refresh_stale_ranges(location, start_date, end_date, entry)
+            cached_events = entry["events"]
+            filtered = filter_cache_entry(entry, event_type, category, min_price, max_price)
             print(f"[cache] HIT for '{location}' — {len(cached_events)} cached, {len(filtered)} after filters")
             return {
                 "from_cache": True,
+                "stale": entry["stale"],
                 "ticketmaster_status": "cached",
                 "allevents_status": "cached",
                 "eventbrite_status": "cached",
                 "openscraper_status": "cached",
-                "events": filtered,
+                "events": serialize_events(filtered),
                 "total": len(filtered),
             }
 
@@ -325,122 +389,41 @@ def get_events(
     fetch_min_price = None if use_cache else min_price
     fetch_max_price = None if use_cache else max_price
 
-
-    tm_data = ticketmaster.fetch_events(
-        location=location or "",
+    tasks = build_source_tasks(
+        location=location,
+        lat=lat,
+        lon=lon,
+        radius=radius,
         start_date=start_date,
         end_date=end_date,
         event_type=fetch_event_type,
         category=fetch_category,
         min_price=fetch_min_price,
         max_price=fetch_max_price,
-        lat=lat,
-        lon=lon,
-        radius=radius,
+        include_location_sources=bool(location),
     )
-    ae_data = {"events": []}
-    eb_data = {"events": []}
-    os_data = {"events": []}
-
-    if location:
-        ae_data = allevents.fetch_events(
-            location=location,
-            start_date=start_date,
-            end_date=end_date,
-            event_type=fetch_event_type,
-            category=fetch_category,
-            min_price=fetch_min_price,
-            max_price=fetch_max_price,
-        )
-        eb_data = scrape_eventbrite(
-            location=location,
-            start_date=start_date,
-            end_date=end_date,
-            event_type=fetch_event_type,
-            category=fetch_category,
-            min_price=fetch_min_price,
-            max_price=fetch_max_price,
-        )
-        site_info = find_event_site_url(location)
-        site_url = site_info.get("url") if "error" not in site_info else None
-        if site_url:
-            os_data = scrape_events_from_url(
-                site_url,
-                location,
-                start_date=start_date,
-                end_date=end_date,
-                event_type=fetch_event_type,
-                category=fetch_category,
-                min_price=fetch_min_price,
-                max_price=fetch_max_price,
-            )
-            if "error" in os_data or "_scrape_failure_reason" in os_data:
-                print("Open scraper failed for URL:", site_url, "Reason:", os_data.get("error") or os_data.get("_scrape_failure_reason"))
-                os_data = {"events": []}
-
-    # --- COMBINE + DEDUPLICATE ---
-    combined_events = []
-    seen_event_keys = set()
-    tm_count = 0
-    ae_count = 0
-    eb_count = 0
-    os_count = 0
-
-    def get_event_key(name, date_str):
-        name_norm = str(name).lower().strip()
-        date_norm = str(date_str)[:10] if date_str else "unknown-date"
-        return f"{name_norm}|{date_norm}"
-
-    for event in tm_data.get("events", []):
-        key = get_event_key(event.get("name"), event.get("date"))
-        if key not in seen_event_keys:
-            event["source"] = "Ticketmaster"
-            combined_events.append(event)
-            seen_event_keys.add(key)
-            tm_count += 1
-
-    for event in ae_data.get("events", []):
-        key = get_event_key(event.get("name"), event.get("date"))
-        if key not in seen_event_keys:
-            combined_events.append(event)
-            seen_event_keys.add(key)
-            ae_count += 1
-
-    for event in eb_data.get("events", []):
-        key = get_event_key(event.get("name"), event.get("date"))
-        if key not in seen_event_keys:
-            combined_events.append(event)
-            seen_event_keys.add(key)
-            eb_count += 1
-
-    for event in os_data.get("events", []):
-        key = get_event_key(event.get("name"), event.get("date"))
-        if key not in seen_event_keys:
-            combined_events.append(event)
-            seen_event_keys.add(key)
-            os_count += 1
-
-    print("TM events:", tm_count)
-    print("AE events:", ae_count)
-    print("EB events:", eb_count)
-    print("OS events:", os_count)
-
-    # --- STORE IN CACHE ---
+    # --- FETCH, COMBINE + STORE IN CACHE ---
+    # Identical concurrent misses wait on the in-flight fetch and share it
     if use_cache:
-        store_cache(location, start_date, end_date, combined_events)
-
-    # --- APPLY FILTERS LOCALLY ---
-    if use_cache:
-        combined_events = apply_local_filters(
-            combined_events, event_type, category, min_price, max_price
+        fetched = _inflight.do(
+            generate_cache_key(location, start_date, end_date),
+            lambda: _fetch_sources(tasks, location, start_date, end_date, store=True),
+            timeout=INFLIGHT_WAIT_S,
         )
+    else:
+        fetched = _fetch_sources(tasks, location, start_date, end_date, store=False)
+    results = fetched["results"]
+    combined_events = fetched["events"]
 
+    # --- APPLY FILTERS LOCALLY ---
+    # One pass over the full set; for cacheable queries the sources were
+    # fetched unfiltered.
     print("before filter:", len(combined_events))
 
     combined_events = apply_post_filters(
         combined_events,
-        event_types=event_type if isinstance(event_type, list) else ([event_type] if event_type else []),
-        categories=category if isinstance(category, list) else ([category] if category else []),
+        event_types=event_type,
+        categories=category,
         min_price=min_price,
         max_price=max_price,
         durations=None,  # add later if you wire duration into the request
@@ -450,11 +433,11 @@ def get_events(
 
     return {
         "from_cache": False,
-        "ticketmaster_status": "error" if "error" in tm_data else "ok",
-        "allevents_status": "error" if "error" in ae_data else "ok",
-        "eventbrite_status": "error" if "error" in eb_data else "ok",
-        "openscraper_status": "error" if "error" in os_data else "ok",
-        "events": combined_events,
+        "ticketmaster_status": provider_status(results.get("ticketmaster")),
+        "allevents_status": provider_status(results.get("allevents")),
+        "eventbrite_status": provider_status(results.get("eventbrite")),
+        "openscraper_status": provider_status(results.get("openscraper")),
+        "events": serialize_events(combined_events),
         "total": len(combined_events),
     }
 
@@ -477,240 +460,136 @@ def get_events_stream(
 ):
     """
     Stream events with progress updates. Fetches from multiple sources in parallel
-    and sends progress updates via Server-Sent Events.
+    through the shared fan-out executor and sends a Server-Sent Event as each
+    source finishes or misses its deadline.
     """
     
     def event_generator():
-        # Determine total sources
-        using_location = bool(location and not (lat is not None and lon is not None))
-        total_sources = 4 if using_location else 1  # TM, AE, EB, OS for location; just TM for lat/lon
-
-        # Storage for results from each source
-        results = {
-            "ticketmaster": None,
-            "allevents": None,
-            "eventbrite": None,
-            "openscraper": None,
-            "uploaded": None,
-        }
-        results_lock = threading.Lock()
-        
-        def fetch_ticketmaster():
-            try:
-                data = ticketmaster.fetch_events(
-                    location=location or "",
-                    start_date=start_date,
-                    end_date=end_date,
-                    event_type=event_type,
-                    category=category,
-                    min_price=min_price,
-                    max_price=max_price,
-                    lat=lat,
-                    lon=lon,
-                    radius=radius,
-                )
-                with results_lock:
-                    results["ticketmaster"] = data
-            except Exception as e:
-                print(f"Error fetching Ticketmaster: {e}")
-                with results_lock:
-                    results["ticketmaster"] = {"events": [], "error": str(e)}
-        
-        def fetch_allevents():
-            try:
-                data = allevents.fetch_events(
-                    location=location,
-                    start_date=start_date,
-                    end_date=end_date,
-                    event_type=event_type,
-                    category=category,
-                    min_price=min_price,
-                    max_price=max_price,
-                )
-                with results_lock:
-                    results["allevents"] = data
-            except Exception as e:
-                print(f"Error fetching AllEvents: {e}")
-                with results_lock:
-                    results["allevents"] = {"events": [], "error": str(e)}
-        
-        def fetch_eventbrite():
-            try:
-                data = scrape_eventbrite(
-                    location=location,
-                    start_date=start_date,
-                    end_date=end_date,
-                    event_type=event_type,
-                    category=category,
-                    min_price=min_price,
-                    max_price=max_price,
-                )
-                with results_lock:
-                    results["eventbrite"] = data
-            except Exception as e:
-                print(f"Error fetching Eventbrite: {e}")
-                with results_lock:
-                    results["eventbrite"] = {"events": [], "error": str(e)}
-        
-        def fetch_openscraper():
-            try:
-                site_info = find_event_site_url(location)
-                site_url = site_info.get("url") if "error" not in site_info else None
-                if site_url:
-                    data = scrape_events_from_url(
-                        site_url,
-                        location,
-                        start_date=start_date,
-                        end_date=end_date,
-                        event_type=event_type,
-                        category=category,
-                        min_price=min_price,
-                        max_price=max_price,
-                    )
-                    if "error" in data or "_scrape_failure_reason" in data:
-                        data = {"events": []}
-                else:
-                    data = {"events": []}
-                with results_lock:
-                    results["openscraper"] = data
-            except Exception as e:
-                print(f"Error fetching OpenScraper: {e}")
-                with results_lock:
-                    results["openscraper"] = {"events": [], "error": str(e)}
-
-        def fetch_uploaded_urls(search_lat, search_lng, search_radius):
-            """Fetch events from user-uploaded URLs near the given coordinates."""
-            try:
-                events = get_uploaded_events_near(search_lat, search_lng, search_radius)
-                with results_lock:
-                    results["uploaded"] = {"events": events}
-            except Exception as e:
-                print(f"Error fetching uploaded URLs: {e}")
-                with results_lock:
-                    results["uploaded"] = {"events": [], "error": str(e)}
-        
         # Validation check
         if lat is None and lon is None and not location:
             error_msg = "Provide location (city, state) or lat and lon."
             yield f"data: {json.dumps({'error': error_msg, 'progress': 0, 'total': 0})}\n\n"
             return
-        
-        # Start threads for data fetching
-        threads = []
-
-        t = threading.Thread(target=fetch_ticketmaster, daemon=True)
-        t.start()
-        threads.append(("Ticketmaster", t))
 
+        using_location = bool(location and not (lat is not None and lon is not None))
+        # City/state searches go through the event cache, exactly like /api/events
+        use_cache = using_location
+
+        if use_cache:
+            entry = check_cache_entry(location, start_date, end_date)
+            if entry is not None and entry["missing_ranges"]:
+                yield f"data: {json.dumps({'source': 'Cache', 'progress': 0, 'status': 'filling'})}\n\n"
+                entry = _fill_missing_ranges(location, entry)
+            if entry is not None:
+                entry = _refresh_stale_ranges(location, start_date, end_date, entry)
+                filtered = filter_cache_entry(entry, event_type, category, min_price, max_price)
+                print(f"[cache] HIT for '{location}' — {len(entry['events'])} cached, {len(filtered)} after filters")
+                yield f"data: {json.dumps({'source': 'Cache', 'progress': 100, 'status': 'completed'})}\n\n"
+                columns = entry.get("columns")
+                if columns is None:
+                    columns = EventSet.from_events(entry["events"])
+                uu_data = _uploaded_events_near_centroid(columns)
+                combined_events = merge_unique(filtered, uu_data["events"])
+                final_data = {
+                    "events": serialize_events(combined_events),
+                    "total": len(combined_events),
+                    "progress": 100,
+                    "status": "complete",
+                    "from_cache": True,
+                    "stale": entry["stale"],
+                    "ticketmaster_status": "cached",
+                    "allevents_status": "cached",
+                    "eventbrite_status": "cached",
+                    "openscraper_status": "cached",
+                    "uploaded_status": provider_status(uu_data),
+                }
+                yield f"data: {json.dumps(final_data)}\n\n"
+                return
+
+        # For cacheable queries, fetch the broadest dataset and filter locally
+        tasks = build_source_tasks(
+            location=location,
+            lat=lat,
+            lon=lon,
+            radius=radius,
+            start_date=start_date,
+            end_date=end_date,
+            event_type=None if use_cache else event_type,
+            category=None if use_cache else category,
+            min_price=None if use_cache else min_price,
+            max_price=None if use_cache else max_price,
+            include_location_sources=using_location,
+        )
         if not using_location and lat is not None and lon is not None:
             # For lat/lon searches, we can query uploaded URLs in parallel
-            t = threading.Thread(target=fetch_uploaded_urls, args=(lat, lon, radius or 25), daemon=True)
-            t.start()
-            threads.append(("Uploaded URLs", t))
-            total_sources += 1
-
-        if using_location:
-            t = threading.Thread(target=fetch_allevents, daemon=True)
-            t.start()
-            threads.append(("AllEvents", t))
-            
-            t = threading.Thread(target=fetch_eventbrite, daemon=True)
-            t.start()
-            threads.append(("Eventbrite", t))
-            
-            t = threading.Thread(target=fetch_openscraper, daemon=True)
-            t.start()
-            threads.append(("OpenScraper", t))
-        
-        # Wait for threads and send progress updates
-        completed = 0
-        for source_name, thread in threads:
-            thread.join()
-            completed += 1
-            progress_pct = int((completed / total_sources) * 100)
-            yield f"data: {json.dumps({'source': source_name, 'progress': progress_pct, 'status': 'completed'})}\n\n"
-        
-        # Combine results (treat missing/None providers as empty)
-        tm_data = results.get("ticketmaster") or {"events": []}
-        ae_data = results.get("allevents") or {"events": []}
-        eb_data = results.get("eventbrite") or {"events": []}
-        os_data = results.get("openscraper") or {"events": []}
-
-        # For city/state searches, query uploaded URLs using centroid of collected events
-        if using_location and results.get("uploaded") is None:
-            all_source_events = (
-                tm_data.get("events", []) + ae_data.get("events", [])
-                + eb_data.get("events", []) + os_data.get("events", [])
-            )
-            coord_lats = [float(e["latitude"]) for e in all_source_events if e.get("latitude") is not None]
-            coord_lngs = [float(e["longitude"]) for e in all_source_events if e.get("longitude") is not None]
-            if coord_lats and coord_lngs:
-                centroid_lat = sum(coord_lats) / len(coord_lats)
-                centroid_lng = sum(coord_lngs) / len(coord_lngs)
-                try:
-                    uploaded = get_uploaded_events_near(centroid_lat, centroid_lng, 50)
-                    results["uploaded"] = {"events": uploaded}
-                except Exception as e:
-                    print(f"Error fetching uploaded URLs (city/state): {e}")
-                    results["uploaded"] = {"events": []}
-            else:
-                results["uploaded"] = {"events": []}
+            tasks["uploaded"] = lambda: {"events": get_uploaded_events_near(lat, lon, radius or 25)}
+
+        # Identical concurrent misses follow the in-flight fetch instead of
+        # starting their own; only the leader streams per-source progress.
+        shared = None
+        flight, leader = None, True
+        if use_cache:
+            cache_key = generate_cache_key(location, start_date, end_date)
+            flight, leader = _inflight.begin(cache_key)
+        if not leader:
+            yield f"data: {json.dumps({'source': 'In-flight search', 'progress': 0, 'status': 'waiting'})}\n\n"
+            shared = flight.wait(INFLIGHT_WAIT_S)
+            if shared is not None:
+                yield f"data: {json.dumps({'source': 'In-flight search', 'progress': 100, 'status': 'completed'})}\n\n"
+
+        if shared is None:
+            try:
+                # Send a progress update as each source finishes (or misses its deadline)
+                results: Dict[str, Optional[Dict[str, Any]]] = {}
+                timed_out = []
+                total_sources = len(tasks)
+                for completed, r in enumerate(iter_fanout(tasks), start=1):
+                    results[r.name] = r.data
+                    if r.timed_out:
+                        timed_out.append(r.name)
+                    progress_pct = int((completed / total_sources) * 100)
+                    status = "timeout" if r.timed_out else "completed"
+                    yield f"data: {json.dumps({'source': SOURCE_LABELS[r.name], 'progress': progress_pct, 'status': status})}\n\n"
+
+                combined_events, _ = combine_source_results(results)
+                _store_unless_partial(use_cache, location, start_date, end_date, combined_events, timed_out)
+                shared = {"events": combined_events, "results": results, "timed_out": timed_out}
+            finally:
+                # Runs on client disconnect too, so followers are never left
+                # waiting on an abandoned stream (they fetch on their own).
+                if use_cache and leader:
+                    _inflight.finish(cache_key, flight, shared, ok=shared is not None)
+
+        # Copy so per-request additions don't leak into the shared payload
+        results = dict(shared["results"])
+        combined_events = shared["events"]
+
+        if use_cache:
+            # For city/state searches, query uploaded URLs using centroid of
+            # collected events; one columnar pass serves that and the filters.
+            columns = EventSet.from_events(combined_events)
+            results["uploaded"] = _uploaded_events_near_centroid(columns)
+            local_filter = EventFilter(event_types=event_type, categories=category, min_price=min_price, max_price=max_price)
+            combined_events = columns.filter(local_filter).to_dicts()
 
         uu_data = results.get("uploaded") or {"events": []}
-
-        combined_events = []
-        seen_event_keys = set()
-
-        def get_event_key(name, date_str):
-            name_norm = str(name).lower().strip()
-            date_norm = str(date_str)[:10] if date_str else "unknown-date"
-            return f"{name_norm}|{date_norm}"
-
-        for event in tm_data.get("events", []):
-            key = get_event_key(event.get("name"), event.get("date"))
-            if key not in seen_event_keys:
-                event["source"] = "Ticketmaster"
-                combined_events.append(event)
-                seen_event_keys.add(key)
-
-        for event in ae_data.get("events", []):
-            key = get_event_key(event.get("name"), event.get("date"))
-            if key not in seen_event_keys:
-                combined_events.append(event)
-                seen_event_keys.add(key)
-
-        for event in eb_data.get("events", []):
-            key = get_event_key(event.get("name"), event.get("date"))
-            if key not in seen_event_keys:
-                combined_events.append(event)
-                seen_event_keys.add(key)
-
-        for event in os_data.get("events", []):
-            key = get_event_key(event.get("name"), event.get("date"))
-            if key not in seen_event_keys:
-                combined_events.append(event)
-                seen_event_keys.add(key)
-
-        for event in uu_data.get("events", []):
-            key = get_event_key(event.get("name"), event.get("date"))
-            if key not in seen_event_keys:
-                combined_events.append(event)
-                seen_event_keys.add(key)
+        combined_events = merge_unique(combined_events, uu_data.get("events", []))
 
         # Send final results
         final_data = {
-            "events": combined_events,
+            "events": serialize_events(combined_events),
             "total": len(combined_events),
             "progress": 100,
             "status": "complete",
-            "ticketmaster_status": "error" if "error" in tm_data else "ok",
-            "allevents_status": "error" if "error" in ae_data else "ok",
-            "eventbrite_status": "error" if "error" in eb_data else "ok",
-            "openscraper_status": "error" if "error" in os_data else "ok",
-            "uploaded_status": "error" if "error" in uu_data else "ok",
+            "from_cache": False,
+            "ticketmaster_status": provider_status(results.get("ticketmaster")),
+            "allevents_status": provider_status(results.get("allevents")),
+            "eventbrite_status": provider_status(results.get("eventbrite")),
+            "openscraper_status": provider_status(results.get("openscraper")),
+            "uploaded_status": provider_status(results.get("uploaded")),
         }
         yield f"data: {json.dumps(final_data)}\n\n"
-    
+
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 
@@ -720,7 +599,7 @@ def get_direct_events(location: str):
     Proxies the request to AllEvents.in, handling the POST requirements.
     Usage: /api/direct-events?location=New York
     """
-    return allevents.fetch_events(location=location)
+    return serialize_result(allevents.fetch_events(location=location))
 
 @app.get("/api/open_scrape")
 def find(prompt: str):
@@ -737,7 +616,7 @@ def scrape_events(location: str):
     Returns an empty event list if the site cannot be accessed.
     Usage: /api/scrape-events?location=santa barbara
     """
-    site_info = find_event_site_url(location)
+    site_info = resolve_event_site_url(location)
 
     if "error" in site_info:
         return {"events": [], "total": 0, "error": site_info["error"]}
@@ -749,6 +628,8 @@ def scrape_events(location: str):
     scrape_result = scrape_events_from_url(url, location)
 
     if "error" in scrape_result or "_scrape_failure_reason" in scrape_result:
+        if scrape_result.get("_scrape_failure_reason"):
+            record_scrape_result(location, url, scrape_result["_scrape_failure_reason"])
         return {
             "events": [],
             "total": 0,
@@ -756,8 +637,9 @@ def scrape_events(location: str):
             "attempted_url": url,
         }
 
+    record_scrape_result(location, url)
     scrape_result["source_url"] = url
-    return scrape_result
+    return serialize_result(scrape_result)
 
 
 @app.post("/api/upload-url")
@@ -768,8 +650,6 @@ def upload_url(payload: dict):
     If events are found, stores the URL + events + centroid in Firestore under urls_added/.
     Usage: POST /api/upload-url  body: {"url": "https://..."}
     """
-    from api.firestore import db
-
     url = (payload.get("url") or "").strip()
     if not url:
         return {"success": False, "error": "No URL provided."}
@@ -800,24 +680,8 @@ def upload_url(payload: dict):
         else detected_city or "Unknown"
     )
 
-    # Compute centroid from event coordinates
-    lats = [float(e["latitude"]) for e in events if e.get("latitude") is not None]
-    lngs = [float(e["longitude"]) for e in events if e.get("longitude") is not None]
-    centroid_lat = sum(lats) / len(lats) if lats else None
-    centroid_lng = sum(lngs) / len(lngs) if lngs else None
-
-    # Store in Firestore under urls_added/
-    doc_ref = db.collection("urls_added").document()
-    doc_ref.set({
-        "url": url,
-        "detected_city": detected_city,
-        "detected_state": detected_state,
-        "centroid_lat": centroid_lat,
-        "centroid_lng": centroid_lng,
-        "events": events,
-        "event_count": len(events),
-        "added_at": datetime.datetime.utcnow().isoformat(),
-    })
+    # Store metadata + centroid under urls_added/, events in a payload doc
+    store_uploaded_url(url, detected_city, detected_state, events)
 
     return {
         "success": True,
@@ -841,7 +705,7 @@ def eventbrite_scrape(
     Scrapes Eventbrite for events in a given location.
     Usage: /api/eventbrite-scrape?location=santa barbara&start_date=2026-03-01&end_date=2026-04-01
     """
-    return scrape_eventbrite(
+    return serialize_result(scrape_eventbrite(
         location,
         start_date=start_date,
         end_date=end_date,
@@ -849,4 +713,4 @@ def eventbrite_scrape(
         category=category,
         min_price=min_price,
         max_price=max_price,
-    )
+    ))
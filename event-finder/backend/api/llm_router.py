@@ -3,11 +3,15 @@ from __future__ import annotations
 
 import json
 import os
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 from api import ticketmaster, allevents
 from api.eventbrite_scraper import scrape_eventbrite
+from api.openai_client import create_response
+from api.fanout import iter_fanout, PROVIDER_TIMEOUTS, DEFAULT_PROVIDER_TIMEOUT_S
+from api.models import Event
 from dotenv import load_dotenv
 
 # Load backend/.env reliably regardless of current working directory
@@ -31,6 +35,11 @@ REQUIRE_OPENAI = os.getenv("ROUTER_REQUIRE_OPENAI", "false").strip().lower() in
 
 ROUTER_DEBUG = os.getenv("ROUTER_DEBUG", "0") == "1"
 
+# Run provider calls concurrently (set ROUTER_PARALLEL=0 for the old sequential path)
+ROUTER_PARALLEL = os.getenv("ROUTER_PARALLEL", "1") == "1"
+# Overall deadline (seconds) for all provider calls of one routed request
+ROUTER_DEADLINE_S = float(os.getenv("ROUTER_DEADLINE_S", "60"))
+
 def _router_log(label: str, obj) -> None:
     if not ROUTER_DEBUG:
         return
@@ -155,8 +164,6 @@ def _llm_choose_providers(
         })
         return fallback
 
-    client = OpenAI(api_key=api_key)
-
     provider_list = sorted(PROVIDERS.keys())
     providers_min = 2 if len(provider_list) >= 2 else 1
     providers_max = min(4, len(provider_list))
@@ -222,7 +229,8 @@ Output format (JSON only):
 """.strip()
 
     try:
-        resp = client.responses.create(
+        resp = create_response(
+            api_key,
             model=OPENAI_MODEL,
             input=[
                 {"role": "system", "content": instructions},
@@ -293,8 +301,8 @@ def _source_from_url(url: str, fallback: str) -> str:
     return domain
 
 
-def _normalize_event(provider: str, e: Dict[str, Any]) -> Dict[str, Any]:
-    out = dict(e)
+def _normalize_event(provider: str, e: Dict[str, Any]) -> Event:
+    out = Event.from_dict(e)
     out["provider"] = provider
     out.setdefault("source", _source_from_url(out.get("url", ""), provider))
 
@@ -343,7 +351,18 @@ def route_and_fetch_events(
     categories: Optional[List[str]] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
+    parallel: bool = ROUTER_PARALLEL,
+    deadline_s: Optional[float] = ROUTER_DEADLINE_S,
 ) -> Dict[str, Any]:
+    """
+    Pick providers for the request, fetch from them, and merge the results.
+
+    With parallel=True (the default) every provider/type call runs
+    concurrently on the shared fan-out executor; calls still running at
+    *deadline_s* are reported in errors as timed out. Results are merged in
+    call order either way, so dedupe keeps the same copy of an event as
+    the sequential path. provider_results records per-call latency.
+    """
     routing = _llm_choose_providers(
         location=location,
         start_date=start_date,
@@ -359,61 +378,60 @@ def route_and_fetch_events(
     all_events: List[Dict[str, Any]] = []
     errors: Dict[str, str] = {}
 
-    def _merge_results(provider: str, res: Dict[str, Any]) -> None:
-        provider_results[provider] = {"total": res.get("total", 0)}
+    # One call per (provider, event type). Ticketmaster gets a separate call
+    # for each selected type (max 3); other providers get a single call.
+    calls: Dict[str, Tuple[ProviderName, Dict[str, Any]]] = {}
+    for provider in chosen:
+        if provider not in PROVIDERS:
+            continue
+        if provider == "ticketmaster":
+            selected_types = [t for t in (event_types or []) if t][:3] or [None]
+        else:
+            selected_types = [None]
+        provider_results[provider] = {"calls": len(selected_types), "total": 0, "added_events": 0, "latency_ms": {}}
+        for i, t in enumerate(selected_types):
+            calls[f"{provider}#{i}"] = (provider, {
+                "location": location,
+                "start_date": start_date,
+                "end_date": end_date,
+                "event_type": t,
+                "category": None,
+                "min_price": min_price,
+                "max_price": max_price,
+            })
+
+    def _merge_results(call_name: str, res: Dict[str, Any], latency_ms: int) -> None:
+        provider, kwargs = calls[call_name]
+        pr = provider_results[provider]
+        pr["total"] += res.get("total", 0) or 0
+        pr["latency_ms"][kwargs["event_type"] or "all"] = latency_ms
         if res.get("warning"):
-            provider_results[provider]["warning"] = res["warning"]
+            pr["warning"] = res["warning"]
         if res.get("error"):
             errors[provider] = str(res["error"])
 
-        for e in (res.get("events") or []):
+        events = res.get("events") or []
+        pr["added_events"] += len(events)
+        for e in events:
             all_events.append(_normalize_event(provider, e))
 
-    for provider in chosen:
-        adapter = PROVIDERS.get(provider)
-        if not adapter:
-            continue
-
-        try:
-            if provider == "ticketmaster":
-                selected_types = [t for t in (event_types or []) if t]
-
-                if not selected_types:
-                    selected_types = [None]
-                else:
-                    selected_types = selected_types[:3]
-
-                provider_results[provider] = {"calls": len(selected_types), "total": 0}
-                added_before = len(all_events)
-
-                for t in selected_types:
-                    res = adapter(
-                        location=location,
-                        start_date=start_date,
-                        end_date=end_date,
-                        event_type=t,
-                        category=None,    
-                        min_price=min_price,
-                        max_price=max_price,
-                    )
-                    _merge_results(provider, res)
-
-                provider_results[provider]["added_events"] = len(all_events) - added_before
-
-            else:
-                res = adapter(
-                    location=location,
-                    start_date=start_date,
-                    end_date=end_date,
-                    event_type=None,
-                    category=None,
-                    min_price=min_price,
-                    max_price=max_price,
-                )
-                _merge_results(provider, res)
-
-        except Exception as ex:
-            errors[provider] = str(ex)
+    if parallel:
+        tasks = {
+            name: (lambda provider=provider, kwargs=kwargs: PROVIDERS[provider](**kwargs))
+            for name, (provider, kwargs) in calls.items()
+        }
+        timeouts = {name: PROVIDER_TIMEOUTS.get(provider, DEFAULT_PROVIDER_TIMEOUT_S) for name, (provider, _) in calls.items()}
+        finished = {r.name: r for r in iter_fanout(tasks, timeouts=timeouts, deadline_s=deadline_s)}
+        for name in calls:
+            _merge_results(name, finished[name].data, finished[name].latency_ms)
+    else:
+        for name, (provider, kwargs) in calls.items():
+            started = time.monotonic()
+            try:
+                res = PROVIDERS[provider](**kwargs)
+            except Exception as ex:
+                res = {"events": [], "error": str(ex)}
+            _merge_results(name, res, int((time.monotonic() - started) * 1000))
 
     all_events = _dedupe_events(all_events)
 
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU with optional per-entry TTL and an optional
+    byte budget. Sizes are supplied by the caller on put() (e.g. the length
+    of the JSON payload) since Python object sizes are expensive to measure.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_s: Optional[float] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, expires_at, size = item
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._data[key]
+                self._bytes -= size
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, size: int = 0, ttl_s: Optional[float] = None) -> None:
+        ttl = ttl_s if ttl_s is not None else self.ttl_s
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return  # would evict everything else and still not fit
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+            if item is None:
+                return None
+            self._bytes -= item[2]
+            return item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
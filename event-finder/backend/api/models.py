@@ -0,0 +1,203 @@
+from collections.abc import MutableMapping
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from api.filters import SEARCH_FIELD, SearchFields, day_of
+
+# ---------------------------------------------------------------------------
+# Canonical event
+# ---------------------------------------------------------------------------
+# Keys every provider emits, in serialization order. The search fields
+# have their own slot; anything else a provider adds goes in Event._extra.
+TEXT_FIELDS = (
+    "id", "name", "url", "time", "status", "location", "venue", "address",
+    "image", "description", "type", "category", "price", "priceRange",
+    "source", "provider",
+)
+DATE_FIELDS = ("date", "end_date")
+COORD_FIELDS = ("latitude", "longitude")
+WIRE_FIELDS = ("id", "name", "url", "date", "end_date") + TEXT_FIELDS[3:] + COORD_FIELDS
+
+_SLOT_FIELDS = frozenset(WIRE_FIELDS)
+_MISSING = object()
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Event(MutableMapping):
+    """
+    One event, as emitted by every provider. Common fields live in slots
+    with parsed types: date / end_date as datetime.date and latitude /
+    longitude as floats; numeric prices are in the search fields
+    (SEARCH_FIELD, a SearchFields) once the event is annotated. It reads
+    and writes like the dict it replaces, keyed by the wire names; a date
+    that isn't a bare YYYY-MM-DD ("TBD", "2026-03-05T19:00") keeps its
+    text so to_dict() returns what the provider sent. A key is present
+    once it is set, even to None.
+    """
+
+    __slots__ = WIRE_FIELDS + ("_date_text", "_end_date_text", "_search", "_extra")
+
+    def __init__(self, **fields: Any):
+        self._extra: Optional[Dict[str, Any]] = None
+        for key, value in fields.items():
+            self._set(key, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Event":
+        return cls(**data)
+
+    def copy(self) -> "Event":
+        return Event.from_dict(self)
+
+    # -- typed fields ---------------------------------------------------------
+
+    def _set(self, key: str, value: Any) -> None:
+        if key in DATE_FIELDS:
+            day = day_of(value)
+            parsed = date.fromisoformat(day) if day else None
+            setattr(self, key, parsed)
+            text = None if parsed is not None and (value == day or type(value) is date) else value
+            setattr(self, "_" + key + "_text", text)
+        elif key in COORD_FIELDS:
+            setattr(self, key, _to_float(value))
+        elif key in _SLOT_FIELDS:
+            setattr(self, key, value)
+        elif key == SEARCH_FIELD:
+            self._search = SearchFields.from_stored(value) or value
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    # -- mapping interface ----------------------------------------------------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in _SLOT_FIELDS:
+            if key == SEARCH_FIELD:
+                return getattr(self, "_search", default)
+            return self._extra.get(key, default) if self._extra else default
+        value = getattr(self, key, _MISSING)
+        if value is _MISSING:
+            return default
+        if key in DATE_FIELDS:
+            text = getattr(self, "_" + key + "_text")
+            return text if text is not None or value is None else value.isoformat()
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._set(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if key in _SLOT_FIELDS or key == SEARCH_FIELD:
+            slot = "_search" if key == SEARCH_FIELD else key
+            if getattr(self, slot, _MISSING) is _MISSING:
+                raise KeyError(key)
+            delattr(self, slot)
+        elif self._extra and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in _SLOT_FIELDS:
+            return getattr(self, key, _MISSING) is not _MISSING
+        if key == SEARCH_FIELD:
+            return hasattr(self, "_search")
+        return bool(self._extra) and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key in WIRE_FIELDS:
+            if getattr(self, key, _MISSING) is not _MISSING:
+                yield key
+        if hasattr(self, "_search"):
+            yield SEARCH_FIELD
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Event({self.to_dict(internal=False)!r})"
+
+    # -- serialization --------------------------------------------------------
+
+    def to_dict(self, internal: bool = True) -> Dict[str, Any]:
+        """Plain dict of the wire fields. internal=False leaves out the search fields."""
+        out: Dict[str, Any] = {}
+        for key in WIRE_FIELDS:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                out[key] = value
+        if internal and hasattr(self, "_search"):
+            out[SEARCH_FIELD] = _stored(self._search)
+        if self._extra:
+            out.update(self._extra)
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Serialization at the API / storage boundary
+# ---------------------------------------------------------------------------
+
+def _stored(fields: Any) -> Any:
+    return fields.to_dict() if isinstance(fields, SearchFields) else fields
+
+
+def to_events(events: Iterable[Dict[str, Any]]) -> List[Event]:
+    """Events as Event objects (dicts are converted, Events are kept)."""
+    return [ev if isinstance(ev, Event) else Event.from_dict(ev) for ev in events]
+
+
+def plain_events(events: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Plain dicts for storage (Firestore maps), search fields included."""
+    out = []
+    for ev in events:
+        if isinstance(ev, Event):
+            out.append(ev.to_dict())
+        elif isinstance(ev.get(SEARCH_FIELD), SearchFields):
+            out.append({**ev, SEARCH_FIELD: ev[SEARCH_FIELD].to_dict()})
+        else:
+            out.append(ev)
+    return out
+
+
+def serialize_events(events: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Plain dicts for an API response, without the internal search fields."""
+    out = []
+    for ev in events:
+        if isinstance(ev, Event):
+            out.append(ev.to_dict(internal=False))
+        elif SEARCH_FIELD in ev:
+            out.append({k: v for k, v in ev.items() if k != SEARCH_FIELD})
+        else:
+            out.append(ev)
+    return out
+
+
+def serialize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """A provider response with its "events" serialized."""
+    if not isinstance(result, dict) or "events" not in result:
+        return result
+    return {**result, "events": serialize_events(result["events"] or [])}
+
+
+def json_default(obj: Any) -> Any:
+    """json.dumps default= hook: Events and search fields as dicts, anything else as str."""
+    if isinstance(obj, (Event, SearchFields)):
+        return obj.to_dict()
+    return str(obj)
@@ -1,30 +1,15 @@
 import os
 import json
-import ssl
-import urllib3
 from urllib.parse import urlparse
-import cloudscraper
 from bs4 import BeautifulSoup
 from typing import Dict, Any
 from pathlib import Path
 from dotenv import load_dotenv, dotenv_values
-from requests.adapters import HTTPAdapter
-
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-
-class _SSLAdapter(HTTPAdapter):
-    """
-    Mounts an SSL context with certificate verification disabled.
-    Required for urllib3 2.x + OpenSSL 3.x where passing verify=False alone
-    raises 'Cannot set verify_mode to CERT_NONE when check_hostname is enabled'.
-    """
-    def init_poolmanager(self, *args, **kwargs):
-        ctx = ssl.create_default_context()
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-        kwargs["ssl_context"] = ctx
-        return super().init_poolmanager(*args, **kwargs)
+from api.http_client import get_scraper, conditional_get, remember_response
+from api.openai_client import create_chat_completion
+from api.extraction_cache import extraction_key, get_extraction, store_extraction
+from api.filters import filter_events
+from api.models import Event
 
 # ---------------------------------------------------------
 # Environment Setup
@@ -66,10 +51,10 @@ def run_open_query(prompt: str) -> Dict[str, Any]:
         return {"error": "OPENAI_API_KEY not configured in environment."}
 
     model = os.getenv("OPENAI_ROUTER_MODEL", "gpt-4.1-mini")
-    client = OpenAI(api_key=api_key)
 
     try:
-        resp = client.chat.completions.create(
+        resp = create_chat_completion(
+            api_key,
             model=model,
             messages=[
                 {"role": "system", "content": "You are a helpful assistant."},
@@ -98,7 +83,6 @@ def find_event_site_url(location: str) -> Dict[str, Any]:
         return {"error": "OPENAI_API_KEY not configured in environment."}
 
     model = os.getenv("OPENAI_ROUTER_MODEL", "gpt-4.1-mini")
-    client = OpenAI(api_key=api_key)
 
     response_format = {
         "type": "json_schema",
@@ -143,7 +127,8 @@ def find_event_site_url(location: str) -> Dict[str, Any]:
     """
 
     try:
-        resp = client.chat.completions.create(
+        resp = create_chat_completion(
+            api_key,
             model=model,
             messages=[
                 {"role": "system", "content": instructions.strip()},
@@ -175,7 +160,6 @@ def find_fallback_event_site_url(location: str, failed_url: str, reason: str) ->
         return {"error": "OPENAI_API_KEY not configured in environment."}
 
     model = os.getenv("OPENAI_ROUTER_MODEL", "gpt-4.1-mini")
-    client = OpenAI(api_key=api_key)
 
     response_format = {
         "type": "json_schema",
@@ -213,7 +197,8 @@ def find_fallback_event_site_url(location: str, failed_url: str, reason: str) ->
     """
 
     try:
-        resp = client.chat.completions.create(
+        resp = create_chat_completion(
+            api_key,
             model=model,
             messages=[
                 {"role": "system", "content": instructions.strip()},
@@ -235,53 +220,18 @@ def find_fallback_event_site_url(location: str, failed_url: str, reason: str) ->
         return {"error": f"OpenAI API Error: {str(e)}"}
 
 
-def _filter_events(events, start_date=None, end_date=None, event_type=None, category=None, min_price=None, max_price=None):
-    filtered = []
-    for ev in events:
-        ev_date = ev.get("date", "")
-        if start_date and ev_date and ev_date < start_date[:10]:
-            continue
-        if end_date and ev_date and ev_date > end_date[:10]:
-            continue
-        if event_type:
-            ev_type = (ev.get("type") or "").lower()
-            ev_name = (ev.get("name") or "").lower()
-            if event_type.lower() not in ev_type and event_type.lower() not in ev_name:
-                continue
-        if category:
-            ev_name = (ev.get("name") or "").lower()
-            ev_type = (ev.get("type") or "").lower()
-            if category.lower() not in ev_name and category.lower() not in ev_type:
-                continue
-        if min_price is not None or max_price is not None:
-            price_str = str(ev.get("price", "Unknown"))
-            try:
-                price_val = float(price_str.replace("$", "").replace(",", "").strip())
-                if min_price is not None and price_val < min_price:
-                    continue
-                if max_price is not None and price_val > max_price:
-                    continue
-            except (ValueError, TypeError):
-                pass
-        filtered.append(ev)
-    return filtered
-
-
 def _fetch_and_clean(url: str) -> Dict[str, Any]:
     """
-    Fetches a URL with cloudscraper and returns cleaned page text.
+    Fetches a URL with the shared cloudscraper session and returns cleaned page text.
+    Sends conditional-GET validators; on a 304 the previous page text is reused.
     Returns {"page_text": str} on success, or {"error": str, "_scrape_failure_reason": str} on failure.
     """
     try:
-        scraper = cloudscraper.create_scraper(
-            browser={
-                'browser': 'chrome',
-                'platform': 'windows',
-                'desktop': True
-            }
-        )
-        scraper.mount("https://", _SSLAdapter())
-        res = scraper.get(url, timeout=15, verify=False)
+        res, cached_text = conditional_get(get_scraper(), url, timeout=15, verify=False)
+        if cached_text is not None:
+            # Unchanged since the last fetch: the extraction cache will
+            # recognize the same page text and skip the LLM.
+            return {"page_text": cached_text, "not_modified": True}
 
         if res.status_code == 403:
             return {
@@ -330,6 +280,7 @@ def _fetch_and_clean(url: str) -> Dict[str, Any]:
                 "_scrape_failure_reason": "js_rendered",
             }
 
+        remember_response(url, res, page_text)
         return {"page_text": page_text}
 
     except Exception as e:
@@ -368,7 +319,6 @@ def scrape_events_from_url(
 
     # 2. Setup the LLM request
     model = os.getenv("OPENAI_ROUTER_MODEL", "gpt-4.1-mini")
-    client = OpenAI(api_key=api_key)
 
     response_format = {
         "type": "json_schema",
@@ -412,50 +362,66 @@ def scrape_events_from_url(
     For image: Extract the event image/thumbnail URL if available from the EXTRACTED IMAGES section. Match images to events by alt text or proximity. If not found, output an empty string.
     """
 
-    try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": instructions.strip()},
-                {"role": "user", "content": f"Here is the webpage text:\n\n{page_text}"}
-            ],
-            response_format=response_format,
-            temperature=0.1, 
-        )
+    # 3. Reuse the previous extraction if this exact page was seen before
+    cache_key = extraction_key(page_text, model, response_format, f"{instructions}|{url}")
+    normalized = get_extraction(cache_key)
+    if normalized is None:
+        try:
+            resp = create_chat_completion(
+                api_key,
+                model=model,
+                messages=[
+                    {"role": "system", "content": instructions.strip()},
+                    {"role": "user", "content": f"Here is the webpage text:\n\n{page_text}"}
+                ],
+                response_format=response_format,
+                temperature=0.1, 
+            )
         
-        result = json.loads(resp.choices[0].message.content)
-        raw_events = result.get("events", [])
-
-        # Normalize each event to match the standard event format
-        normalized = []
-        for ev in raw_events:
-            evt = {
-                "name": ev.get("name", ""),
-                "date": (ev.get("start_date") or "")[:10],
-                "time": (ev.get("start_date") or "")[11:] if "T" in (ev.get("start_date") or "") else "",
-                "end_date": (ev.get("end_date") or "")[:10],
-                "location": location_context,
-                "venue": "",
-                "image": ev.get("image", ""),
-                "url": url,
-                "price": ev.get("price", "Unknown"),
-                "type": ev.get("event_type", ""),
-                "latitude": ev.get("latitude"),
-                "longitude": ev.get("longitude"),
-                "source": "OpenScraper",
-            }
-            normalized.append(evt)
-
-        # Apply filters
-        filtered = _filter_events(normalized, start_date, end_date, event_type, category, min_price, max_price)
-
-        return {
-            "url_scraped": url,
-            "events": filtered,
-            "total": len(filtered),
-        }
-    except Exception as e:
-        return {"error": f"OpenAI API Error: {str(e)}"}
+            result = json.loads(resp.choices[0].message.content)
+            raw_events = result.get("events", [])
+
+            # Normalize each event to match the standard event format
+            normalized = []
+            for ev in raw_events:
+                evt = Event(
+                    name=ev.get("name", ""),
+                    date=(ev.get("start_date") or "")[:10],
+                    time=(ev.get("start_date") or "")[11:] if "T" in (ev.get("start_date") or "") else "",
+                    end_date=(ev.get("end_date") or "")[:10],
+                    location=location_context,
+                    venue="",
+                    image=ev.get("image", ""),
+                    url=url,
+                    price=ev.get("price", "Unknown"),
+                    type=ev.get("event_type", ""),
+                    latitude=ev.get("latitude"),
+                    longitude=ev.get("longitude"),
+                    source="OpenScraper",
+                )
+                normalized.append(evt)
+        except Exception as e:
+            return {"error": f"OpenAI API Error: {str(e)}"}
+        store_extraction(cache_key, normalized)
+    else:
+        normalized = [ev.copy() for ev in normalized]
+
+    # Apply filters
+    filtered = filter_events(
+        normalized,
+        start_date=start_date,
+        end_date=end_date,
+        event_types=event_type,
+        categories=category,
+        min_price=min_price,
+        max_price=max_price,
+    )
+
+    return {
+        "url_scraped": url,
+        "events": filtered,
+        "total": len(filtered),
+    }
 
 
 def scrape_events_with_location(url: str) -> Dict[str, Any]:
@@ -481,7 +447,6 @@ def scrape_events_with_location(url: str) -> Dict[str, Any]:
     page_text = fetch_result["page_text"]
 
     model = os.getenv("OPENAI_ROUTER_MODEL", "gpt-4.1-mini")
-    client = OpenAI(api_key=api_key)
 
     response_format = {
         "type": "json_schema",
@@ -541,53 +506,60 @@ def scrape_events_with_location(url: str) -> Dict[str, Any]:
     For event_url: Look for hyperlinks in the page that lead to individual event detail pages. Extract the full absolute URL. Output empty string if no specific event link is found.
     """
 
-    try:
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": instructions.strip()},
-                {"role": "user", "content": f"Here is the webpage text:\n\n{page_text}"}
-            ],
-            response_format=response_format,
-            temperature=0.1,
-        )
-
-        result = json.loads(resp.choices[0].message.content)
-        raw_events = result.get("events", [])
-        detected_city = result.get("detected_city", "")
-        detected_state = result.get("detected_state", "")
-        location_label = f"{detected_city}, {detected_state}" if detected_city and detected_state else detected_city or "Unknown"
-
-        # Extract domain name for display (e.g., "eventbrite.com")
-        domain = urlparse(url).netloc.removeprefix("www.")
-
-        normalized = []
-        for ev in raw_events:
-            event_url = ev.get("event_url", "").strip()
-            evt = {
-                "name": ev.get("name", ""),
-                "date": (ev.get("start_date") or "")[:10],
-                "time": (ev.get("start_date") or "")[11:] if "T" in (ev.get("start_date") or "") else "",
-                "end_date": (ev.get("end_date") or "")[:10],
-                "location": location_label,
-                "venue": ev.get("venue", ""),
-                "description": ev.get("description", ""),
-                "image": ev.get("image", ""),
-                "url": event_url if event_url else url,
-                "price": ev.get("price", "Unknown"),
-                "type": ev.get("event_type", ""),
-                "latitude": ev.get("latitude"),
-                "longitude": ev.get("longitude"),
-                "source": domain,
-            }
-            normalized.append(evt)
-
-        return {
-            "url_scraped": url,
-            "events": normalized,
-            "total": len(normalized),
-            "detected_city": detected_city,
-            "detected_state": detected_state,
-        }
-    except Exception as e:
-        return {"error": f"OpenAI API Error: {str(e)}"}
\ No newline at end of file
+    cache_key = extraction_key(page_text, model, response_format, f"{instructions}|{url}")
+    extracted = get_extraction(cache_key)
+    if extracted is None:
+        try:
+            resp = create_chat_completion(
+                api_key,
+                model=model,
+                messages=[
+                    {"role": "system", "content": instructions.strip()},
+                    {"role": "user", "content": f"Here is the webpage text:\n\n{page_text}"}
+                ],
+                response_format=response_format,
+                temperature=0.1,
+            )
+
+            result = json.loads(resp.choices[0].message.content)
+            raw_events = result.get("events", [])
+            detected_city = result.get("detected_city", "")
+            detected_state = result.get("detected_state", "")
+            location_label = f"{detected_city}, {detected_state}" if detected_city and detected_state else detected_city or "Unknown"
+
+            # Extract domain name for display (e.g., "eventbrite.com")
+            domain = urlparse(url).netloc.removeprefix("www.")
+
+            normalized = []
+            for ev in raw_events:
+                event_url = ev.get("event_url", "").strip()
+                evt = Event(
+                    name=ev.get("name", ""),
+                    date=(ev.get("start_date") or "")[:10],
+                    time=(ev.get("start_date") or "")[11:] if "T" in (ev.get("start_date") or "") else "",
+                    end_date=(ev.get("end_date") or "")[:10],
+                    location=location_label,
+                    venue=ev.get("venue", ""),
+                    description=ev.get("description", ""),
+                    image=ev.get("image", ""),
+                    url=event_url if event_url else url,
+                    price=ev.get("price", "Unknown"),
+                    type=ev.get("event_type", ""),
+                    latitude=ev.get("latitude"),
+                    longitude=ev.get("longitude"),
+                    source=domain,
+                )
+                normalized.append(evt)
+        except Exception as e:
+            return {"error": f"OpenAI API Error: {str(e)}"}
+        extracted = {"events": normalized, "detected_city": detected_city, "detected_state": detected_state}
+        store_extraction(cache_key, extracted)
+
+    normalized = [ev.copy() for ev in extracted["events"]]
+    return {
+        "url_scraped": url,
+        "events": normalized,
+        "total": len(normalized),
+        "detected_city": extracted["detected_city"],
+        "detected_state": extracted["detected_state"],
+    }
\ No newline at end of file
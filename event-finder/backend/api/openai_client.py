@@ -0,0 +1,101 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+import httpx
+
+from api.rate_limit import per_minute_bucket
+
+try:
+    from openai import OpenAI
+except ImportError:
+    OpenAI = None
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+# Max LLM requests in flight across the whole process.
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+
+# Account quota (defaults: gpt-4.1-mini, usage tier 1). Set to 0 to disable.
+OPENAI_RPM = float(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = float(os.getenv("OPENAI_TPM", "200000"))
+
+# Output tokens assumed per request when charging the TPM bucket.
+OPENAI_EST_OUTPUT_TOKENS = int(os.getenv("OPENAI_EST_OUTPUT_TOKENS", "1500"))
+
+# How long a request may wait for a slot before giving up.
+OPENAI_QUEUE_TIMEOUT_S = float(os.getenv("OPENAI_QUEUE_TIMEOUT_S", "60"))
+
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+OPENAI_TIMEOUT_S = float(os.getenv("OPENAI_TIMEOUT_S", "90"))
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+_inflight = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+_request_bucket = per_minute_bucket(OPENAI_RPM)
+_token_bucket = per_minute_bucket(OPENAI_TPM)
+
+
+def get_openai_client(api_key: str):
+    """
+    Return the process-wide OpenAI client for *api_key*, creating it on first use.
+    All callers share its keep-alive connection pool.
+    """
+    client = _clients.get(api_key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(api_key)
+            if client is None:
+                client = OpenAI(
+                    api_key=api_key,
+                    max_retries=OPENAI_MAX_RETRIES,
+                    timeout=OPENAI_TIMEOUT_S,
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=OPENAI_MAX_CONCURRENCY,
+                            max_keepalive_connections=OPENAI_MAX_CONCURRENCY,
+                        ),
+                        timeout=OPENAI_TIMEOUT_S,
+                    ),
+                )
+                _clients[api_key] = client
+    return client
+
+
+def _estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Rough token count (~4 chars/token) of the prompt plus expected output."""
+    chars = sum(len(str(m.get("content", ""))) for m in messages)
+    return chars // 4 + OPENAI_EST_OUTPUT_TOKENS
+
+
+@contextmanager
+def llm_slot(estimated_tokens: int):
+    """
+    Wait for a concurrency slot and for RPM/TPM budget, then run the body.
+    Raises RuntimeError if the wait exceeds OPENAI_QUEUE_TIMEOUT_S.
+    """
+    if not _inflight.acquire(timeout=OPENAI_QUEUE_TIMEOUT_S):
+        raise RuntimeError("Timed out waiting for an OpenAI request slot")
+    try:
+        if not _request_bucket.acquire(1, timeout=OPENAI_QUEUE_TIMEOUT_S):
+            raise RuntimeError("Timed out waiting for OpenAI request-rate budget")
+        if not _token_bucket.acquire(estimated_tokens, timeout=OPENAI_QUEUE_TIMEOUT_S):
+            raise RuntimeError("Timed out waiting for OpenAI token-rate budget")
+        yield
+    finally:
+        _inflight.release()
+
+
+def create_chat_completion(api_key: str, **kwargs):
+    """Rate-limited client.chat.completions.create on the shared client."""
+    with llm_slot(_estimate_tokens(kwargs.get("messages") or [])):
+        return get_openai_client(api_key).chat.completions.create(**kwargs)
+
+
+def create_response(api_key: str, **kwargs):
+    """Rate-limited client.responses.create on the shared client."""
+    with llm_slot(_estimate_tokens(kwargs.get("input") or [])):
+        return get_openai_client(api_key).responses.create(**kwargs)
@@ -0,0 +1,49 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Refills at *rate_per_s* up to *capacity*;
+    acquire() blocks until enough tokens are available, so bursts queue
+    instead of being sent all at once.
+    """
+
+    def __init__(self, rate_per_s: float, capacity: float):
+        self.rate_per_s = rate_per_s
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Take *tokens* from the bucket. Returns False if *timeout* expires first."""
+        if self.rate_per_s <= 0:
+            return True
+        # A single request bigger than the whole bucket would wait forever.
+        tokens = min(tokens, self.capacity)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait_s = (tokens - self._tokens) / self.rate_per_s
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_s = min(wait_s, remaining)
+            time.sleep(wait_s)
+
+
+def per_minute_bucket(per_minute: float) -> TokenBucket:
+    """Bucket for a requests/tokens-per-minute quota, allowing a one-minute burst."""
+    return TokenBucket(rate_per_s=per_minute / 60.0, capacity=per_minute)
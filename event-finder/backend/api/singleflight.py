@@ -0,0 +1,78 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class Flight:
+    """One in-flight call; followers block on wait() until the leader finishes."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.result: Any = None
+        self.ok = False
+        self.followers = 0
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Return the leader's result, or None if it failed or *timeout* expired."""
+        if not self._done.wait(timeout):
+            return None
+        return self.result if self.ok else None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller (the
+    leader) does the work, later callers wait for and share its result.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def begin(self, key: Hashable) -> Tuple[Flight, bool]:
+        """Join the flight for *key*. Returns (flight, is_leader)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self.coalesced += 1
+                return flight, False
+            flight = Flight()
+            self._flights[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def finish(self, key: Hashable, flight: Flight, result: Any = None, ok: bool = True) -> None:
+        """Leader only: publish the result (ok=False on failure) and release followers."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result = result
+        flight.ok = ok
+        flight._done.set()
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run fn() once per key across concurrent callers and share its result.
+        A follower whose leader fails (or exceeds *timeout*) runs fn() itself.
+        """
+        flight, leader = self.begin(key)
+        if not leader:
+            result = flight.wait(timeout)
+            if result is not None:
+                return result
+            return fn()
+
+        try:
+            result = fn()
+        except BaseException:
+            self.finish(key, flight, ok=False)
+            raise
+        self.finish(key, flight, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            in_flight = len(self._flights)
+        return {"in_flight": in_flight, "leaders": self.leaders, "coalesced": self.coalesced}
@@ -0,0 +1,150 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from api import ticketmaster, allevents
+from api.eventbrite_scraper import scrape_eventbrite
+from api.fanout import run_fanout
+from api.filters import annotate_events, event_key
+from api.open_scraper import scrape_events_from_url
+from api.rate_limit import TokenBucket
+from firebase_database.site_cache import resolve_event_site_url, record_scrape_result
+
+# ---------------------------------------------------------------------------
+# Provider fan-out shared by /api/events, /api/events-stream and pre-warming
+# ---------------------------------------------------------------------------
+
+# Dedup priority: earlier sources win when two providers return the same event.
+SOURCE_ORDER = ["ticketmaster", "allevents", "eventbrite", "openscraper"]
+
+SOURCE_LABELS = {
+    "ticketmaster": "Ticketmaster",
+    "allevents": "AllEvents",
+    "eventbrite": "Eventbrite",
+    "openscraper": "OpenScraper",
+    "uploaded": "Uploaded URLs",
+}
+
+
+def fetch_openscraper(location: str, **filters) -> Dict[str, Any]:
+    """Resolve the location's event calendar (cached), then scrape it."""
+    site_info = resolve_event_site_url(location)
+    site_url = site_info.get("url") if "error" not in site_info else None
+    if not site_url:
+        return {"events": []}
+    data = scrape_events_from_url(site_url, location, **filters)
+    if "error" in data or "_scrape_failure_reason" in data:
+        print("Open scraper failed for URL:", site_url, "Reason:", data.get("error") or data.get("_scrape_failure_reason"))
+        # Only fetch failures count against the URL; LLM errors say nothing about it.
+        if data.get("_scrape_failure_reason"):
+            record_scrape_result(location, site_url, data["_scrape_failure_reason"])
+        return {"events": []}
+    record_scrape_result(location, site_url)
+    return data
+
+
+def build_source_tasks(
+    *,
+    location: Optional[str],
+    lat: Optional[float],
+    lon: Optional[float],
+    radius: Optional[int],
+    start_date: Optional[str],
+    end_date: Optional[str],
+    event_type: Optional[str],
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    include_location_sources: bool,
+) -> Dict[str, Any]:
+    """Return {source name: zero-arg callable} for run_fanout / iter_fanout."""
+    filters = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "event_type": event_type,
+        "category": category,
+        "min_price": min_price,
+        "max_price": max_price,
+    }
+    tasks = {
+        "ticketmaster": lambda: ticketmaster.fetch_events(
+            location=location or "", lat=lat, lon=lon, radius=radius, **filters
+        ),
+    }
+    if include_location_sources:
+        tasks["allevents"] = lambda: allevents.fetch_events(location=location, **filters)
+        tasks["eventbrite"] = lambda: scrape_eventbrite(location=location, **filters)
+        tasks["openscraper"] = lambda: fetch_openscraper(location, **filters)
+    return tasks
+
+
+def fetch_cacheable_events(
+    location: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    rate_limits: Optional[Dict[str, TokenBucket]] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetch the broadest (unfiltered) dataset for a location/date range, as
+    stored in the event cache. Returns None if any provider timed out, so
+    partial results never replace a cache entry.
+
+    *rate_limits* maps source name -> TokenBucket; a token is taken for
+    each source before the fan-out starts, so the wait never eats into a
+    provider's deadline.
+    """
+    tasks = build_source_tasks(
+        location=location,
+        lat=None,
+        lon=None,
+        radius=None,
+        start_date=start_date,
+        end_date=end_date,
+        event_type=None,
+        category=None,
+        min_price=None,
+        max_price=None,
+        include_location_sources=True,
+    )
+    for name in tasks:
+        if rate_limits and name in rate_limits:
+            rate_limits[name].acquire()
+    fanout = run_fanout(tasks)
+    if any(r.timed_out for r in fanout.values()):
+        return None
+    combined_events, _ = combine_source_results({name: r.data for name, r in fanout.items()})
+    return combined_events
+
+
+def combine_source_results(results: Dict[str, Optional[Dict[str, Any]]]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Merge per-source results in SOURCE_ORDER, dropping duplicate (name, date)
+    pairs. Kept events are annotated with their search fields.
+    """
+    combined_events: List[Dict[str, Any]] = []
+    seen_event_keys = set()
+    counts = {name: 0 for name in SOURCE_ORDER}
+
+    for name in SOURCE_ORDER:
+        data = results.get(name) or {"events": []}
+        for event in data.get("events", []):
+            key = event_key(event.get("name"), event.get("date"))
+            if key in seen_event_keys:
+                continue
+            if name == "ticketmaster":
+                event["source"] = "Ticketmaster"
+            combined_events.append(event)
+            seen_event_keys.add(key)
+            counts[name] += 1
+
+    return annotate_events(combined_events), counts
+
+
+def merge_unique(events: List[Dict[str, Any]], extra: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Append events from *extra* whose (name, date) is not already in *events*."""
+    seen_event_keys = {event_key(e.get("name"), e.get("date")) for e in events}
+    merged = list(events)
+    for event in extra:
+        key = event_key(event.get("name"), event.get("date"))
+        if key not in seen_event_keys:
+            merged.append(event)
+            seen_event_keys.add(key)
+    return merged
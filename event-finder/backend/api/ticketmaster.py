@@ -6,6 +6,8 @@ from dotenv import load_dotenv, dotenv_values
 from typing import Optional, Dict, Any
 from datetime import datetime
 import dateutil.parser
+from api.http_client import get_session, DEFAULT_TIMEOUT_S
+from api.models import Event
 
 # Load backend/.env by path so it works regardless of process CWD; override so our .env wins over empty system env vars
 _BACKEND_DIR = Path(__file__).resolve().parents[1]
@@ -120,7 +122,7 @@ def fetch_events(
         # Debug print to verify the format being sent
         # print(f"DEBUG: Start: {params.get('startDateTime')} | End: {params.get('endDateTime')}")
         
-        response = requests.get(f"{TICKETMASTER_BASE_URL}/events.json", params=params)
+        response = get_session().get(f"{TICKETMASTER_BASE_URL}/events.json", params=params, timeout=DEFAULT_TIMEOUT_S)
         response.raise_for_status()
         data = response.json()
         
@@ -145,18 +147,18 @@ def fetch_events(
                     if max_price is not None and price_data["min"] > max_price:
                         continue
 
-                event_info = {
-                    "id": event.get("id", ""),
-                    "name": event.get("name", "Unknown Event"),
-                    "url": event.get("url", ""),
-                    "date": event.get("dates", {}).get("start", {}).get("localDate", "TBD"),
-                    "status": event.get("dates", {}).get("status", {}).get("code", "unknown"),
-                    "time": event.get("dates", {}).get("start", {}).get("localTime", ""),
-                    "location": "",
-                    "venue": "",
-                    "image": "",
-                    "priceRange": price_data
-                }
+                event_info = Event(
+                    id=event.get("id", ""),
+                    name=event.get("name", "Unknown Event"),
+                    url=event.get("url", ""),
+                    date=event.get("dates", {}).get("start", {}).get("localDate", "TBD"),
+                    status=event.get("dates", {}).get("status", {}).get("code", "unknown"),
+                    time=event.get("dates", {}).get("start", {}).get("localTime", ""),
+                    location="",
+                    venue="",
+                    image="",
+                    priceRange=price_data
+                )
                 
                 if "_embedded" in event and "venues" in event["_embedded"]:
                     venue = event["_embedded"]["venues"][0]
@@ -246,7 +248,7 @@ def fetch_event_details(event_id: str) -> Dict[str, Any]:
         }
 
     try:
-        response = requests.get(f"{TICKETMASTER_BASE_URL}/events/{event_id}.json", params={"apikey": TICKETMASTER_API_KEY})
+        response = get_session().get(f"{TICKETMASTER_BASE_URL}/events/{event_id}.json", params={"apikey": TICKETMASTER_API_KEY}, timeout=DEFAULT_TIMEOUT_S)
         response.raise_for_status()
         data = response.json()
 
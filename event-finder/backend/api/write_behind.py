@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Type
+
+
+class WriteBehindQueue:
+    """
+    Bounded queue of pending writes drained by one background worker.
+
+    Writes are coalesced by key: submitting a key that is still pending
+    replaces its arguments in place, so only the latest version is
+    written. *write_fn* returns True on success and False for a write that
+    can't succeed (e.g. too large), which is not retried. Exceptions of the
+    *retry_on* types are treated as transient and retried with exponential
+    backoff unless a newer version of the key was submitted in the
+    meantime; any other exception fails the write.
+
+    The worker is a daemon thread, so queued writes only land if the
+    process outlives the request (see flush()).
+    """
+
+    def __init__(
+        self,
+        write_fn: Callable[..., bool],
+        max_pending: int = 64,
+        max_retries: int = 3,
+        backoff_s: float = 1.0,
+        name: str = "write-behind",
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+    ):
+        self.write_fn = write_fn
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.name = name
+        self.retry_on = retry_on
+        self._pending: "OrderedDict[Hashable, Tuple[tuple, Dict[str, Any]]]" = OrderedDict()
+        self._active = 0  # writes taken off the queue but not finished
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self.written = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def submit(self, key: Hashable, *args, **kwargs) -> bool:
+        """Queue a write. Returns False (and drops it) if the queue is full."""
+        with self._cond:
+            if key in self._pending:
+                self._pending[key] = (args, kwargs)
+                self.coalesced += 1
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                print(f"[{self.name}] Queue full ({self.max_pending}); dropping write for {key}")
+                return False
+            else:
+                self._pending[key] = (args, kwargs)
+            self._ensure_worker()
+            self._cond.notify_all()
+            return True
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                key, (args, kwargs) = self._pending.popitem(last=False)
+                self._active += 1
+            try:
+                self._write_with_retry(key, args, kwargs)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def _write_with_retry(self, key: Hashable, args: tuple, kwargs: Dict[str, Any]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                ok = self.write_fn(*args, **kwargs)
+            except self.retry_on as e:
+                print(f"[{self.name}] write for {key} raised: {e}")
+            except Exception as e:
+                self.failed += 1
+                print(f"[{self.name}] write for {key} failed: {e}")
+                return
+            else:
+                if ok:
+                    self.written += 1
+                else:
+                    self.failed += 1
+                    print(f"[{self.name}] write for {key} rejected; not retrying")
+                return
+            with self._cond:
+                if key in self._pending:
+                    return  # a newer version is queued; it supersedes this one
+            if attempt < self.max_retries:
+                time.sleep(self.backoff_s * (2 ** attempt))
+        self.failed += 1
+        print(f"[{self.name}] Giving up on {key} after {self.max_retries + 1} attempts")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued write has finished. Returns False on timeout."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            while self._pending or self._active:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = len(self._pending) + self._active
+        return {
+            "pending": pending,
+            "written": self.written,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
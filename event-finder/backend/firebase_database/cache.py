@@ -1,19 +1,105 @@
+import atexit
+import bisect
+import gzip
 import hashlib
 import json
-import math
-from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict, Any
+import os
+import threading
+import time
+from datetime import date, datetime, timezone, timedelta
+from typing import Callable, Optional, List, Dict, Any, Tuple, Union
 
 from firebase_admin import firestore as firestore_module
+from google.api_core.exceptions import (
+    Aborted,
+    DeadlineExceeded,
+    GoogleAPIError,
+    InternalServerError,
+    ServiceUnavailable,
+    TooManyRequests,
+)
+from google.cloud.firestore_v1.base_query import FieldFilter
 
 from api.firestore import db
+from api.event_index import EventIndex
+from api.event_set import EventSet
+from api.filters import EventFilter, annotate_events, day_of
+from api.lru_cache import LRUCache
+from api.models import json_default, plain_events, to_events
+from api.write_behind import WriteBehindQueue
+from firebase_database.geo import GeohashGrid, centroid, covering_cells, encode_geohash, event_coords, within_radius
 
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
 CACHE_COLLECTION = "event_cache"
 CACHE_TTL_HOURS = 24
+# Stale-while-revalidate: entries older than the soft TTL are still served
+# but trigger a background refresh; entries older than the hard TTL are misses.
+CACHE_SOFT_TTL_HOURS = float(os.getenv("CACHE_SOFT_TTL_HOURS", str(CACHE_TTL_HOURS)))
+CACHE_HARD_TTL_HOURS = float(os.getenv("CACHE_HARD_TTL_HOURS", "72"))
+
+# In-process L1 in front of Firestore. The short TTL bounds how long an
+# instance can miss a refresh written by another instance.
+L1_CACHE_MAX_ENTRIES = int(os.getenv("L1_CACHE_MAX_ENTRIES", "256"))
+L1_CACHE_MAX_BYTES = int(os.getenv("L1_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+L1_CACHE_TTL_S = float(os.getenv("L1_CACHE_TTL_S", "300"))
 MAX_DOC_SIZE_BYTES = 900_000  # safety margin under Firestore's 1MB limit
+# Larger payloads are split across chunk documents in a "chunks"
+# subcollection; the whole write must fit in one 10MiB batch commit.
+CACHE_CHUNK_SUBCOLLECTION = "chunks"
+CHUNK_MAX_BYTES = 800_000
+MAX_CACHE_BYTES = 9_000_000
+
+# Payload encoding for new entries: "gzip" stores gzip-compressed JSON as a
+# Bytes field (tagged with CACHE_FORMAT_GZIP); "map" stores plain Firestore
+# maps. Documents without a "format" field are the original map layout.
+CACHE_ENCODING = os.getenv("CACHE_ENCODING", "gzip").strip().lower()
+CACHE_FORMAT_GZIP = "gzip-json/1"
+CACHE_FORMAT_MAP = "map/1"
+
+# Date-range reuse: a request with no exact entry can be answered from an
+# entry for the same location whose range covers it. The per-location
+# index of cached ranges is re-read from Firestore after RANGE_INDEX_TTL_S.
+RANGE_INDEX_MAX_LOCATIONS = int(os.getenv("RANGE_INDEX_MAX_LOCATIONS", "1024"))
+RANGE_INDEX_TTL_S = float(os.getenv("RANGE_INDEX_TTL_S", str(L1_CACHE_TTL_S)))
+
+# Storage layout for dated queries: "range" keeps one document per
+# (location, start, end); "day" keeps one bucket per (location, day) in
+# DAY_CACHE_COLLECTION with its own freshness, so a query only fetches the
+# days that are missing. Open-ended or very long ranges always use "range".
+CACHE_STORAGE_MODE = os.getenv("CACHE_STORAGE_MODE", "range").strip().lower()
+DAY_CACHE_COLLECTION = "event_day_cache"
+DAY_CACHE_MAX_DAYS = int(os.getenv("DAY_CACHE_MAX_DAYS", "92"))
+# Bucket for events without a usable date; replaced on every day-mode store.
+UNDATED_BUCKET = "undated"
+MAX_BATCH_BYTES = 9_000_000
+
+# Serverless hosts (Vercel sets VERCEL=1) may freeze or recycle the
+# process as soon as a response is sent, so work left on background
+# threads can be lost. With SERVERLESS=1 the write-behind queue, background
+# stale refreshes and the uploaded-index poller default to off and their
+# work is done synchronously (or, for the index, by per-request queries).
+# Each can still be turned back on with its own flag on a long-lived host;
+# the in-process prewarm scheduler (prewarm.py) stays off.
+SERVERLESS = os.getenv("SERVERLESS", "1" if os.getenv("VERCEL") else "0") == "1"
+
+# Write-behind: request handlers queue cache writes (store_cache_async) and
+# return; a background worker serializes and writes them, coalescing
+# repeated writes for the same key. Queued entries are primed into L1 with
+# an estimated size (per event) until the worker measures them.
+CACHE_WRITE_BEHIND = os.getenv("CACHE_WRITE_BEHIND", "0" if SERVERLESS else "1") == "1"
+CACHE_WRITE_QUEUE_SIZE = int(os.getenv("CACHE_WRITE_QUEUE_SIZE", "64"))
+CACHE_WRITE_MAX_RETRIES = int(os.getenv("CACHE_WRITE_MAX_RETRIES", "3"))
+CACHE_WRITE_BACKOFF_S = float(os.getenv("CACHE_WRITE_BACKOFF_S", "1.0"))
+CACHE_WRITE_FLUSH_TIMEOUT_S = float(os.getenv("CACHE_WRITE_FLUSH_TIMEOUT_S", "10"))
+L1_EST_EVENT_BYTES = 1500
+# Firestore errors worth retrying a queued write for; anything else fails it.
+_TRANSIENT_ERRORS = (Aborted, DeadlineExceeded, InternalServerError, ServiceUnavailable, TooManyRequests, ConnectionError)
+
+# Stale entries are refreshed on a background thread, or inline (the
+# request that found them waits) with CACHE_BACKGROUND_REFRESH=0.
+CACHE_BACKGROUND_REFRESH = os.getenv("CACHE_BACKGROUND_REFRESH", "0" if SERVERLESS else "1") == "1"
 
 # US state name -> abbreviation (for location normalization)
 _US_STATES = {
@@ -34,6 +120,10 @@ _US_STATES = {
     "district of columbia": "dc",
 }
 
+_l1 = LRUCache(max_entries=L1_CACHE_MAX_ENTRIES, ttl_s=L1_CACHE_TTL_S, max_bytes=L1_CACHE_MAX_BYTES)
+# location_normalized -> {cache key: {"start_date", "end_date", "cached_at"}}
+_ranges = LRUCache(max_entries=RANGE_INDEX_MAX_LOCATIONS, ttl_s=RANGE_INDEX_TTL_S)
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -60,143 +150,774 @@ def generate_cache_key(location: str, start_date: Optional[str], end_date: Optio
     return hashlib.sha256(key_string.encode("utf-8")).hexdigest()[:20]
 
 
+def filter_events_by_date(events: List[Dict], start_date: Optional[str], end_date: Optional[str]) -> List[Dict]:
+    """
+    Keep events whose [date, end_date] overlaps the requested range
+    (inclusive, compared by day). Events without a usable date are kept,
+    as the providers would have returned them for any range.
+    """
+    return EventFilter(start_date=start_date, end_date=end_date).apply(events)
+
+
 # ---------------------------------------------------------------------------
 # Cache read / write
 # ---------------------------------------------------------------------------
 
-def check_cache(location: str, start_date: Optional[str], end_date: Optional[str]) -> Optional[List[Dict]]:
-    """Return cached events list if a fresh cache entry exists, otherwise None."""
+def _l1_put(key: str, events: List[Dict], cached_at: datetime, size: int, indexed: bool = True) -> Dict[str, Any]:
+    """
+    Cache an entry in L1, never past its hard-TTL expiry, and return it.
+    Range entries carry an EventIndex built once here; day buckets are
+    merged per request, so they carry their columns (an EventSet) instead.
+    """
+    entry = {
+        "events": events,
+        "cached_at": cached_at,
+        "index": EventIndex(events) if indexed else None,
+        "columns": None if indexed else EventSet.from_events(events),
+    }
+    remaining = (cached_at + timedelta(hours=CACHE_HARD_TTL_HOURS) - datetime.now(timezone.utc)).total_seconds()
+    if remaining > 0:
+        _l1.put(key, entry, size=size, ttl_s=min(L1_CACHE_TTL_S, remaining))
+    return entry
+
+
+def _chunk_events(events: List[Dict]) -> List[List[Dict]]:
+    """Greedily split events into lists of at most CHUNK_MAX_BYTES of JSON each."""
+    chunks: List[List[Dict]] = [[]]
+    chunk_bytes = 0
+    for ev in events:
+        ev_bytes = len(json.dumps(ev, default=json_default).encode("utf-8")) + 1
+        if chunks[-1] and chunk_bytes + ev_bytes > CHUNK_MAX_BYTES:
+            chunks.append([])
+            chunk_bytes = 0
+        chunks[-1].append(ev)
+        chunk_bytes += ev_bytes
+    return chunks
+
+
+def _read_chunks(doc_ref, chunk_count: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetch a manifest's chunk documents in order with one batched read.
+    Returns None if any chunk is missing.
+    """
+    chunks_ref = doc_ref.collection(CACHE_CHUNK_SUBCOLLECTION)
+    refs = [chunks_ref.document(str(i)) for i in range(chunk_count)]
+    by_index: Dict[int, Dict[str, Any]] = {}
+    for snap in db.get_all(refs):
+        if snap.exists:
+            by_index[int(snap.id)] = snap.to_dict()
+    if len(by_index) != chunk_count:
+        print(f"[cache] Missing chunks for {doc_ref.id}: {len(by_index)}/{chunk_count}")
+        return None
+    return [by_index[i] for i in range(chunk_count)]
+
+
+def _read_events(doc_ref, data: Dict[str, Any]) -> Optional[List[Dict]]:
+    """
+    Return the events of a cache document, decoding compressed payloads and
+    reassembling chunked entries. Returns None if the entry is incomplete
+    (treated as a cache miss). Events come back as Event objects; entries
+    written before search fields existed are annotated here, once per load.
+    """
+    chunk_count = data.get("chunk_count") or 0
+    chunks = _read_chunks(doc_ref, chunk_count) if chunk_count else []
+    if chunks is None:
+        return None
+
+    if data.get("format") == CACHE_FORMAT_GZIP:
+        blob = b"".join(bytes(c.get("data", b"")) for c in chunks) if chunk_count else bytes(data.get("events_blob", b""))
+        return annotate_events(to_events(json.loads(gzip.decompress(blob))))
+
+    # Plain Firestore maps (also every document written before "format" existed)
+    if chunk_count:
+        return annotate_events(to_events(ev for c in chunks for ev in c.get("events", [])))
+    return annotate_events(to_events(data.get("events", [])))
+
+
+def _load_entry(key: str) -> Optional[Dict[str, Any]]:
+    """Return {"events", "cached_at", "index"} for a cache key (L1 first, then Firestore)."""
+    entry = _l1.get(key)
+    if entry is not None:
+        return entry
+    doc = db.collection(CACHE_COLLECTION).document(key).get()
+    if not doc.exists:
+        return None
+    data = doc.to_dict()
+    cached_at = data.get("cached_at")
+    if cached_at is None:
+        return None
+    events = _read_events(doc.reference, data)
+    if events is None:
+        return None
+    size = data.get("payload_bytes") or len(json.dumps(events, default=json_default).encode("utf-8"))
+    return _l1_put(key, events, cached_at, size)
+
+
+def _location_ranges(loc_norm: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Return the dated cache entries for a location. Only the range fields
+    are read from Firestore, never the payloads.
+    """
+    ranges = _ranges.get(loc_norm)
+    if ranges is not None:
+        return ranges
+    ranges = {}
+    query = (
+        db.collection(CACHE_COLLECTION)
+        .where(filter=FieldFilter("location_normalized", "==", loc_norm))
+        .select(["start_date", "end_date", "cached_at"])
+    )
+    for snap in query.stream():
+        data = snap.to_dict() or {}
+        if data.get("start_date") and data.get("end_date") and data.get("cached_at"):
+            ranges[snap.id] = {
+                "start_date": data["start_date"],
+                "end_date": data["end_date"],
+                "cached_at": data["cached_at"],
+            }
+    _ranges.put(loc_norm, ranges)
+    return ranges
+
+
+def _index_range(loc_norm: str, key: str, start_day: Optional[str], end_day: Optional[str], cached_at: datetime) -> None:
+    """Record a freshly stored entry in the range index, if the location is loaded."""
+    ranges = _ranges.get(loc_norm)
+    if ranges is None or not start_day or not end_day:
+        return
+    updated = dict(ranges)  # copy-on-write; readers may be iterating
+    updated[key] = {"start_date": start_day, "end_date": end_day, "cached_at": cached_at}
+    _ranges.put(loc_norm, updated)
+
+
+def _find_covering_entry(location: str, start_date: Optional[str], end_date: Optional[str]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Find a live entry for the same location whose date range contains
+    [start_date, end_date]. Prefers the narrowest range, then the freshest.
+    Returns (range, entry) or None. Open-ended requests never match, since
+    undated provider queries are not a superset of anything.
+    """
+    sd, ed = day_of(start_date), day_of(end_date)
+    if not sd or not ed:
+        return None
+    exact_key = generate_cache_key(location, start_date, end_date)
+    oldest = datetime.now(timezone.utc) - timedelta(hours=CACHE_HARD_TTL_HOURS)
+    candidates = [
+        (key, r) for key, r in _location_ranges(normalize_location(location)).items()
+        if key != exact_key and r["start_date"] <= sd and r["end_date"] >= ed and r["cached_at"] > oldest
+    ]
+
+    def _span_days(r: Dict[str, Any]) -> int:
+        return (date.fromisoformat(r["end_date"]) - date.fromisoformat(r["start_date"])).days
+
+    candidates.sort(key=lambda kr: (_span_days(kr[1]), -kr[1]["cached_at"].timestamp()))
+    for key, r in candidates:
+        entry = _load_entry(key)
+        if entry is not None and entry["cached_at"] > oldest:
+            return r, entry
+    return None
+
+
+def check_cache_entry(location: str, start_date: Optional[str], end_date: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Return {"events", "cached_at", "stale", "refresh_ranges", "missing_ranges",
+    "index", "index_range"} for an entry younger than the hard TTL, otherwise
+    None. stale is True once the soft TTL has passed.
+
+    An exact (location, range) entry is used when present; otherwise an
+    entry whose range covers the request is narrowed to the requested
+    dates. In day mode the entry is assembled from day
+    buckets. refresh_ranges are the (start, end) ranges to re-fetch in the
+    background when stale; missing_ranges (day mode only) are days with no
+    live bucket, which the caller must fetch and store before serving.
+    index is the entry's EventIndex (None for day buckets); it covers
+    index_range, the dates events must be narrowed to when querying it.
+    Day-bucket entries carry columns, their merged EventSet, instead.
+    See filter_cache_entry.
+    """
+    days = _bucket_days(start_date, end_date)
+    if days is not None:
+        return _check_day_buckets(location, days)
     try:
         key = generate_cache_key(location, start_date, end_date)
-        doc = db.collection(CACHE_COLLECTION).document(key).get()
-        if not doc.exists:
-            return None
-        data = doc.to_dict()
-        cached_at = data.get("cached_at")
-        if cached_at is None:
-            return None
-        now = datetime.now(timezone.utc)
-        if now - cached_at > timedelta(hours=CACHE_TTL_HOURS):
-            return None
-        return data.get("events", [])
+        entry = _load_entry(key)
+        served_range = (start_date, end_date)
+        index_range = (None, None)
+        if entry is not None and datetime.now(timezone.utc) - entry["cached_at"] > timedelta(hours=CACHE_HARD_TTL_HOURS):
+            entry = None
+        if entry is None:
+            covering = _find_covering_entry(location, start_date, end_date)
+            if covering is None:
+                return None
+            r, entry = covering
+            served_range = (r["start_date"], r["end_date"])
+            index_range = (start_date, end_date)
+            date_filter = EventFilter(start_date=start_date, end_date=end_date)
+            index = entry.get("index")
+            events = index.query(date_filter) if index is not None else date_filter.apply(entry["events"])
+            print(f"[cache] Range HIT for '{location}' {start_date}..{end_date} via {r['start_date']}..{r['end_date']} — {len(events)}/{len(entry['events'])} events")
+            entry = {"events": events, "cached_at": entry["cached_at"], "index": index}
+
+        age = datetime.now(timezone.utc) - entry["cached_at"]
+        return {
+            "events": entry["events"],
+            "cached_at": entry["cached_at"],
+            "stale": age > timedelta(hours=CACHE_SOFT_TTL_HOURS),
+            "refresh_ranges": [served_range],
+            "missing_ranges": [],
+            "index": entry.get("index"),
+            "index_range": index_range,
+            "columns": None,
+        }
     except Exception as e:
         print(f"[cache] check_cache error: {e}")
         return None
 
 
+def check_cache(location: str, start_date: Optional[str], end_date: Optional[str]) -> Optional[List[Dict]]:
+    """Return cached events list if a fresh cache entry exists, otherwise None."""
+    entry = check_cache_entry(location, start_date, end_date)
+    if entry is None or entry["stale"] or entry["missing_ranges"]:
+        return None
+    return entry["events"]
+
+
 def store_cache(
     location: str,
     start_date: Optional[str],
     end_date: Optional[str],
     events: List[Dict],
 ) -> bool:
-    """Store events in Firestore. Returns True on success."""
-    try:
-        # Size guard
-        size = len(json.dumps(events, default=str).encode("utf-8"))
-        if size > MAX_DOC_SIZE_BYTES:
-            print(f"[cache] Skipping store: payload {size} bytes exceeds limit")
-            return False
+    """
+    Store events in Firestore. Returns True on success.
 
-        key = generate_cache_key(location, start_date, end_date)
-        doc_data = {
-            "location_raw": location,
-            "location_normalized": normalize_location(location),
-            "start_date": (start_date or "")[:10] or None,
-            "end_date": (end_date or "")[:10] or None,
-            "cached_at": firestore_module.SERVER_TIMESTAMP,
-            "event_count": len(events),
-            "events": events,
-        }
-        db.collection(CACHE_COLLECTION).document(key).set(doc_data)
-        print(f"[cache] Stored {len(events)} events for '{location}' (key={key})")
-        return True
+    With CACHE_ENCODING=gzip the payload is stored as compressed JSON bytes,
+    otherwise as Firestore maps. Payloads up to MAX_DOC_SIZE_BYTES are stored
+    inline. Larger ones (up to MAX_CACHE_BYTES) are written as a manifest
+    document plus chunk documents in one atomic batch. In day mode, dated
+    ranges are stored as per-day buckets instead.
+    """
+    try:
+        return _write_cache(location, start_date, end_date, events)
     except Exception as e:
         print(f"[cache] store_cache error: {e}")
         return False
 
 
+def _write_cache(
+    location: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    events: List[Dict],
+) -> bool:
+    """store_cache() without the error handling: Firestore errors propagate, False means the entry can't be stored."""
+    annotate_events(events)
+    days = _bucket_days(start_date, end_date)
+    if days is not None:
+        return _store_day_buckets(location, days, events)
+    raw = json.dumps(events, default=json_default).encode("utf-8")
+    size = len(raw)
+    compress = CACHE_ENCODING == "gzip"
+    blob = gzip.compress(raw, compresslevel=6) if compress else None
+    stored_bytes = len(blob) if compress else size
+
+    # Size guard
+    if stored_bytes > MAX_CACHE_BYTES:
+        print(f"[cache] Skipping store: payload {stored_bytes} bytes exceeds limit")
+        return False
+
+    key = generate_cache_key(location, start_date, end_date)
+    doc_ref = db.collection(CACHE_COLLECTION).document(key)
+    chunks_ref = doc_ref.collection(CACHE_CHUNK_SUBCOLLECTION)
+    doc_data = {
+        "location_raw": location,
+        "location_normalized": normalize_location(location),
+        "start_date": (start_date or "")[:10] or None,
+        "end_date": (end_date or "")[:10] or None,
+        "cached_at": firestore_module.SERVER_TIMESTAMP,
+        "event_count": len(events),
+        "payload_bytes": size,
+        "stored_bytes": stored_bytes,
+        "format": CACHE_FORMAT_GZIP if compress else CACHE_FORMAT_MAP,
+    }
+
+    # Chunks left over from a previous, larger version of this entry
+    prev = doc_ref.get(field_paths=["chunk_count"])
+    prev_chunks = ((prev.to_dict() or {}).get("chunk_count") or 0) if prev.exists else 0
+
+    batch = db.batch()
+    new_chunks = 0
+    if stored_bytes <= MAX_DOC_SIZE_BYTES:
+        if compress:
+            doc_data["events_blob"] = blob
+        else:
+            doc_data["events"] = plain_events(events)
+    elif compress:
+        for i, start in enumerate(range(0, len(blob), CHUNK_MAX_BYTES)):
+            batch.set(chunks_ref.document(str(i)), {"data": blob[start:start + CHUNK_MAX_BYTES]})
+            new_chunks += 1
+    else:
+        for i, chunk in enumerate(_chunk_events(plain_events(events))):
+            batch.set(chunks_ref.document(str(i)), {"events": chunk})
+            new_chunks += 1
+    doc_data["chunk_count"] = new_chunks
+    for i in range(new_chunks, prev_chunks):
+        batch.delete(chunks_ref.document(str(i)))
+    batch.set(doc_ref, doc_data)
+    batch.commit()
+
+    # Write-through so this instance serves the new entry without a read
+    now = datetime.now(timezone.utc)
+    _l1_put(key, events, now, size)
+    _index_range(doc_data["location_normalized"], key, doc_data["start_date"], doc_data["end_date"], now)
+    layout = f"{new_chunks} chunks" if new_chunks else "inline"
+    print(f"[cache] Stored {len(events)} events for '{location}' (key={key}, {layout}, {stored_bytes} bytes {doc_data['format']})")
+    return True
+
+
 # ---------------------------------------------------------------------------
-# Local filtering (applied to cached events)
+# Per-day buckets (CACHE_STORAGE_MODE=day)
 # ---------------------------------------------------------------------------
 
-def _extract_price(event: Dict) -> Optional[float]:
-    """Extract a numeric price from either Ticketmaster or scraper event format."""
-    # Ticketmaster style: {"priceRange": {"min": 29.5, "max": 99.5}}
-    pr = event.get("priceRange")
-    if isinstance(pr, dict) and pr:
-        try:
-            return float(pr.get("min", 0))
-        except (ValueError, TypeError):
-            pass
-
-    # Scraper style: {"price": "25.00"} or {"price": 0.0}
-    price_val = event.get("price")
-    if price_val is None:
+def _bucket_days(start_date: Optional[str], end_date: Optional[str]) -> Optional[List[str]]:
+    """Days (YYYY-MM-DD) covered by a day-mode query, or None to use range mode."""
+    if CACHE_STORAGE_MODE != "day":
+        return None
+    sd, ed = day_of(start_date), day_of(end_date)
+    if not sd or not ed or ed < sd:
+        return None
+    first = date.fromisoformat(sd)
+    n_days = (date.fromisoformat(ed) - first).days + 1
+    if n_days > DAY_CACHE_MAX_DAYS:
         return None
-    price_str = str(price_val).replace("$", "").replace(",", "").strip()
+    return [(first + timedelta(days=i)).isoformat() for i in range(n_days)]
+
+
+def _day_key(loc_norm: str, day: str) -> str:
+    return hashlib.sha256(f"{loc_norm}|day|{day}".encode("utf-8")).hexdigest()[:20]
+
+
+def _contiguous_ranges(days: List[str]) -> List[Tuple[str, str]]:
+    """Collapse sorted days into inclusive (start, end) runs."""
+    ranges: List[Tuple[str, str]] = []
+    for day in days:
+        if ranges and date.fromisoformat(day) - date.fromisoformat(ranges[-1][1]) == timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def _read_day_buckets(loc_norm: str, days: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Return day -> {"events", "cached_at", "columns"} for the buckets that exist (L1, then one batched read)."""
+    found: Dict[str, Dict[str, Any]] = {}
+    refs = []
+    for day in days:
+        entry = _l1.get(_day_key(loc_norm, day))
+        if entry is not None:
+            found[day] = entry
+        else:
+            refs.append(db.collection(DAY_CACHE_COLLECTION).document(_day_key(loc_norm, day)))
+    if refs:
+        for snap in db.get_all(refs):
+            if not snap.exists:
+                continue
+            data = snap.to_dict()
+            cached_at = data.get("cached_at")
+            events = _read_events(snap.reference, data) if cached_at is not None else None
+            if events is None:
+                continue
+            found[data["day"]] = _l1_put(snap.id, events, cached_at, data.get("payload_bytes") or 0, indexed=False)
+    return found
+
+
+def _check_day_buckets(location: str, days: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    check_cache_entry for day mode. None only when no requested day has a
+    live bucket, or when the buckets can't be read (Firestore error or a
+    corrupt payload), which is treated as a miss.
+    """
+    loc_norm = normalize_location(location)
     try:
-        return float(price_str)
-    except (ValueError, TypeError):
-        return None  # "Free", "Unknown", etc.
+        buckets = _read_day_buckets(loc_norm, days + [UNDATED_BUCKET])
+    except (GoogleAPIError, OSError, ValueError) as e:
+        print(f"[cache] check_day_buckets read error: {e}")
+        return None
+    now = datetime.now(timezone.utc)
+    live = {
+        day: b for day, b in buckets.items()
+        if now - b["cached_at"] <= timedelta(hours=CACHE_HARD_TTL_HOURS)
+    }
+    present = [d for d in days if d in live]
+    if not present:
+        return None
+    missing = [d for d in days if d not in live]
+    stale_days = [d for d in present if now - live[d]["cached_at"] > timedelta(hours=CACHE_SOFT_TTL_HOURS)]
+
+    # Multi-day events sit in every bucket they overlap; keep one copy
+    merged_days = present + ([UNDATED_BUCKET] if UNDATED_BUCKET in live else [])
+    columns = EventSet.concat([live[day]["columns"] for day in merged_days]).unique()
+    events = columns.to_dicts()
 
+    print(f"[cache] Day buckets for '{location}': {len(present)}/{len(days)} present, {len(stale_days)} stale")
+    return {
+        "events": events,
+        "cached_at": min(live[d]["cached_at"] for d in present),
+        "stale": bool(stale_days),
+        "refresh_ranges": _contiguous_ranges(stale_days),
+        "missing_ranges": _contiguous_ranges(missing),
+        "index": None,
+        "index_range": (None, None),
+        "columns": columns,
+    }
+
+
+def _encode_bucket(events: List[Dict]) -> Tuple[Dict[str, Any], int]:
+    """Inline payload fields for a bucket document, and its stored size."""
+    raw = json.dumps(events, default=json_default).encode("utf-8")
+    if CACHE_ENCODING == "gzip":
+        blob = gzip.compress(raw, compresslevel=6)
+        fields = {"events_blob": blob, "format": CACHE_FORMAT_GZIP, "stored_bytes": len(blob)}
+    else:
+        fields = {"events": plain_events(events), "format": CACHE_FORMAT_MAP, "stored_bytes": len(raw)}
+    fields.update({"event_count": len(events), "payload_bytes": len(raw), "chunk_count": 0})
+    return fields, fields["stored_bytes"]
+
+
+def _store_day_buckets(location: str, days: List[str], events: List[Dict]) -> bool:
+    """
+    Store a fetched range as one bucket per day (empty days included, so
+    they count as fetched). An event goes into every day of the range it
+    overlaps; undated events replace the location's UNDATED_BUCKET.
+    Firestore errors propagate to the caller.
+    """
+    loc_norm = normalize_location(location)
+    buckets: Dict[str, List[Dict]] = {day: [] for day in days}
+    buckets[UNDATED_BUCKET] = []
+    for ev in events:
+        ev_start = day_of(ev.get("date"))
+        if ev_start is None:
+            buckets[UNDATED_BUCKET].append(ev)
+            continue
+        ev_end = max(day_of(ev.get("end_date")) or ev_start, ev_start)
+        for day in days[bisect.bisect_left(days, ev_start):bisect.bisect_right(days, ev_end)]:
+            buckets[day].append(ev)
+
+    now = datetime.now(timezone.utc)
+    batch, batch_bytes, written = db.batch(), 0, []
+    for day, day_events in buckets.items():
+        fields, stored_bytes = _encode_bucket(day_events)
+        if stored_bytes > MAX_DOC_SIZE_BYTES:
+            print(f"[cache] Skipping day bucket {day} for '{location}': {stored_bytes} bytes")
+            continue
+        if batch_bytes + stored_bytes > MAX_BATCH_BYTES:
+            batch.commit()
+            batch, batch_bytes = db.batch(), 0
+        key = _day_key(loc_norm, day)
+        fields.update({
+            "location_raw": location,
+            "location_normalized": loc_norm,
+            "day": day,
+            "cached_at": firestore_module.SERVER_TIMESTAMP,
+        })
+        batch.set(db.collection(DAY_CACHE_COLLECTION).document(key), fields)
+        batch_bytes += stored_bytes
+        written.append((key, day_events, fields["payload_bytes"]))
+    batch.commit()
+
+    for key, day_events, size in written:
+        _l1_put(key, day_events, now, size, indexed=False)
+    print(f"[cache] Stored {len(events)} events for '{location}' in {len(written)} day buckets ({days[0]}..{days[-1]})")
+    return True
+
+
+def l1_cache_stats() -> Dict[str, Any]:
+    return _l1.stats()
+
+
+# ---------------------------------------------------------------------------
+# Write-behind
+# ---------------------------------------------------------------------------
+_writes = WriteBehindQueue(
+    _write_cache,
+    max_pending=CACHE_WRITE_QUEUE_SIZE,
+    max_retries=CACHE_WRITE_MAX_RETRIES,
+    backoff_s=CACHE_WRITE_BACKOFF_S,
+    name="cache-writes",
+    retry_on=_TRANSIENT_ERRORS,
+)
+
+
+def store_cache_async(
+    location: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    events: List[Dict],
+) -> bool:
+    """
+    Queue store_cache on the write-behind worker and return immediately.
+    Range entries are put in L1 right away so this instance serves them
+    before the Firestore write lands. Returns False if the write was
+    dropped (queue full). Writes synchronously when CACHE_WRITE_BEHIND=0.
+    """
+    if not CACHE_WRITE_BEHIND:
+        return store_cache(location, start_date, end_date, events)
+    annotate_events(events)
+    key = generate_cache_key(location, start_date, end_date)
+    if _bucket_days(start_date, end_date) is None:
+        _l1_put(key, events, datetime.now(timezone.utc), len(events) * L1_EST_EVENT_BYTES)
+    return _writes.submit(key, location, start_date, end_date, events)
+
+
+def flush_cache_writes(timeout: Optional[float] = CACHE_WRITE_FLUSH_TIMEOUT_S) -> bool:
+    """Wait for queued cache writes to land. Returns False if *timeout* expired."""
+    done = _writes.flush(timeout)
+    if not done:
+        print(f"[cache] Shutdown with {_writes.stats()['pending']} cache writes still pending")
+    return done
+
+
+def cache_write_stats() -> Dict[str, Any]:
+    return _writes.stats()
+
+
+atexit.register(flush_cache_writes)
+
+
+# ---------------------------------------------------------------------------
+# Background refresh (stale-while-revalidate)
+# ---------------------------------------------------------------------------
+_refreshing: set = set()
+_refreshing_lock = threading.Lock()
+
+
+def refresh_in_background(
+    location: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    fetch_events: Callable[[], Optional[List[Dict]]],
+) -> bool:
+    """
+    Re-fetch a stale entry on a background thread and store the result.
+    At most one refresh runs per cache key; returns False if one is
+    already in flight. *fetch_events* returns the events to cache, or
+    None to leave the entry as is (e.g. partial results). With
+    CACHE_BACKGROUND_REFRESH=0 the refresh runs before returning.
+    """
+    key = generate_cache_key(location, start_date, end_date)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+
+    def _run():
+        try:
+            events = fetch_events()
+            if events is not None:
+                store_cache(location, start_date, end_date, events)
+        except Exception as e:
+            print(f"[cache] background refresh error for '{location}': {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    if not CACHE_BACKGROUND_REFRESH:
+        print(f"[cache] STALE for '{location}' — refreshing (key={key})")
+        _run()
+        return True
+    print(f"[cache] STALE for '{location}' — refreshing in background (key={key})")
+    threading.Thread(target=_run, daemon=True).start()
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Local filtering (applied to cached events)
+# ---------------------------------------------------------------------------
 
 def apply_local_filters(
     events: List[Dict],
-    event_type: Optional[str] = None,
-    category: Optional[str] = None,
+    event_type: Union[str, List[str], None] = None,
+    category: Union[str, List[str], None] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
 ) -> List[Dict]:
-    """Filter an event list by type, category, and price range."""
-    if not event_type and not category and min_price is None and max_price is None:
-        return events
-
-    filtered = []
-    for ev in events:
-        # Event type filter
-        if event_type:
-            ev_type = (ev.get("type") or "").lower()
-            ev_name = (ev.get("name") or "").lower()
-            if event_type.lower() not in ev_type and event_type.lower() not in ev_name:
-                continue
-
-        # Category filter
-        if category:
-            ev_name = (ev.get("name") or "").lower()
-            ev_type = (ev.get("type") or "").lower()
-            if category.lower() not in ev_name and category.lower() not in ev_type:
-                continue
+    """Filter an event list by type(s), category(ies), and price range."""
+    return EventFilter(event_types=event_type, categories=category, min_price=min_price, max_price=max_price).apply(events)
 
-        # Price filter
-        if min_price is not None or max_price is not None:
-            price = _extract_price(ev)
-            if price is not None:
-                if min_price is not None and price < min_price:
-                    continue
-                if max_price is not None and price > max_price:
-                    continue
-            # Events with unparseable prices ("Free", "Unknown") are kept
 
-        filtered.append(ev)
-    return filtered
+def filter_cache_entry(
+    entry: Dict[str, Any],
+    event_type: Union[str, List[str], None] = None,
+    category: Union[str, List[str], None] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> List[Dict]:
+    """
+    apply_local_filters for a check_cache_entry result, answered from the
+    entry's EventIndex or its columns instead of scanning its events.
+    """
+    index, columns = entry.get("index"), entry.get("columns")
+    if index is not None:
+        start_date, end_date = entry.get("index_range") or (None, None)
+        return index.query(EventFilter(
+            event_types=event_type,
+            categories=category,
+            min_price=min_price,
+            max_price=max_price,
+            start_date=start_date,
+            end_date=end_date,
+        ))
+    flt = EventFilter(event_types=event_type, categories=category, min_price=min_price, max_price=max_price)
+    if columns is not None:
+        return columns.filter(flt).to_dicts()
+    return flt.apply(entry["events"])
 
 
 # ---------------------------------------------------------------------------
 # Uploaded URL queries
 # ---------------------------------------------------------------------------
 UPLOADED_COLLECTION = "urls_added"
+GEOHASH_FIELD = "geohash"
+# Events of an upload live in urls_added/{id}/payload/events, so proximity
+# scans read only the small metadata document. Documents without
+# has_payload are the original layout with an inline "events" array.
+UPLOADED_PAYLOAD_SUBCOLLECTION = "payload"
+UPLOADED_PAYLOAD_DOC = "events"
+_UPLOADED_META_FIELDS = ["centroid_lat", "centroid_lng", "has_payload"]
+
+# In-process index of upload centroids, so proximity lookups need no query.
+# A background thread loads it, then polls for uploads newer than the last
+# seen added_at (re-reading a SKEW window, since added_at comes from each
+# instance's clock) and reloads fully now and then to drop deleted docs.
+# Off by default under SERVERLESS, where lookups use geohash queries.
+UPLOADED_INDEX_ENABLED = os.getenv("UPLOADED_INDEX_ENABLED", "0" if SERVERLESS else "1") == "1"
+UPLOADED_INDEX_SYNC_S = float(os.getenv("UPLOADED_INDEX_SYNC_S", "60"))
+UPLOADED_INDEX_FULL_RELOAD_S = float(os.getenv("UPLOADED_INDEX_FULL_RELOAD_S", "3600"))
+UPLOADED_INDEX_SKEW_S = 300
+# Upload payloads never change, so they are cached without a TTL.
+UPLOADED_PAYLOAD_CACHE_SIZE = int(os.getenv("UPLOADED_PAYLOAD_CACHE_SIZE", "1024"))
+UPLOADED_PAYLOAD_CACHE_MAX_BYTES = int(os.getenv("UPLOADED_PAYLOAD_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+_uploaded_grid = GeohashGrid()
+_uploaded_payloads = LRUCache(max_entries=UPLOADED_PAYLOAD_CACHE_SIZE, max_bytes=UPLOADED_PAYLOAD_CACHE_MAX_BYTES)
+_uploaded_sync = {"loaded": False, "watermark": None, "thread": None}
+_uploaded_sync_lock = threading.Lock()
+
+# Uploads stored before the geohash field existed are invisible to geohash
+# queries. The first query-based lookup in a process runs
+# backfill_uploaded_geohashes() unless its marker document exists; it can
+# also be run ahead of a deploy with `python -m firebase_database.cache`.
+MIGRATIONS_COLLECTION = "migrations"
+GEOHASH_BACKFILL_DOC = "uploaded_geohash"
+_geohash_backfill = {"done": False}
+_geohash_backfill_lock = threading.Lock()
+
+
+def uploaded_geohash(centroid_lat: Optional[float], centroid_lng: Optional[float]) -> Optional[str]:
+    """Geohash stored on an urls_added document (None without a centroid)."""
+    if centroid_lat is None or centroid_lng is None:
+        return None
+    return encode_geohash(centroid_lat, centroid_lng)
+
+
+def store_uploaded_url(url: str, detected_city: str, detected_state: str, events: List[Dict]) -> str:
+    """
+    Store an uploaded URL: a metadata document (url, location, centroid,
+    geohash) plus its events in a payload document, in one batch.
+    Returns the new document ID.
+    """
+    centroid_lat, centroid_lng = centroid(*event_coords(events)) or (None, None)
+    annotate_events(events)
+
+    doc_ref = db.collection(UPLOADED_COLLECTION).document()
+    payload, _ = _encode_bucket(events)
+    batch = db.batch()
+    batch.set(doc_ref, {
+        "url": url,
+        "detected_city": detected_city,
+        "detected_state": detected_state,
+        "centroid_lat": centroid_lat,
+        "centroid_lng": centroid_lng,
+        GEOHASH_FIELD: uploaded_geohash(centroid_lat, centroid_lng),
+        "event_count": len(events),
+        "has_payload": True,
+        "added_at": datetime.utcnow().isoformat(),
+    })
+    batch.set(doc_ref.collection(UPLOADED_PAYLOAD_SUBCOLLECTION).document(UPLOADED_PAYLOAD_DOC), payload)
+    batch.commit()
+
+    _uploaded_payloads.put(doc_ref.id, events, size=payload["payload_bytes"])
+    if centroid_lat is not None and centroid_lng is not None:
+        _uploaded_grid.upsert(doc_ref.id, centroid_lat, centroid_lng, True)
+    return doc_ref.id
+
+
+def _load_uploaded_events(matches: List[Tuple[str, bool]]) -> List[Dict]:
+    """
+    Return the events of matching uploads, given (doc id, has_payload)
+    pairs. Payloads come from the in-process LRU, else from batched reads:
+    payload documents for the new layout, the inline array for legacy docs.
+    """
+    uploads = db.collection(UPLOADED_COLLECTION)
+    by_id: Dict[str, List[Dict]] = {}
+    payload_refs, legacy_refs = [], []
+    for doc_id, has_payload in matches:
+        cached = _uploaded_payloads.get(doc_id)
+        if cached is not None:
+            by_id[doc_id] = cached
+        elif has_payload:
+            payload_refs.append(uploads.document(doc_id).collection(UPLOADED_PAYLOAD_SUBCOLLECTION).document(UPLOADED_PAYLOAD_DOC))
+        else:
+            legacy_refs.append(uploads.document(doc_id))
 
+    if payload_refs:
+        for snap in db.get_all(payload_refs):
+            if snap.exists:
+                data = snap.to_dict()
+                doc_id = snap.reference.parent.parent.id
+                by_id[doc_id] = _read_events(snap.reference, data) or []
+                _uploaded_payloads.put(doc_id, by_id[doc_id], size=data.get("payload_bytes") or 0)
+    if legacy_refs:
+        for snap in db.get_all(legacy_refs, field_paths=["events"]):
+            if snap.exists:
+                by_id[snap.id] = annotate_events(to_events((snap.to_dict() or {}).get("events", [])))
+                size = len(json.dumps(by_id[snap.id], default=json_default).encode("utf-8"))
+                _uploaded_payloads.put(snap.id, by_id[snap.id], size=size)
 
-def _haversine_miles(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    """Return the great-circle distance in miles between two points."""
-    R = 3959  # Earth radius in miles
-    dlat = math.radians(lat2 - lat1)
-    dlng = math.radians(lng2 - lng1)
-    a = (math.sin(dlat / 2) ** 2
-         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2))
-         * math.sin(dlng / 2) ** 2)
-    return 2 * R * math.asin(math.sqrt(a))
+    all_events: List[Dict] = []
+    for doc_id, _ in matches:
+        all_events.extend(by_id.get(doc_id, []))
+    return all_events
+
+
+def _query_uploaded_near(lat: float, lng: float, radius_miles: float) -> List[Tuple[str, bool]]:
+    """
+    Firestore fallback for the in-memory index: range-query the geohash
+    cells covering the circle, reading only the centroid fields, and keep
+    the candidates within the exact haversine distance.
+    """
+    uploads = db.collection(UPLOADED_COLLECTION)
+    candidates: Dict[str, Tuple[float, float, bool]] = {}
+    for cell in covering_cells(lat, lng, radius_miles):
+        query = (
+            uploads
+            .where(filter=FieldFilter(GEOHASH_FIELD, ">=", cell))
+            .where(filter=FieldFilter(GEOHASH_FIELD, "<=", cell + "\uf8ff"))
+            .select(_UPLOADED_META_FIELDS)
+        )
+        for doc in query.stream():
+            data = doc.to_dict()
+            if data.get("centroid_lat") is not None and data.get("centroid_lng") is not None:
+                candidates[doc.id] = (data["centroid_lat"], data["centroid_lng"], bool(data.get("has_payload")))
+    if not candidates:
+        return []
+    ids = list(candidates)
+    mask = within_radius(
+        lat, lng,
+        [candidates[i][0] for i in ids],
+        [candidates[i][1] for i in ids],
+        radius_miles,
+    )
+    return [(doc_id, candidates[doc_id][2]) for doc_id, keep in zip(ids, mask) if keep]
 
 
 def get_uploaded_events_near(
@@ -208,20 +929,134 @@ def get_uploaded_events_near(
     Return events from user-uploaded URLs whose centroid falls within
     *radius_miles* of the given coordinates.
 
-    Scans all docs in urls_added and filters in-memory via haversine.
-    Acceptable at small scale (tens to low hundreds of uploaded URLs).
+    Matches come from the in-process centroid index once it has loaded,
+    otherwise from geohash range queries (documents written before the
+    geohash field existed are backfilled first, once). The events
+    of the matches are then read from the payload cache or fetched in
+    batched reads.
     """
     try:
-        docs = db.collection(UPLOADED_COLLECTION).stream()
-        all_events: List[Dict] = []
-        for doc in docs:
-            data = doc.to_dict()
-            c_lat = data.get("centroid_lat")
-            c_lng = data.get("centroid_lng")
-            if c_lat is not None and c_lng is not None:
-                if _haversine_miles(lat, lng, c_lat, c_lng) <= radius_miles:
-                    all_events.extend(data.get("events", []))
-        return all_events
+        if UPLOADED_INDEX_ENABLED:
+            start_uploaded_index_sync()
+        if UPLOADED_INDEX_ENABLED and _uploaded_sync["loaded"]:
+            matches = _uploaded_grid.query(lat, lng, radius_miles)
+        else:
+            ensure_uploaded_geohashes()
+            matches = _query_uploaded_near(lat, lng, radius_miles)
+        return _load_uploaded_events(matches)
     except Exception as e:
         print(f"[uploaded] get_uploaded_events_near error: {e}")
         return []
+
+
+def _sync_uploaded_index(full: bool) -> None:
+    """Load every upload centroid (full) or only uploads added since the watermark."""
+    query = db.collection(UPLOADED_COLLECTION).select(_UPLOADED_META_FIELDS + ["added_at"])
+    watermark = _uploaded_sync["watermark"]
+    if not full and watermark:
+        since = (datetime.fromisoformat(watermark) - timedelta(seconds=UPLOADED_INDEX_SKEW_S)).isoformat()
+        query = query.where(filter=FieldFilter("added_at", ">=", since))
+    rows = []
+    newest = watermark
+    for snap in query.stream():
+        data = snap.to_dict() or {}
+        added_at = data.get("added_at")
+        if added_at and (newest is None or added_at > newest):
+            newest = added_at
+        if data.get("centroid_lat") is None or data.get("centroid_lng") is None:
+            continue
+        rows.append((snap.id, data["centroid_lat"], data["centroid_lng"], bool(data.get("has_payload"))))
+    if full:
+        _uploaded_grid.replace_all(rows)
+    else:
+        for row in rows:
+            _uploaded_grid.upsert(*row)
+    _uploaded_sync["watermark"] = newest
+    if full:
+        _uploaded_sync["loaded"] = True
+        print(f"[uploaded] Index loaded: {len(_uploaded_grid)} uploads")
+    elif rows:
+        print(f"[uploaded] Index synced {len(rows)} new/updated uploads")
+
+
+def start_uploaded_index_sync() -> threading.Thread:
+    """Start the background thread that loads and refreshes the centroid index (once)."""
+    with _uploaded_sync_lock:
+        thread = _uploaded_sync["thread"]
+        if thread is not None and thread.is_alive():
+            return thread
+
+        def _run():
+            last_full = None
+            while True:
+                full = last_full is None or time.monotonic() - last_full >= UPLOADED_INDEX_FULL_RELOAD_S
+                try:
+                    _sync_uploaded_index(full)
+                    if full:
+                        last_full = time.monotonic()
+                except Exception as e:
+                    print(f"[uploaded] Index sync failed: {e}")
+                time.sleep(UPLOADED_INDEX_SYNC_S)
+
+        thread = threading.Thread(target=_run, name="uploaded-index", daemon=True)
+        _uploaded_sync["thread"] = thread
+        thread.start()
+        return thread
+
+
+def uploaded_index_stats() -> Dict[str, Any]:
+    return {
+        "loaded": _uploaded_sync["loaded"],
+        "uploads": len(_uploaded_grid),
+        "watermark": _uploaded_sync["watermark"],
+        "payloads": _uploaded_payloads.stats(),
+    }
+
+
+def backfill_uploaded_geohashes() -> int:
+    """
+    One-off migration: add the geohash field to urls_added documents that
+    have a centroid but no geohash, then write the marker document that
+    ensure_uploaded_geohashes() checks. Returns the number of documents
+    updated.
+    """
+    query = db.collection(UPLOADED_COLLECTION).select(["centroid_lat", "centroid_lng", GEOHASH_FIELD])
+    batch, pending, updated = db.batch(), 0, 0
+    for snap in query.stream():
+        data = snap.to_dict() or {}
+        geohash = uploaded_geohash(data.get("centroid_lat"), data.get("centroid_lng"))
+        if geohash is None or data.get(GEOHASH_FIELD) == geohash:
+            continue
+        batch.update(snap.reference, {GEOHASH_FIELD: geohash})
+        pending += 1
+        updated += 1
+        if pending == 400:
+            batch.commit()
+            batch, pending = db.batch(), 0
+    if pending:
+        batch.commit()
+    db.collection(MIGRATIONS_COLLECTION).document(GEOHASH_BACKFILL_DOC).set({
+        "done_at": firestore_module.SERVER_TIMESTAMP,
+        "updated": updated,
+    })
+    print(f"[uploaded] Backfilled geohash on {updated} documents")
+    return updated
+
+
+def ensure_uploaded_geohashes() -> None:
+    """Run backfill_uploaded_geohashes() if no instance has completed it yet (checked once per process)."""
+    if _geohash_backfill["done"]:
+        return
+    with _geohash_backfill_lock:
+        if _geohash_backfill["done"]:
+            return
+        try:
+            if not db.collection(MIGRATIONS_COLLECTION).document(GEOHASH_BACKFILL_DOC).get().exists:
+                backfill_uploaded_geohashes()
+            _geohash_backfill["done"] = True
+        except Exception as e:
+            print(f"[uploaded] Geohash backfill failed: {e}")
+
+
+if __name__ == "__main__":
+    backfill_uploaded_geohashes()
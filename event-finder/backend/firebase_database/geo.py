@@ -0,0 +1,201 @@
+import math
+import threading
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+EARTH_RADIUS_MILES = 3959
+# Precision stored on documents (~4.8m x 4.8m cells); queries use a prefix.
+GEOHASH_PRECISION = 9
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_MILES_PER_DEG_LAT = 69.0
+# Bucket size of GeohashGrid (~39km x 20km cells).
+GRID_PRECISION = 4
+
+
+# ---------------------------------------------------------------------------
+# Batched (NumPy)
+# ---------------------------------------------------------------------------
+
+def haversine_miles_many(lat: float, lng: float, lats: Sequence[float], lngs: Sequence[float]) -> np.ndarray:
+    """Distances in miles from one origin to N points, in one vectorized pass."""
+    lat1 = math.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlng = np.radians(np.asarray(lngs, dtype=np.float64) - lng)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def within_radius(lat: float, lng: float, lats: Sequence[float], lngs: Sequence[float], radius_miles: float) -> np.ndarray:
+    """Boolean mask of the points within *radius_miles* of (lat, lng)."""
+    if len(lats) == 0:
+        return np.zeros(0, dtype=bool)
+    return haversine_miles_many(lat, lng, lats, lngs) <= radius_miles
+
+
+def event_coords(events: Iterable[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitude and longitude arrays of the events that have both (parsed as floats)."""
+    lats, lngs = [], []
+    for ev in events:
+        ev_lat, ev_lng = ev.get("latitude"), ev.get("longitude")
+        if ev_lat is None or ev_lng is None:
+            continue
+        try:
+            lat_f, lng_f = float(ev_lat), float(ev_lng)
+        except (TypeError, ValueError):
+            continue
+        lats.append(lat_f)
+        lngs.append(lng_f)
+    return np.asarray(lats, dtype=np.float64), np.asarray(lngs, dtype=np.float64)
+
+
+def centroid(lats: Sequence[float], lngs: Sequence[float]) -> Optional[Tuple[float, float]]:
+    """Mean (lat, lng) of the points, or None if there are none."""
+    if len(lats) == 0:
+        return None
+    return float(np.mean(lats)), float(np.mean(lngs))
+
+
+# ---------------------------------------------------------------------------
+# Geohash
+# ---------------------------------------------------------------------------
+
+def encode_geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Standard base32 geohash of a point."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bit, ch, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1
+                lng_lo = mid
+            else:
+                ch <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[ch])
+            bit, ch = 0, 0
+    return "".join(chars)
+
+
+def cell_size_deg(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of a geohash cell at *precision*."""
+    bits = 5 * precision
+    lat_bits = bits // 2
+    lng_bits = bits - lat_bits
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def precision_for_radius(radius_miles: float, lat: float) -> int:
+    """
+    Finest precision whose cells are at least *radius_miles* tall and wide
+    at latitude *lat*, so a cell plus its 8 neighbours covers the circle.
+    """
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height_deg, width_deg = cell_size_deg(precision)
+        if (height_deg * _MILES_PER_DEG_LAT >= radius_miles
+                and width_deg * _MILES_PER_DEG_LAT * cos_lat >= radius_miles):
+            return precision
+    return 1
+
+
+def covering_cells(lat: float, lng: float, radius_miles: float) -> List[str]:
+    """The point's geohash cell and its neighbours, sized for *radius_miles*."""
+    precision = precision_for_radius(radius_miles, lat)
+    height_deg, width_deg = cell_size_deg(precision)
+    cells = set()
+    for dlat in (-height_deg, 0.0, height_deg):
+        cell_lat = lat + dlat
+        if cell_lat < -90 or cell_lat > 90:
+            continue
+        for dlng in (-width_deg, 0.0, width_deg):
+            cell_lng = (lng + dlng + 180) % 360 - 180
+            cells.add(encode_geohash(cell_lat, cell_lng, precision))
+    return sorted(cells)
+
+
+# ---------------------------------------------------------------------------
+# In-memory point index
+# ---------------------------------------------------------------------------
+
+class GeohashGrid:
+    """
+    Thread-safe in-memory point index, bucketed by geohash prefix.
+    query() visits only the buckets under covering_cells() and checks the
+    exact haversine distance on their points.
+    """
+
+    def __init__(self, precision: int = GRID_PRECISION):
+        self.precision = precision
+        self._cells: Dict[str, Dict[Hashable, Tuple[float, float, Any]]] = {}
+        self._cell_of: Dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+
+    def _insert(self, item_id: Hashable, lat: float, lng: float, value: Any) -> None:
+        self._remove(item_id)
+        cell = encode_geohash(lat, lng, self.precision)
+        self._cells.setdefault(cell, {})[item_id] = (lat, lng, value)
+        self._cell_of[item_id] = cell
+
+    def _remove(self, item_id: Hashable) -> None:
+        cell = self._cell_of.pop(item_id, None)
+        if cell is not None:
+            bucket = self._cells[cell]
+            bucket.pop(item_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def upsert(self, item_id: Hashable, lat: float, lng: float, value: Any = None) -> None:
+        with self._lock:
+            self._insert(item_id, lat, lng, value)
+
+    def remove(self, item_id: Hashable) -> None:
+        with self._lock:
+            self._remove(item_id)
+
+    def replace_all(self, items: Iterable[Tuple[Hashable, float, float, Any]]) -> None:
+        """Swap in a full snapshot of (id, lat, lng, value) items."""
+        fresh = GeohashGrid(self.precision)
+        for item_id, lat, lng, value in items:
+            fresh._insert(item_id, lat, lng, value)
+        with self._lock:
+            self._cells, self._cell_of = fresh._cells, fresh._cell_of
+
+    def query(self, lat: float, lng: float, radius_miles: float) -> List[Tuple[Hashable, Any]]:
+        """(id, value) of every point within *radius_miles* of (lat, lng)."""
+        with self._lock:
+            candidates = []
+            for cell in covering_cells(lat, lng, radius_miles):
+                if len(cell) >= self.precision:
+                    candidates.extend(self._cells.get(cell[:self.precision], {}).items())
+                else:
+                    for key, bucket in self._cells.items():
+                        if key.startswith(cell):
+                            candidates.extend(bucket.items())
+        unique = list(dict(candidates).items())
+        if not unique:
+            return []
+        points = np.array([(p_lat, p_lng) for _, (p_lat, p_lng, _) in unique], dtype=np.float64)
+        mask = within_radius(lat, lng, points[:, 0], points[:, 1], radius_miles)
+        return [(item_id, value) for (item_id, (_, _, value)), keep in zip(unique, mask) if keep]
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
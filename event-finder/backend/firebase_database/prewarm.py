@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from api.firestore import db
+from api.rate_limit import TokenBucket, per_minute_bucket
+from api.sources import fetch_cacheable_events
+from firebase_database.cache import (
+    CACHE_COLLECTION,
+    CACHE_HARD_TTL_HOURS,
+    CACHE_SOFT_TTL_HOURS,
+    SERVERLESS,
+    check_cache_entry,
+    store_cache,
+)
+
+# Cache pre-warming: refresh event_cache for popular locations before their
+# entries expire, so users hit a warm cache instead of a cold fan-out.
+#
+#   python -m firebase_database.prewarm --locations "Santa Barbara, CA" "Austin, TX"
+#   python -m firebase_database.prewarm --cities-file ../frontend/src/utils/cities.json --per-state 2
+#   python -m firebase_database.prewarm --expiring
+#
+# With PREWARM_ENABLED=1 the API also runs it periodically in-process. That
+# needs a long-lived process; on serverless hosts (SERVERLESS, see cache.py)
+# run the CLI from a scheduled job instead.
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "0") == "1" and not SERVERLESS
+PREWARM_INTERVAL_S = float(os.getenv("PREWARM_INTERVAL_S", str(6 * 3600)))
+# Locations warmed at once; each one is itself a full provider fan-out.
+PREWARM_CONCURRENCY = int(os.getenv("PREWARM_CONCURRENCY", "2"))
+# Refresh entries this many hours before their soft TTL runs out; longer
+# than the interval so nothing goes stale between two runs.
+PREWARM_AHEAD_HOURS = float(os.getenv("PREWARM_AHEAD_HOURS", "7"))
+# Date windows to warm, as lengths in days starting today ("7,30").
+PREWARM_WINDOWS = [int(w) for w in os.getenv("PREWARM_WINDOWS", "7,30").split(",") if w.strip()]
+# Semicolon-separated "City, ST" list for the in-process scheduler; when empty
+# it re-fetches the entries about to expire.
+PREWARM_LOCATIONS = [loc.strip() for loc in os.getenv("PREWARM_LOCATIONS", "").split(";") if loc.strip()]
+# Most expiring entries refreshed per run, oldest first.
+PREWARM_MAX_EXPIRING = int(os.getenv("PREWARM_MAX_EXPIRING", "50"))
+
+# Provider requests per minute while pre-warming, kept well under each
+# provider's quota so live traffic still has headroom.
+PREWARM_RATE_LIMITS_PER_MIN = {
+    "ticketmaster": float(os.getenv("PREWARM_TM_PER_MIN", "60")),
+    "allevents": float(os.getenv("PREWARM_AE_PER_MIN", "20")),
+    "eventbrite": float(os.getenv("PREWARM_EB_PER_MIN", "10")),
+    "openscraper": float(os.getenv("PREWARM_OS_PER_MIN", "10")),
+}
+
+Target = Tuple[str, Optional[str], Optional[str]]  # (location, start_date, end_date)
+
+
+# ---------------------------------------------------------------------------
+# Targets
+# ---------------------------------------------------------------------------
+
+def window_ranges(windows_days: List[int], today: Optional[date] = None) -> List[Tuple[str, str]]:
+    """(start, end) YYYY-MM-DD pairs for windows of N days starting today."""
+    today = today or date.today()
+    return [(today.isoformat(), (today + timedelta(days=n - 1)).isoformat()) for n in windows_days if n > 0]
+
+
+def load_cities_file(path: str, per_state: int = 1, limit: Optional[int] = None) -> List[str]:
+    """
+    Read the frontend's cities.json ({state: [cities, largest first]}) and
+    return the first *per_state* cities of each state as "City, State".
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        by_state = json.load(f)
+    locations = [f"{city}, {state}" for state, cities in by_state.items() for city in cities[:per_state]]
+    return locations[:limit] if limit else locations
+
+
+def build_targets(locations: List[str], windows_days: List[int]) -> List[Target]:
+    return [(loc, sd, ed) for loc in locations for sd, ed in window_ranges(windows_days)]
+
+
+def expiring_targets(
+    ahead_hours: float = PREWARM_AHEAD_HOURS,
+    limit: Optional[int] = PREWARM_MAX_EXPIRING,
+    today: Optional[date] = None,
+) -> List[Target]:
+    """
+    Entries already in event_cache whose soft TTL runs out within
+    *ahead_hours*, i.e. the locations users actually search, oldest first.
+    Entries past their hard TTL (nobody has asked for them since) and
+    ranges that have already ended are left to expire. Only the key
+    fields are read.
+    """
+    now = datetime.now(timezone.utc)
+    today_str = (today or date.today()).isoformat()
+    cutoff = now - timedelta(hours=max(CACHE_SOFT_TTL_HOURS - ahead_hours, 0))
+    oldest = now - timedelta(hours=CACHE_HARD_TTL_HOURS)
+    query = (
+        db.collection(CACHE_COLLECTION)
+        .where(filter=FieldFilter("cached_at", ">", oldest))
+        .where(filter=FieldFilter("cached_at", "<=", cutoff))
+        .order_by("cached_at")
+        .select(["location_raw", "start_date", "end_date"])
+    )
+    targets = []
+    for snap in query.stream():
+        data = snap.to_dict() or {}
+        end_date = data.get("end_date")
+        if not data.get("location_raw") or (end_date and end_date < today_str):
+            continue
+        targets.append((data["location_raw"], data.get("start_date"), end_date))
+        if limit and len(targets) >= limit:
+            break
+    return targets
+
+
+# ---------------------------------------------------------------------------
+# Warming
+# ---------------------------------------------------------------------------
+
+def _make_rate_limits() -> Dict[str, TokenBucket]:
+    return {name: per_minute_bucket(rpm) for name, rpm in PREWARM_RATE_LIMITS_PER_MIN.items()}
+
+
+def _needs_refresh(location: str, start_date: Optional[str], end_date: Optional[str], ahead_hours: float) -> bool:
+    entry = check_cache_entry(location, start_date, end_date)
+    if entry is None or entry["missing_ranges"]:
+        return True
+    age = datetime.now(timezone.utc) - entry["cached_at"]
+    return age >= timedelta(hours=CACHE_SOFT_TTL_HOURS - ahead_hours)
+
+
+def _warm_one(target: Target, ahead_hours: float, rate_limits: Dict[str, TokenBucket], force: bool) -> str:
+    location, start_date, end_date = target
+    if not force and not _needs_refresh(location, start_date, end_date, ahead_hours):
+        return "fresh"
+    events = fetch_cacheable_events(location, start_date, end_date, rate_limits=rate_limits)
+    if events is None:
+        return "partial"
+    return "stored" if store_cache(location, start_date, end_date, events) else "error"
+
+
+def prewarm(
+    targets: List[Target],
+    concurrency: int = PREWARM_CONCURRENCY,
+    ahead_hours: float = PREWARM_AHEAD_HOURS,
+    rate_limits: Optional[Dict[str, TokenBucket]] = None,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    Refresh each (location, start, end) target whose cache entry is missing
+    or within *ahead_hours* of its soft TTL. Returns counts per outcome
+    ("stored", "fresh", "partial", "error").
+    """
+    rate_limits = rate_limits if rate_limits is not None else _make_rate_limits()
+    summary: Dict[str, Any] = {"targets": len(targets), "stored": 0, "fresh": 0, "partial": 0, "error": 0}
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="prewarm") as pool:
+        futures = {pool.submit(_warm_one, t, ahead_hours, rate_limits, force): t for t in targets}
+        for future in as_completed(futures):
+            location, start_date, end_date = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                print(f"[prewarm] '{location}' {start_date}..{end_date} failed: {e}")
+                outcome = "error"
+            summary[outcome] += 1
+            print(f"[prewarm] '{location}' {start_date}..{end_date}: {outcome}")
+    print(f"[prewarm] Done: {summary}")
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# In-process scheduler
+# ---------------------------------------------------------------------------
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _scheduled_targets() -> List[Target]:
+    if PREWARM_LOCATIONS:
+        return build_targets(PREWARM_LOCATIONS, PREWARM_WINDOWS)
+    return expiring_targets()
+
+
+def start_prewarm_thread(interval_s: float = PREWARM_INTERVAL_S) -> threading.Thread:
+    """Run prewarm() every *interval_s* on a daemon thread (once per process)."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return _thread
+    rate_limits = _make_rate_limits()
+
+    def _loop():
+        while not _stop.is_set():
+            try:
+                prewarm(_scheduled_targets(), rate_limits=rate_limits)
+            except Exception as e:
+                print(f"[prewarm] scheduled run failed: {e}")
+            _stop.wait(interval_s)
+
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, name="prewarm-scheduler", daemon=True)
+    _thread.start()
+    print(f"[prewarm] Scheduler started (every {interval_s:.0f}s)")
+    return _thread
+
+
+def stop_prewarm_thread() -> None:
+    _stop.set()
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Pre-warm the event cache for popular locations.")
+    parser.add_argument("--locations", nargs="*", default=[], help='e.g. "Santa Barbara, CA"')
+    parser.add_argument("--cities-file", help="path to frontend/src/utils/cities.json")
+    parser.add_argument("--per-state", type=int, default=1, help="cities per state from --cities-file")
+    parser.add_argument("--limit", type=int, help="maximum number of locations")
+    parser.add_argument("--windows", default=",".join(str(w) for w in PREWARM_WINDOWS),
+                        help="comma-separated window lengths in days, starting today")
+    parser.add_argument("--expiring", action="store_true", help="also refresh cached entries close to expiry")
+    parser.add_argument("--max-expiring", type=int, default=PREWARM_MAX_EXPIRING,
+                        help="maximum number of expiring entries (0 for no limit)")
+    parser.add_argument("--concurrency", type=int, default=PREWARM_CONCURRENCY)
+    parser.add_argument("--ahead-hours", type=float, default=PREWARM_AHEAD_HOURS)
+    parser.add_argument("--force", action="store_true", help="re-fetch even if the entry is fresh")
+    args = parser.parse_args(argv)
+
+    locations = list(args.locations)
+    if args.cities_file:
+        locations += load_cities_file(args.cities_file, args.per_state)
+    if args.limit:
+        locations = locations[:args.limit]
+    windows = [int(w) for w in args.windows.split(",") if w.strip()]
+
+    targets = build_targets(locations, windows)
+    if args.expiring:
+        targets += expiring_targets(args.ahead_hours, limit=args.max_expiring)
+    if not targets:
+        parser.error("nothing to warm: pass --locations, --cities-file or --expiring")
+    prewarm(targets, concurrency=args.concurrency, ahead_hours=args.ahead_hours, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
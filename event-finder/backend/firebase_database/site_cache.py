@@ -0,0 +1,163 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any
+
+from firebase_admin import firestore as firestore_module
+
+from api.firestore import db
+from api.lru_cache import LRUCache
+from api.open_scraper import find_event_site_url, find_fallback_event_site_url
+from firebase_database.cache import normalize_location
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+SITE_COLLECTION = "event_sites"
+SITE_LRU_SIZE = int(os.getenv("SITE_CACHE_LRU_SIZE", "512"))
+# Re-read from Firestore periodically so health updates from other
+# instances are picked up.
+SITE_LRU_TTL_S = float(os.getenv("SITE_CACHE_LRU_TTL_S", "3600"))
+# Consecutive scrape failures before the cached URL is replaced via
+# find_fallback_event_site_url.
+SITE_FAILURE_THRESHOLD = int(os.getenv("SITE_CACHE_FAILURE_THRESHOLD", "2"))
+# Successes only change the entry when they end a failure streak; otherwise
+# last_success_at is refreshed at most this often.
+SITE_SUCCESS_WRITE_INTERVAL_S = float(os.getenv("SITE_CACHE_SUCCESS_WRITE_INTERVAL_S", "21600"))
+# Minimum time between two fallback lookups for the same location.
+SITE_FALLBACK_RETRY_S = float(os.getenv("SITE_CACHE_FALLBACK_RETRY_S", "21600"))
+
+_lru = LRUCache(max_entries=SITE_LRU_SIZE, ttl_s=SITE_LRU_TTL_S)
+
+
+def _site_key(location: str) -> str:
+    """Firestore-safe document ID for a normalized location."""
+    return hashlib.sha256(normalize_location(location).encode("utf-8")).hexdigest()[:20]
+
+
+def _seconds_since(value: Optional[datetime], now: datetime) -> Optional[float]:
+    """Seconds from a stored timestamp to *now*, or None if it was never set."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (now - value).total_seconds()
+
+
+# ---------------------------------------------------------------------------
+# Cache read / write
+# ---------------------------------------------------------------------------
+
+def get_site_entry(location: str) -> Optional[Dict[str, Any]]:
+    """Return the cached site entry for a location (LRU first, then Firestore)."""
+    key = _site_key(location)
+    entry = _lru.get(key)
+    if entry is not None:
+        return entry
+    try:
+        doc = db.collection(SITE_COLLECTION).document(key).get()
+        if not doc.exists:
+            return None
+        entry = doc.to_dict()
+        _lru.put(key, entry)
+        return entry
+    except Exception as e:
+        print(f"[site_cache] get_site_entry error: {e}")
+        return None
+
+
+def _write_site_entry(location: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge *fields* into the entry, in Firestore and the LRU."""
+    key = _site_key(location)
+    entry = dict(_lru.get(key) or {})
+    entry.update(fields)
+    entry["location_normalized"] = normalize_location(location)
+    _lru.put(key, entry)
+    try:
+        stored = dict(entry)
+        stored["updated_at"] = firestore_module.SERVER_TIMESTAMP
+        db.collection(SITE_COLLECTION).document(key).set(stored, merge=True)
+    except Exception as e:
+        print(f"[site_cache] write error: {e}")
+    return entry
+
+
+def store_site_url(location: str, url: str, found_by: str) -> Dict[str, Any]:
+    """Cache a newly discovered URL for a location, resetting its health."""
+    print(f"[site_cache] Caching {url} for '{location}' (via {found_by})")
+    return _write_site_entry(location, {
+        "url": url,
+        "found_by": found_by,
+        "consecutive_failures": 0,
+        "last_failure_reason": None,
+    })
+
+
+def record_scrape_result(location: str, url: str, failure_reason: Optional[str] = None) -> None:
+    """
+    Record the outcome of scraping *url* for *location*.
+    *failure_reason* is the scraper's _scrape_failure_reason (or error
+    text); None means the scrape succeeded. A success is only written
+    when it ends a failure streak or last_success_at is older than
+    SITE_SUCCESS_WRITE_INTERVAL_S.
+    """
+    entry = get_site_entry(location) or {}
+    if entry.get("url") != url:
+        return
+    now = datetime.now(timezone.utc)
+    if failure_reason is None:
+        if entry.get("consecutive_failures"):
+            print(f"[site_cache] {url} recovered for '{location}'")
+        else:
+            age = _seconds_since(entry.get("last_success_at"), now)
+            if age is not None and age < SITE_SUCCESS_WRITE_INTERVAL_S:
+                return
+        _write_site_entry(location, {"last_success_at": now, "consecutive_failures": 0})
+    else:
+        _write_site_entry(location, {
+            "last_failure_at": now,
+            "last_failure_reason": failure_reason,
+            "consecutive_failures": (entry.get("consecutive_failures") or 0) + 1,
+        })
+
+
+# ---------------------------------------------------------------------------
+# Lookup
+# ---------------------------------------------------------------------------
+
+def resolve_event_site_url(location: str) -> Dict[str, Any]:
+    """
+    Cached drop-in for find_event_site_url.
+
+    Returns the cached URL while it is healthy. Once it has failed
+    SITE_FAILURE_THRESHOLD times in a row, asks find_fallback_event_site_url
+    for a replacement, at most once per SITE_FALLBACK_RETRY_S (the attempt
+    is recorded as fallback_attempted_at); on a cache miss, asks
+    find_event_site_url.
+    """
+    entry = get_site_entry(location)
+    if entry and entry.get("url"):
+        failures = entry.get("consecutive_failures") or 0
+        if failures < SITE_FAILURE_THRESHOLD:
+            return {"location": location, "url": entry["url"], "from_cache": True}
+
+        now = datetime.now(timezone.utc)
+        since_attempt = _seconds_since(entry.get("fallback_attempted_at"), now)
+        if since_attempt is not None and since_attempt < SITE_FALLBACK_RETRY_S:
+            return {"location": location, "url": entry["url"], "from_cache": True}
+
+        reason = entry.get("last_failure_reason") or "unknown"
+        print(f"[site_cache] {entry['url']} failing for '{location}' ({reason}); asking for a fallback")
+        _write_site_entry(location, {"fallback_attempted_at": now})
+        fallback = find_fallback_event_site_url(location, entry["url"], reason)
+        new_url = fallback.get("url") if "error" not in fallback else None
+        if new_url and new_url != entry["url"]:
+            store_site_url(location, new_url, "fallback")
+            return {"location": location, "url": new_url, "from_cache": False}
+        # No usable alternative: keep trying the old URL rather than nothing.
+        return {"location": location, "url": entry["url"], "from_cache": True}
+
+    site_info = find_event_site_url(location)
+    if "error" not in site_info and site_info.get("url"):
+        store_site_url(location, site_info["url"], "llm")
+    return site_info
@@ -0,0 +1,192 @@
+import os
+import sys
+import types
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
+
+from firebase_admin import firestore as firestore_module  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# In-memory Firestore
+# ---------------------------------------------------------------------------
+# Covers the client surface the backend uses: documents and subcollections,
+# get / set (merge) / update / delete, batches, get_all, and collection
+# queries with where(FieldFilter), order_by() and select(). SERVER_TIMESTAMP
+# resolves to the current time on write. api.firestore is replaced before
+# any backend module imports it, so nothing connects to a real project.
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+
+def _resolve(data):
+    return {
+        k: datetime.now(timezone.utc) if v is firestore_module.SERVER_TIMESTAMP else v
+        for k, v in data.items()
+    }
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data, field_paths=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        if data is not None and field_paths is not None:
+            data = {k: v for k, v in data.items() if k in field_paths}
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path[-1]
+
+    @property
+    def parent(self):
+        return FakeCollection(self._db, self.path[:-1])
+
+    def collection(self, name):
+        return FakeCollection(self._db, self.path + (name,))
+
+    def get(self, field_paths=None):
+        self._db.reads += 1
+        return FakeSnapshot(self, self._db.docs.get(self.path), field_paths)
+
+    def set(self, data, merge=False):
+        self._db.writes += 1
+        current = self._db.docs.get(self.path) if merge else None
+        self._db.docs[self.path] = {**(current or {}), **_resolve(data)}
+
+    def update(self, data):
+        if self.path not in self._db.docs:
+            raise KeyError(self.path)
+        self.set(data, merge=True)
+
+    def delete(self):
+        self._db.writes += 1
+        self._db.docs.pop(self.path, None)
+
+
+class FakeQuery:
+    def __init__(self, collection, filters=(), fields=None, order=None):
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._fields = fields
+        self._order = order
+
+    def where(self, filter):
+        return FakeQuery(self._collection, self._filters + (filter,), self._fields, self._order)
+
+    def select(self, field_paths):
+        return FakeQuery(self._collection, self._filters, list(field_paths), self._order)
+
+    def order_by(self, field_path):
+        return FakeQuery(self._collection, self._filters, self._fields, field_path)
+
+    def stream(self):
+        db, path = self._collection._db, self._collection.path
+        matches = [
+            p for p in sorted(db.docs)
+            if len(p) == len(path) + 1 and p[:-1] == path
+            and all(f.field_path in db.docs[p] and _OPS[f.op_string](db.docs[p][f.field_path], f.value) for f in self._filters)
+        ]
+        if self._order is not None:
+            matches = [p for p in matches if self._order in db.docs[p]]
+            matches.sort(key=lambda p: db.docs[p][self._order])
+        for doc_path in matches:
+            db.reads += 1
+            yield FakeSnapshot(FakeDocument(db, doc_path), db.docs[doc_path], self._fields)
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db, path):
+        self._db = db
+        self.path = path
+        self.id = path[-1]
+        super().__init__(self)
+
+    @property
+    def parent(self):
+        return FakeDocument(self._db, self.path[:-1]) if len(self.path) > 1 else None
+
+    def document(self, doc_id=None):
+        return FakeDocument(self._db, self.path + (doc_id or uuid.uuid4().hex[:20],))
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append(lambda: ref.set(data, merge=merge))
+
+    def update(self, ref, data):
+        self._ops.append(lambda: ref.update(data))
+
+    def delete(self, ref):
+        self._ops.append(ref.delete)
+
+    def commit(self):
+        if self._db.fail_commits:
+            self._db.fail_commits -= 1
+            raise self._db.commit_error
+        self._db.commits += 1
+        for op in self._ops:
+            op()
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.docs = {}
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        self.fail_commits = 0
+        self.commit_error = ConnectionError("firestore unavailable")
+
+    def collection(self, name):
+        return FakeCollection(self, (name,))
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, refs, field_paths=None):
+        return [ref.get(field_paths=field_paths) for ref in refs]
+
+    def paths(self, *prefix):
+        return sorted(p for p in self.docs if p[:len(prefix)] == prefix)
+
+
+fake_db = FakeFirestore()
+_firestore = types.ModuleType("api.firestore")
+_firestore.db = fake_db
+_firestore.get_db = lambda: fake_db
+sys.modules["api.firestore"] = _firestore
+
+
+@pytest.fixture
+def db():
+    """The in-memory Firestore every backend module is using, emptied."""
+    fake_db.reset()
+    yield fake_db
+    fake_db.reset()
@@ -0,0 +1,237 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api.models import Event, serialize_events
+from firebase_database import cache
+
+
+def _event(i, day, **fields):
+    return Event(
+        id=f"ev{i}",
+        name=f"Event {i}",
+        date=day,
+        description="x" * 200,
+        type="music" if i % 2 else "food",
+        price=f"${i}",
+        source="ticketmaster",
+        **fields,
+    )
+
+
+def _events(n=20, first_day=1):
+    return [_event(i, f"2026-03-{first_day + i % 28:02d}") for i in range(n)]
+
+
+def _cold():
+    """Drop the in-process caches so the next read goes to Firestore."""
+    cache._l1.clear()
+    cache._ranges.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(db, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_ENCODING", "gzip")
+    monkeypatch.setattr(cache, "CACHE_STORAGE_MODE", "range")
+    _cold()
+    yield
+    _cold()
+
+
+# ---------------------------------------------------------------------------
+# Range entries
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("encoding", ["gzip", "map"])
+def test_inline_round_trip(db, monkeypatch, encoding):
+    monkeypatch.setattr(cache, "CACHE_ENCODING", encoding)
+    events = _events()
+    assert cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", events)
+
+    key = cache.generate_cache_key("Austin, TX", "2026-03-01", "2026-03-31")
+    doc = db.docs[(cache.CACHE_COLLECTION, key)]
+    assert doc["chunk_count"] == 0
+    assert ("events_blob" in doc) == (encoding == "gzip")
+
+    _cold()
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-31")
+    assert not entry["stale"]
+    assert serialize_events(entry["events"]) == serialize_events(events)
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "map"])
+def test_chunked_round_trip(db, monkeypatch, encoding):
+    monkeypatch.setattr(cache, "CACHE_ENCODING", encoding)
+    monkeypatch.setattr(cache, "MAX_DOC_SIZE_BYTES", 500)
+    monkeypatch.setattr(cache, "CHUNK_MAX_BYTES", 300)
+    events = _events(40)
+    assert cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", events)
+
+    key = cache.generate_cache_key("Austin, TX", "2026-03-01", "2026-03-31")
+    chunk_count = db.docs[(cache.CACHE_COLLECTION, key)]["chunk_count"]
+    assert chunk_count > 1
+    assert len(db.paths(cache.CACHE_COLLECTION, key, cache.CACHE_CHUNK_SUBCOLLECTION)) == chunk_count
+
+    _cold()
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-31")
+    assert serialize_events(entry["events"]) == serialize_events(events)
+
+
+def test_smaller_rewrite_deletes_leftover_chunks(db, monkeypatch):
+    monkeypatch.setattr(cache, "MAX_DOC_SIZE_BYTES", 500)
+    monkeypatch.setattr(cache, "CHUNK_MAX_BYTES", 300)
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", _events(40))
+    key = cache.generate_cache_key("Austin, TX", "2026-03-01", "2026-03-31")
+    assert db.paths(cache.CACHE_COLLECTION, key, cache.CACHE_CHUNK_SUBCOLLECTION)
+
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", _events(1))
+    assert db.docs[(cache.CACHE_COLLECTION, key)]["chunk_count"] == 0
+    assert db.paths(cache.CACHE_COLLECTION, key, cache.CACHE_CHUNK_SUBCOLLECTION) == []
+
+
+def test_missing_chunk_is_a_miss(db, monkeypatch):
+    monkeypatch.setattr(cache, "MAX_DOC_SIZE_BYTES", 500)
+    monkeypatch.setattr(cache, "CHUNK_MAX_BYTES", 300)
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", _events(40))
+    key = cache.generate_cache_key("Austin, TX", "2026-03-01", "2026-03-31")
+    del db.docs[(cache.CACHE_COLLECTION, key, cache.CACHE_CHUNK_SUBCOLLECTION, "1")]
+
+    _cold()
+    assert cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-31") is None
+
+
+def test_oversized_payload_is_not_stored(db, monkeypatch):
+    monkeypatch.setattr(cache, "MAX_CACHE_BYTES", 100)
+    assert cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", _events()) is False
+    assert db.docs == {}
+
+
+def test_write_errors_propagate_from_write_cache(db):
+    db.fail_commits = 2
+    with pytest.raises(ConnectionError):
+        cache._write_cache("Austin, TX", "2026-03-01", "2026-03-31", _events())
+    assert cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", _events()) is False
+
+
+def test_l1_serves_without_firestore_reads(db):
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", _events())
+    reads = db.reads
+    assert cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-31") is not None
+    assert db.reads == reads
+
+
+def test_soft_and_hard_ttl(db, monkeypatch):
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", _events())
+    key = cache.generate_cache_key("Austin, TX", "2026-03-01", "2026-03-31")
+    doc = db.docs[(cache.CACHE_COLLECTION, key)]
+
+    _cold()
+    doc["cached_at"] = datetime.now(timezone.utc) - timedelta(hours=cache.CACHE_SOFT_TTL_HOURS + 1)
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-31")
+    assert entry["stale"]
+    assert entry["refresh_ranges"] == [("2026-03-01", "2026-03-31")]
+
+    _cold()
+    doc["cached_at"] = datetime.now(timezone.utc) - timedelta(hours=cache.CACHE_HARD_TTL_HOURS + 1)
+    assert cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-31") is None
+
+
+# ---------------------------------------------------------------------------
+# Covering ranges
+# ---------------------------------------------------------------------------
+
+def test_superset_entry_answers_narrower_range(db):
+    events = _events(28)
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", events)
+
+    _cold()
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-10", "2026-03-12")
+    assert entry is not None
+    assert sorted(ev["date"] for ev in entry["events"]) == ["2026-03-10", "2026-03-11", "2026-03-12"]
+    assert entry["refresh_ranges"] == [("2026-03-01", "2026-03-31")]
+
+    # The shared index is narrowed to the requested dates when filtering
+    music = cache.filter_cache_entry(entry, event_type="music")
+    assert [ev["date"] for ev in music] == ["2026-03-10", "2026-03-12"]
+
+
+def test_superset_prefers_narrowest_range(db):
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", _events(28))
+    cache.store_cache("Austin, TX", "2026-03-08", "2026-03-14", _events(7, first_day=8)[:3])
+
+    _cold()
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-09", "2026-03-10")
+    assert entry["refresh_ranges"] == [("2026-03-08", "2026-03-14")]
+    assert [ev["date"] for ev in entry["events"]] == ["2026-03-09", "2026-03-10"]
+
+
+def test_no_superset_for_open_ended_or_other_location(db):
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", _events())
+    _cold()
+    assert cache.check_cache_entry("Austin, TX", "2026-03-10", None) is None
+    assert cache.check_cache_entry("Dallas, TX", "2026-03-10", "2026-03-12") is None
+
+
+# ---------------------------------------------------------------------------
+# Day buckets
+# ---------------------------------------------------------------------------
+
+def _day_events():
+    return [
+        _event(1, "2026-03-01"),
+        _event(2, "2026-03-02", end_date="2026-03-04"),
+        _event(3, "2026-03-03"),
+        _event(4, "TBD"),
+    ]
+
+
+@pytest.mark.parametrize("cold", [False, True])
+def test_day_buckets_round_trip(db, monkeypatch, cold):
+    monkeypatch.setattr(cache, "CACHE_STORAGE_MODE", "day")
+    assert cache.store_cache("Austin, TX", "2026-03-01", "2026-03-05", _day_events())
+    # one bucket per day, empty days included, plus the undated bucket
+    assert len(db.paths(cache.DAY_CACHE_COLLECTION)) == 6
+
+    if cold:
+        _cold()
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-02", "2026-03-07")
+    assert entry is not None
+    assert entry["missing_ranges"] == [("2026-03-06", "2026-03-07")]
+    # the multi-day event sits in three buckets but is returned once
+    assert sorted(ev["id"] for ev in entry["events"]) == ["ev2", "ev3", "ev4"]
+    assert len(entry["columns"]) == 3
+    assert [ev["id"] for ev in cache.filter_cache_entry(entry, event_type="music")] == ["ev3"]
+
+
+def test_day_buckets_missing_everywhere_is_a_miss(db, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_STORAGE_MODE", "day")
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-05", _day_events())
+    _cold()
+    assert cache.check_cache_entry("Austin, TX", "2026-04-01", "2026-04-03") is None
+
+
+def test_day_buckets_stale_days_are_refreshed(db, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_STORAGE_MODE", "day")
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-05", _day_events())
+    old = datetime.now(timezone.utc) - timedelta(hours=cache.CACHE_SOFT_TTL_HOURS + 1)
+    for path in db.paths(cache.DAY_CACHE_COLLECTION):
+        if db.docs[path]["day"] in ("2026-03-02", "2026-03-03"):
+            db.docs[path]["cached_at"] = old
+
+    _cold()
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-05")
+    assert entry["stale"]
+    assert entry["refresh_ranges"] == [("2026-03-02", "2026-03-03")]
+    assert entry["missing_ranges"] == []
+
+
+# ---------------------------------------------------------------------------
+# Background refresh
+# ---------------------------------------------------------------------------
+
+def test_refresh_runs_inline_without_background_refresh(db, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_BACKGROUND_REFRESH", False)
+    events = _events()
+    assert cache.refresh_in_background("Austin, TX", "2026-03-01", "2026-03-31", lambda: events)
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-31")
+    assert serialize_events(entry["events"]) == serialize_events(events)
@@ -0,0 +1,73 @@
+import pytest
+
+from api import extraction_cache
+from api.extraction_cache import extraction_cache_stats, extraction_key, get_extraction, store_extraction
+from api.lru_cache import LRUCache
+
+PAGE = "Jazz Night  March 5\n7:00 PM\tBlue Room"
+SCHEMA = {"type": "json_schema", "json_schema": {"name": "events", "strict": True}}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(extraction_cache, "_cache", LRUCache(max_entries=2, ttl_s=60))
+
+
+# ---------------------------------------------------------------------------
+# Keys
+# ---------------------------------------------------------------------------
+
+def test_key_ignores_whitespace_layout():
+    key = extraction_key(PAGE, "gpt-4o-mini", SCHEMA, "ctx")
+    assert extraction_key(" Jazz Night March 5 7:00 PM Blue Room\n", "gpt-4o-mini", SCHEMA, "ctx") == key
+
+
+def test_key_ignores_schema_key_order():
+    reordered = {"json_schema": {"strict": True, "name": "events"}, "type": "json_schema"}
+    assert extraction_key(PAGE, "gpt-4o-mini", reordered, "ctx") == extraction_key(PAGE, "gpt-4o-mini", SCHEMA, "ctx")
+
+
+@pytest.mark.parametrize("change", [
+    {"page_text": "Jazz Night March 6 7:00 PM Blue Room"},
+    {"model": "gpt-4o"},
+    {"schema": {"type": "json_object"}},
+    {"context": "other|https://example.com"},
+])
+def test_key_changes_with_anything_that_affects_the_output(change):
+    args = {"page_text": PAGE, "model": "gpt-4o-mini", "schema": SCHEMA, "context": "ctx"}
+    assert extraction_key(**dict(args, **change)) != extraction_key(**args)
+
+
+def test_page_text_and_context_do_not_run_together():
+    assert extraction_key("b", "m", {}, "a") != extraction_key("", "m", {}, "ab")
+
+
+# ---------------------------------------------------------------------------
+# Hits and misses
+# ---------------------------------------------------------------------------
+
+def test_miss_then_hit():
+    key = extraction_key(PAGE, "gpt-4o-mini", SCHEMA)
+    events = [{"name": "Jazz Night", "date": "2026-03-05"}]
+    assert get_extraction(key) is None
+
+    store_extraction(key, events)
+    assert get_extraction(extraction_key(PAGE + "\n", "gpt-4o-mini", SCHEMA)) == events
+
+    stats = extraction_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_empty_extraction_is_a_hit():
+    key = extraction_key("No events this week", "gpt-4o-mini", SCHEMA)
+    store_extraction(key, [])
+    assert get_extraction(key) == []
+
+
+def test_least_recently_used_entry_is_evicted():
+    keys = [extraction_key(f"page {i}", "gpt-4o-mini", SCHEMA) for i in range(3)]
+    for i, key in enumerate(keys):
+        store_extraction(key, [{"name": f"Event {i}"}])
+    assert get_extraction(keys[0]) is None
+    assert get_extraction(keys[2]) == [{"name": "Event 2"}]
+    assert extraction_cache_stats()["evictions"] == 1
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from api import fanout
+from api.fanout import iter_fanout, provider_status, run_fanout
+
+
+def test_results_arrive_in_completion_order():
+    release = threading.Event()
+
+    def slow():
+        release.wait(2)
+        return {"events": [{"id": "slow"}]}
+
+    def fast():
+        return [{"id": "fast"}]
+
+    results = iter_fanout({"slow": slow, "fast": fast}, timeouts={"slow": 5, "fast": 5})
+    first = next(results)
+    assert first.name == "fast"
+    assert first.data == {"events": [{"id": "fast"}]}
+    release.set()
+    assert next(results).name == "slow"
+
+
+def test_provider_deadline_returns_partial_results():
+    release = threading.Event()
+    started = time.monotonic()
+    results = run_fanout(
+        {"stuck": lambda: release.wait(5) and {"events": []}, "ok": lambda: {"events": [1]}},
+        timeouts={"stuck": 0.1, "ok": 5},
+    )
+    release.set()
+    assert time.monotonic() - started < 2
+    assert results["stuck"].timed_out
+    assert provider_status(results["stuck"].data) == "timeout"
+    assert not results["ok"].timed_out
+    assert results["ok"].data == {"events": [1]}
+
+
+def test_overall_deadline_caps_provider_timeouts():
+    release = threading.Event()
+    results = run_fanout({"stuck": lambda: release.wait(5)}, timeouts={"stuck": 5}, deadline_s=0.1)
+    release.set()
+    assert results["stuck"].timed_out
+
+
+def test_task_errors_are_reported_not_raised():
+    def boom():
+        raise RuntimeError("provider down")
+
+    result = run_fanout({"boom": boom})["boom"]
+    assert not result.timed_out
+    assert result.data == {"events": [], "error": "provider down"}
+    assert provider_status(result.data) == "error"
+
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    pool = fanout.FanoutPool(max_workers=1, max_abandoned=1)
+    monkeypatch.setattr(fanout, "_pool", pool)
+    return pool
+
+
+def test_deadline_starts_when_a_worker_picks_the_task_up(small_pool):
+    release = threading.Event()
+    busy = threading.Thread(target=lambda: run_fanout({"busy": lambda: release.wait(5) and {}}, timeouts={"busy": 5}))
+    busy.start()
+    while small_pool.stats()["running"] == 0:
+        time.sleep(0.001)
+
+    ran = []
+    threading.Timer(0.3, release.set).start()
+    result = run_fanout({"queued": lambda: ran.append(1) or {"events": []}}, timeouts={"queued": 0.2})["queued"]
+    busy.join()
+    assert ran == [1]
+    assert not result.timed_out
+
+
+def test_queued_task_gives_up_after_queue_timeout(small_pool, monkeypatch):
+    monkeypatch.setattr(fanout, "FANOUT_QUEUE_TIMEOUT_S", 0.1)
+    release = threading.Event()
+    small_pool.submit(lambda: release.wait(5))
+    ran = []
+    result = run_fanout({"queued": lambda: ran.append(1)}, timeouts={"queued": 5})["queued"]
+    release.set()
+    assert result.timed_out and ran == []
+    assert small_pool.stats()["queued"] == 0
+
+
+def test_abandoned_calls_free_their_slot_up_to_a_limit(small_pool):
+    release = threading.Event()
+    stuck = run_fanout({"stuck": lambda: release.wait(5)}, timeouts={"stuck": 0.05})["stuck"]
+    assert stuck.timed_out
+    assert small_pool.stats() == {"running": 0, "queued": 0, "abandoned": 1}
+
+    # the stuck call no longer blocks the next request
+    assert not run_fanout({"next": lambda: {"events": []}}, timeouts={"next": 1})["next"].timed_out
+
+    # past max_abandoned, a stuck call keeps its slot
+    run_fanout({"stuck2": lambda: release.wait(5)}, timeouts={"stuck2": 0.05})
+    assert small_pool.stats() == {"running": 1, "queued": 0, "abandoned": 1}
+
+    release.set()
+    while small_pool.stats() != {"running": 0, "queued": 0, "abandoned": 0}:
+        time.sleep(0.001)
@@ -0,0 +1,122 @@
+import json
+import random
+
+import pytest
+
+from api.event_index import EventIndex
+from api.event_set import EventSet
+from api.filters import SEARCH_FIELD, EventFilter, SearchFields, annotate_events, search_fields
+from api.models import Event, json_default, plain_events, serialize_events, to_events
+
+WORDS = ["music", "jazz", "rock", "food", "art show", "tech", "sports", "comedy night"]
+
+
+def _random_events(rng, n):
+    events = []
+    for i in range(n):
+        ev = {
+            "id": str(i),
+            "name": f"{rng.choice(WORDS)} {i}",
+            "date": rng.choice([None, "TBD", f"2026-03-{rng.randint(1, 28):02d}", "2026-03-05T19:00"]),
+            "type": rng.choice(WORDS),
+            "category": rng.choice(WORDS),
+            "price": rng.choice([None, "Free", "$10", "$15 - $40", 25, "abc"]),
+            "source": rng.choice(["ticketmaster", "allevents"]),
+        }
+        if rng.random() < 0.4:
+            ev["end_date"] = f"2026-03-{rng.randint(1, 28):02d}"
+        if rng.random() < 0.3:
+            ev["time"] = rng.choice(["7:00 PM - 9:00 PM", "10:00 AM", "8pm-11pm", "9:00 AM - 5:00 PM"])
+        events.append(ev)
+    return events
+
+
+def _random_filter(rng):
+    return EventFilter(
+        event_types=rng.choice([None, "music", "jazz,rock", ["art show", "tech"]]),
+        categories=rng.choice([None, "food", "comedy"]),
+        min_price=rng.choice([None, 0, 12, 30]),
+        max_price=rng.choice([None, 10, 20, 50]),
+        start_date=rng.choice([None, "2026-03-10"]),
+        end_date=rng.choice([None, "2026-03-20T23:59"]),
+        durations=rng.choice([None, "short", "2-4 hours", "long"]),
+    )
+
+
+def _ids(events):
+    return [ev["id"] for ev in events]
+
+
+@pytest.mark.parametrize("as_events", [False, True])
+def test_engines_agree(as_events):
+    rng = random.Random(7)
+    raw = _random_events(rng, 300)
+    events = annotate_events(to_events(raw) if as_events else [dict(ev) for ev in raw])
+    index = EventIndex(events)
+    columns = EventSet.from_events(events)
+    for _ in range(500):
+        flt = _random_filter(rng)
+        expected = _ids(flt.apply(events))
+        assert _ids(index.query(flt)) == expected
+        assert _ids(columns.filter(flt).to_dicts()) == expected
+
+
+def test_dicts_and_events_filter_the_same():
+    rng = random.Random(11)
+    raw = _random_events(rng, 200)
+    dicts, events = annotate_events([dict(ev) for ev in raw]), annotate_events(to_events(raw))
+    for _ in range(200):
+        flt = _random_filter(rng)
+        assert _ids(flt.apply(dicts)) == _ids(flt.apply(events))
+
+
+def test_unknown_fields_never_exclude():
+    events = annotate_events([{"id": "1", "name": "Mystery"}])
+    flt = EventFilter(min_price=10, max_price=20, start_date="2026-03-01", end_date="2026-03-02", durations="short")
+    assert _ids(flt.apply(events)) == ["1"]
+    assert _ids(EventIndex(events).query(flt)) == ["1"]
+    assert _ids(EventSet.from_events(events).filter(flt).to_dicts()) == ["1"]
+
+
+def test_empty_filter_returns_everything():
+    events = annotate_events(to_events(_random_events(random.Random(3), 10)))
+    assert EventIndex(events).query(EventFilter()) is events
+    assert _ids(EventSet.from_events(events).filter(EventFilter()).to_dicts()) == _ids(events)
+
+
+def test_event_set_unique_keeps_first_of_each_name_and_day():
+    events = annotate_events([
+        {"id": "a", "name": "Show", "date": "2026-03-01"},
+        {"id": "b", "name": "show ", "date": "2026-03-01T20:00"},
+        {"id": "c", "name": "Show", "date": "2026-03-02"},
+    ])
+    assert _ids(EventSet.from_events(events).unique().to_dicts()) == ["a", "c"]
+
+
+# ---------------------------------------------------------------------------
+# Search fields and serialization
+# ---------------------------------------------------------------------------
+
+def test_search_fields_survive_storage_round_trip():
+    events = annotate_events(to_events(_random_events(random.Random(5), 50)))
+    stored = json.loads(json.dumps(events, default=json_default))
+    assert all(isinstance(ev[SEARCH_FIELD], dict) for ev in stored)
+
+    loaded = to_events(stored)
+    assert all(isinstance(ev[SEARCH_FIELD], SearchFields) for ev in loaded)
+    assert [ev.to_dict() for ev in loaded] == [ev.to_dict() for ev in events]
+
+
+def test_outdated_search_fields_are_recomputed():
+    ev = Event(name="Jazz night", price="$10", **{SEARCH_FIELD: {"v": -1, "text": "stale"}})
+    annotate_events([ev])
+    assert ev[SEARCH_FIELD].text != "stale"
+    assert ev[SEARCH_FIELD].price_min == 10
+
+
+def test_search_fields_are_internal():
+    dicts = annotate_events([{"id": "1", "name": "A", "price": "$5"}])
+    events = annotate_events(to_events([{"id": "2", "name": "B", "price": "$5"}]))
+    assert all(SEARCH_FIELD not in ev for ev in serialize_events(dicts + events))
+    assert all(isinstance(ev[SEARCH_FIELD], dict) for ev in plain_events(dicts + events))
+    assert search_fields(events[0]).price_max == 5
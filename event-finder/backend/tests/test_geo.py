@@ -0,0 +1,144 @@
+import math
+import random
+
+import pytest
+
+from api.models import Event
+from firebase_database import cache
+from firebase_database.geo import (
+    GeohashGrid,
+    centroid,
+    covering_cells,
+    encode_geohash,
+    event_coords,
+    haversine_miles_many,
+    within_radius,
+)
+
+
+def _points_near(rng, lat, lng, radius_miles, n):
+    """Random points around (lat, lng), roughly within 1.5x the radius."""
+    points = []
+    for _ in range(n):
+        d = rng.uniform(0, radius_miles * 1.5)
+        bearing = rng.uniform(0, 2 * math.pi)
+        p_lat = lat + d * math.cos(bearing) / 69.0
+        p_lng = lng + d * math.sin(bearing) / (69.0 * max(math.cos(math.radians(lat)), 0.01))
+        points.append((max(-90.0, min(90.0, p_lat)), (p_lng + 180) % 360 - 180))
+    return points
+
+
+def test_encode_geohash_known_value():
+    assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert encode_geohash(57.64911, 10.40744) == "u4pruydqq"
+
+
+def test_haversine_and_centroid():
+    # Austin to Dallas is about 182 miles
+    assert haversine_miles_many(30.2672, -97.7431, [32.7767], [-96.7970])[0] == pytest.approx(182, abs=3)
+    lats, lngs = event_coords([
+        {"latitude": 30.0, "longitude": -98.0},
+        {"latitude": "32", "longitude": "-96"},
+        {"latitude": None, "longitude": -90.0},
+        {"latitude": "bad", "longitude": 0},
+    ])
+    assert centroid(lats, lngs) == pytest.approx((31.0, -97.0))
+    assert centroid([], []) is None
+
+
+@pytest.mark.parametrize("lat,lng,radius", [
+    (30.2672, -97.7431, 50),
+    (64.8378, -147.7164, 25),
+    (0.0, 179.9, 40),
+    (-33.8688, 151.2093, 5),
+])
+def test_covering_cells_contain_every_point_in_radius(lat, lng, radius):
+    rng = random.Random(1)
+    cells = covering_cells(lat, lng, radius)
+    points = _points_near(rng, lat, lng, radius, 500)
+    inside = within_radius(lat, lng, [p[0] for p in points], [p[1] for p in points], radius)
+    for (p_lat, p_lng), keep in zip(points, inside):
+        if keep:
+            geohash = encode_geohash(p_lat, p_lng)
+            assert any(geohash.startswith(cell) for cell in cells), (p_lat, p_lng)
+
+
+def test_grid_query_matches_brute_force():
+    rng = random.Random(2)
+    points = _points_near(rng, 30.2672, -97.7431, 150, 400)
+    grid = GeohashGrid()
+    grid.replace_all((i, p_lat, p_lng, i * 10) for i, (p_lat, p_lng) in enumerate(points))
+    for radius in (5, 50, 200):
+        mask = within_radius(30.2672, -97.7431, [p[0] for p in points], [p[1] for p in points], radius)
+        expected = sorted((i, i * 10) for i, keep in enumerate(mask) if keep)
+        assert sorted(grid.query(30.2672, -97.7431, radius)) == expected
+
+
+def test_grid_upsert_moves_and_remove_drops():
+    grid = GeohashGrid()
+    grid.upsert("a", 30.2672, -97.7431, "austin")
+    grid.upsert("a", 32.7767, -96.7970, "dallas")
+    assert len(grid) == 1
+    assert grid.query(30.2672, -97.7431, 10) == []
+    assert grid.query(32.7767, -96.7970, 10) == [("a", "dallas")]
+    grid.remove("a")
+    assert len(grid) == 0
+
+
+# ---------------------------------------------------------------------------
+# Uploaded URLs
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def uploads(db, monkeypatch):
+    monkeypatch.setattr(cache, "UPLOADED_INDEX_ENABLED", False)
+    monkeypatch.setattr(cache, "_uploaded_grid", GeohashGrid())
+    monkeypatch.setitem(cache._geohash_backfill, "done", False)
+    cache._uploaded_payloads.clear()
+    yield db
+    cache._uploaded_payloads.clear()
+
+
+def _upload(url, lat, lng):
+    events = [Event(id=url, name=url, date="2026-03-01", latitude=lat, longitude=lng)]
+    return cache.store_uploaded_url(url, "City", "ST", events)
+
+
+def test_uploaded_events_near_uses_geohash_queries(uploads):
+    _upload("austin", 30.2672, -97.7431)
+    _upload("round-rock", 30.5083, -97.6789)
+    _upload("dallas", 32.7767, -96.7970)
+    doc = next(d for d in uploads.docs.values() if d.get("url") == "austin")
+    assert "events" not in doc
+    assert doc[cache.GEOHASH_FIELD] == encode_geohash(30.2672, -97.7431)
+
+    cache._uploaded_payloads.clear()
+    near = cache.get_uploaded_events_near(30.2672, -97.7431, 50)
+    assert sorted(ev["id"] for ev in near) == ["austin", "round-rock"]
+
+
+def test_uploaded_index_answers_without_queries(uploads, monkeypatch):
+    _upload("austin", 30.2672, -97.7431)
+    _upload("dallas", 32.7767, -96.7970)
+    cache._sync_uploaded_index(full=True)
+    monkeypatch.setattr(cache, "UPLOADED_INDEX_ENABLED", True)
+    monkeypatch.setattr(cache, "start_uploaded_index_sync", lambda: None)
+    monkeypatch.setattr(cache, "_query_uploaded_near", None)  # must not be called
+    assert [ev["id"] for ev in cache.get_uploaded_events_near(32.7767, -96.7970, 20)] == ["dallas"]
+
+
+def test_uploads_without_geohash_are_backfilled_on_first_lookup(uploads, monkeypatch):
+    uploads.docs[(cache.UPLOADED_COLLECTION, "legacy")] = {
+        "url": "legacy",
+        "centroid_lat": 30.2672,
+        "centroid_lng": -97.7431,
+        "events": [{"id": "legacy", "name": "Legacy", "date": "2026-03-01"}],
+    }
+    assert [ev["id"] for ev in cache.get_uploaded_events_near(30.2672, -97.7431, 10)] == ["legacy"]
+    assert uploads.docs[(cache.UPLOADED_COLLECTION, "legacy")][cache.GEOHASH_FIELD] == encode_geohash(30.2672, -97.7431)
+    assert (cache.MIGRATIONS_COLLECTION, cache.GEOHASH_BACKFILL_DOC) in uploads.docs
+
+    # another process sees the marker and skips the scan
+    monkeypatch.setitem(cache._geohash_backfill, "done", False)
+    monkeypatch.setattr(cache, "backfill_uploaded_geohashes", None)  # must not be called
+    assert [ev["id"] for ev in cache.get_uploaded_events_near(30.2672, -97.7431, 10)] == ["legacy"]
@@ -0,0 +1,79 @@
+import io
+
+import pytest
+import requests
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.response import HTTPResponse
+from urllib3.util import retry as retry_module
+
+from api import http_client
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """
+    Replace the socket layer under the pooled adapter: each request pops the
+    next status from transport["statuses"] (sent with transport["headers"])
+    and the backoff sleeps are recorded instead of slept.
+    """
+    state = {"statuses": [], "headers": {}, "requests": 0, "sleeps": []}
+
+    def fake_request(pool, conn, method, url, **kwargs):
+        state["requests"] += 1
+        return HTTPResponse(
+            body=io.BytesIO(b"{}"),
+            status=state["statuses"].pop(0),
+            headers=state["headers"],
+            preload_content=False,
+            request_method=method,
+            request_url=url,
+        )
+
+    monkeypatch.setattr(HTTPConnectionPool, "_make_request", fake_request)
+    monkeypatch.setattr(retry_module.time, "sleep", state["sleeps"].append)
+    return state
+
+
+def _session():
+    s = requests.Session()
+    s.mount("http://", http_client._pooled_adapter())
+    return s
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_transient_statuses_are_retried(transport, status):
+    transport["statuses"] = [status, 200]
+    res = _session().get("http://provider.test/events")
+    assert res.status_code == 200
+    assert transport["requests"] == 2
+
+
+def test_last_response_is_returned_once_retries_run_out(transport, monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_MAX_RETRIES", 2)
+    transport["statuses"] = [502, 502, 502]
+    res = _session().get("http://provider.test/events")
+    assert res.status_code == 502
+    assert transport["requests"] == 3
+
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+def test_client_errors_are_not_retried(transport, status):
+    transport["statuses"] = [status]
+    res = _session().get("http://provider.test/events")
+    assert res.status_code == status
+    assert transport["requests"] == 1
+    assert transport["sleeps"] == []
+
+
+def test_backoff_is_capped(transport, monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_MAX_RETRIES", 4)
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_FACTOR", 10)
+    monkeypatch.setattr(http_client, "HTTP_BACKOFF_MAX_S", 1.5)
+    transport["statuses"] = [429, 503, 503, 503, 200]
+    transport["headers"] = {"Retry-After": "120"}
+    res = _session().get("http://provider.test/events")
+    assert res.status_code == 200
+    assert transport["requests"] == 5
+    # Retry-After is ignored; every wait stays under the cap
+    assert transport["sleeps"]
+    assert max(transport["sleeps"]) == 1.5
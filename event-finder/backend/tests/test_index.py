@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api import index
+from api.models import Event
+from firebase_database import cache
+
+
+@pytest.fixture
+def day_mode(db, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_STORAGE_MODE", "day")
+    monkeypatch.setattr(index, "store_cache_async", cache.store_cache)
+    cache._l1.clear()
+    yield db
+    cache._l1.clear()
+
+
+def test_filled_ranges_are_filtered_with_the_cached_days(day_mode, monkeypatch):
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-02", [
+        Event(id="cached", name="Jazz brunch", date="2026-03-01", type="music"),
+    ])
+    fetched = [
+        Event(id="filled", name="Jazz night", date="2026-03-04", type="music"),
+        Event(id="other", name="Food fair", date="2026-03-04", type="food"),
+    ]
+    monkeypatch.setattr(index, "fetch_cacheable_events", lambda location, sd, ed: fetched)
+
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-04")
+    assert entry["missing_ranges"] == [("2026-03-03", "2026-03-04")]
+    entry = index._fill_missing_ranges("Austin, TX", entry)
+
+    assert sorted(ev["id"] for ev in entry["events"]) == ["cached", "filled", "other"]
+    assert len(entry["columns"]) == 3
+    music = cache.filter_cache_entry(entry, event_type="music")
+    assert sorted(ev["id"] for ev in music) == ["cached", "filled"]
+
+
+def test_partial_fill_is_a_miss(day_mode, monkeypatch):
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-02", [Event(id="a", name="A", date="2026-03-01")])
+    monkeypatch.setattr(index, "fetch_cacheable_events", lambda location, sd, ed: None)
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-04")
+    assert index._fill_missing_ranges("Austin, TX", entry) is None
+
+
+def _stale_entry(db):
+    cache.store_cache("Austin, TX", "2026-03-01", "2026-03-31", [Event(id="old", name="Old", date="2026-03-01")])
+    key = cache.generate_cache_key("Austin, TX", "2026-03-01", "2026-03-31")
+    db.docs[(cache.CACHE_COLLECTION, key)]["cached_at"] = (
+        datetime.now(timezone.utc) - timedelta(hours=cache.CACHE_SOFT_TTL_HOURS + 1)
+    )
+    cache._l1.clear()
+    entry = cache.check_cache_entry("Austin, TX", "2026-03-01", "2026-03-31")
+    assert entry["stale"]
+    return entry
+
+
+@pytest.fixture
+def range_mode(db, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_STORAGE_MODE", "range")
+    cache._l1.clear()
+    cache._ranges.clear()
+    yield db
+    cache._l1.clear()
+    cache._ranges.clear()
+
+
+def test_inline_refresh_serves_the_refreshed_entry(range_mode, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_BACKGROUND_REFRESH", False)
+    monkeypatch.setattr(index, "CACHE_BACKGROUND_REFRESH", False)
+    fetches = []
+
+    def fetch(location, sd, ed):
+        fetches.append((sd, ed))
+        return [Event(id="new", name="New", date="2026-03-02")]
+
+    monkeypatch.setattr(index, "fetch_cacheable_events", fetch)
+    entry = index._refresh_stale_ranges("Austin, TX", "2026-03-01", "2026-03-31", _stale_entry(range_mode))
+    assert fetches == [("2026-03-01", "2026-03-31")]
+    assert not entry["stale"]
+    assert [ev["id"] for ev in entry["events"]] == ["new"]
+
+
+def test_background_refresh_serves_the_stale_entry(range_mode, monkeypatch):
+    monkeypatch.setattr(index, "CACHE_BACKGROUND_REFRESH", True)
+    started = []
+    monkeypatch.setattr(index, "refresh_in_background", lambda *args: started.append(args[:3]))
+    stale = _stale_entry(range_mode)
+    assert index._refresh_stale_ranges("Austin, TX", "2026-03-01", "2026-03-31", stale) is stale
+    assert started == [("Austin, TX", "2026-03-01", "2026-03-31")]
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from api import llm_router
+
+
+def _provider(name, delay_s, events):
+    def fetch(**kwargs):
+        time.sleep(delay_s)
+        return {"events": [dict(ev, id=f"{name}-{ev['name']}-{kwargs['event_type']}") for ev in events], "total": len(events)}
+    return fetch
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    shared = {"name": "Jazz Night", "date": "2026-03-01", "venue": "Hall"}
+    monkeypatch.setattr(llm_router, "PROVIDERS", {
+        # the first provider in routing order answers last
+        "ticketmaster": _provider("ticketmaster", 0.2, [shared, {"name": "Rock", "date": "2026-03-02"}]),
+        "eventbrite": _provider("eventbrite", 0.1, [shared, {"name": "Art", "date": "2026-03-03"}]),
+        "allevents": _provider("allevents", 0.0, [shared, {"name": "Rock", "date": "2026-03-02"}]),
+    })
+    monkeypatch.setattr(llm_router, "_llm_choose_providers", lambda **kwargs: {
+        "providers": ["ticketmaster", "eventbrite", "allevents"],
+    })
+
+
+def _route(parallel):
+    return llm_router.route_and_fetch_events(
+        location="Austin, TX",
+        event_types=["music", "sports"],
+        parallel=parallel,
+    )
+
+
+def test_parallel_and_sequential_merge_the_same(providers):
+    sequential, parallel = _route(False), _route(True)
+    assert [ev.to_dict() for ev in parallel["events"]] == [ev.to_dict() for ev in sequential["events"]]
+    assert parallel["errors"] == sequential["errors"] == {}
+    # duplicates keep the copy from the first call in routing order
+    assert [ev["id"] for ev in parallel["events"]] == [
+        "ticketmaster-Jazz Night-music",
+        "ticketmaster-Rock-music",
+        "eventbrite-Art-None",
+    ]
+    assert parallel["provider_results"]["ticketmaster"]["calls"] == 2
+
+
+def test_provider_errors_are_reported_in_both_modes(providers, monkeypatch):
+    def boom(**kwargs):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setitem(llm_router.PROVIDERS, "eventbrite", boom)
+    for parallel in (False, True):
+        result = _route(parallel)
+        assert result["errors"] == {"eventbrite": "provider down"}
+        assert {ev["provider"] for ev in result["events"]} == {"ticketmaster"}
+        assert result["provider_results"]["allevents"]["added_events"] == 2
@@ -0,0 +1,58 @@
+import types
+
+import pytest
+
+from api import lru_cache
+from api.lru_cache import LRUCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(lru_cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget():
+    cache = LRUCache(max_entries=10, max_bytes=100)
+    cache.put("a", 1, size=60)
+    cache.put("b", 2, size=30)
+    cache.put("c", 3, size=30)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 60
+    cache.put("huge", 4, size=101)
+    assert cache.get("huge") is None
+    assert len(cache) == 2
+
+
+def test_replacing_an_entry_updates_its_size():
+    cache = LRUCache(max_bytes=100)
+    cache.put("a", 1, size=80)
+    cache.put("a", 2, size=10)
+    assert cache.stats()["bytes"] == 10
+    assert cache.pop("a") == 2
+    assert cache.stats()["bytes"] == 0
+
+
+def test_default_and_per_entry_ttl(clock):
+    cache = LRUCache(ttl_s=10)
+    cache.put("default", 1, size=5)
+    cache.put("short", 2, size=5, ttl_s=1)
+    clock[0] += 2
+    assert cache.get("short") is None
+    assert cache.get("default") == 1
+    clock[0] += 10
+    assert cache.get("default") is None
+    assert cache.stats()["bytes"] == 0
+    assert cache.stats()["misses"] == 2
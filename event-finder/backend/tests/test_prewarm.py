@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from api.models import Event
+from firebase_database import cache, prewarm
+
+TODAY = date(2026, 3, 10)
+
+
+@pytest.fixture
+def cached(db, monkeypatch):
+    """Store an entry per (location, range), backdated by *age_h* hours."""
+    monkeypatch.setattr(cache, "CACHE_STORAGE_MODE", "range")
+    cache._l1.clear()
+    cache._ranges.clear()
+
+    def store(location, start_date, end_date, age_h):
+        cache.store_cache(location, start_date, end_date, [Event(id="1", name="A", date=start_date)])
+        key = cache.generate_cache_key(location, start_date, end_date)
+        db.docs[(cache.CACHE_COLLECTION, key)]["cached_at"] = datetime.now(timezone.utc) - timedelta(hours=age_h)
+        cache._l1.clear()  # store_cache wrote the entry through with the current time
+
+    yield store
+    cache._l1.clear()
+    cache._ranges.clear()
+
+
+def test_expiring_targets_skip_fresh_expired_and_past_entries(cached):
+    soon = cache.CACHE_SOFT_TTL_HOURS - 1
+    cached("Fresh, TX", "2026-03-10", "2026-03-16", 0)
+    cached("Expiring, TX", "2026-03-10", "2026-03-16", soon)
+    cached("Open, TX", None, None, soon)
+    cached("Ended, TX", "2026-03-01", "2026-03-09", soon)
+    cached("Abandoned, TX", "2026-03-10", "2026-03-16", cache.CACHE_HARD_TTL_HOURS + 1)
+
+    targets = prewarm.expiring_targets(ahead_hours=2, limit=None, today=TODAY)
+    assert sorted(targets, key=str) == sorted([
+        ("Expiring, TX", "2026-03-10", "2026-03-16"),
+        ("Open, TX", None, None),
+    ], key=str)
+
+
+def test_expiring_targets_are_limited_oldest_first(cached):
+    for i in range(5):
+        cached(f"City {i}, TX", "2026-03-10", "2026-03-16", cache.CACHE_SOFT_TTL_HOURS + i)
+    targets = prewarm.expiring_targets(ahead_hours=0, limit=2, today=TODAY)
+    assert [loc for loc, _, _ in targets] == ["City 4, TX", "City 3, TX"]
+
+
+def test_needs_refresh(cached):
+    cached("Austin, TX", "2026-03-10", "2026-03-16", 0)
+    assert not prewarm._needs_refresh("Austin, TX", "2026-03-10", "2026-03-16", ahead_hours=2)
+    assert prewarm._needs_refresh("Dallas, TX", "2026-03-10", "2026-03-16", ahead_hours=2)
+
+    cached("Austin, TX", "2026-03-10", "2026-03-16", cache.CACHE_SOFT_TTL_HOURS - 1)
+    assert prewarm._needs_refresh("Austin, TX", "2026-03-10", "2026-03-16", ahead_hours=2)
+    assert not prewarm._needs_refresh("Austin, TX", "2026-03-10", "2026-03-16", ahead_hours=0)
+
+
+def test_build_targets_windows_start_today():
+    assert prewarm.window_ranges([1, 7], today=TODAY) == [("2026-03-10", "2026-03-10"), ("2026-03-10", "2026-03-16")]
+    assert len(prewarm.build_targets(["A, TX", "B, TX"], [1, 7])) == 4
+
+
+def test_prewarm_fetches_only_targets_that_need_it(cached, monkeypatch):
+    cached("Fresh, TX", "2026-03-10", "2026-03-16", 0)
+    fetched = []
+
+    def fetch(location, start_date, end_date, rate_limits=None):
+        fetched.append(location)
+        return None if location == "Partial, TX" else [Event(id="2", name="B", date=start_date)]
+
+    monkeypatch.setattr(prewarm, "fetch_cacheable_events", fetch)
+    summary = prewarm.prewarm([
+        ("Fresh, TX", "2026-03-10", "2026-03-16"),
+        ("New, TX", "2026-03-10", "2026-03-16"),
+        ("Partial, TX", "2026-03-10", "2026-03-16"),
+    ], rate_limits={})
+    assert sorted(fetched) == ["New, TX", "Partial, TX"]
+    assert (summary["fresh"], summary["stored"], summary["partial"]) == (1, 1, 1)
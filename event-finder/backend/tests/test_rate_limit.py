@@ -0,0 +1,52 @@
+import types
+
+import pytest
+
+from api import rate_limit
+from api.rate_limit import TokenBucket, per_minute_bucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=lambda: now[0], sleep=sleep))
+    return now
+
+
+def test_burst_up_to_capacity_then_waits_for_refill(clock):
+    bucket = TokenBucket(rate_per_s=2, capacity=3)
+    for _ in range(3):
+        assert bucket.acquire()
+    assert clock[0] == 0
+    assert bucket.acquire()
+    assert clock[0] == pytest.approx(0.5)
+
+
+def test_timeout_expires_without_taking_tokens(clock):
+    bucket = TokenBucket(rate_per_s=1, capacity=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.25)
+    assert clock[0] == pytest.approx(0.25)
+    clock[0] += 1
+    assert bucket.acquire(timeout=0)
+
+
+def test_oversized_request_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate_per_s=1, capacity=2)
+    assert bucket.acquire(tokens=5)
+    assert clock[0] == 0
+
+
+def test_zero_rate_is_unlimited(clock):
+    bucket = TokenBucket(rate_per_s=0, capacity=0)
+    assert all(bucket.acquire() for _ in range(100))
+
+
+def test_per_minute_bucket(clock):
+    bucket = per_minute_bucket(60)
+    assert bucket.capacity == 60
+    assert bucket.rate_per_s == pytest.approx(1.0)
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import pytest
+
+from api.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+    gate = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        gate.wait(2)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("key", fetch, timeout=5))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert calls == [1]
+    assert results == ["result"] * 5
+
+
+def test_different_keys_do_not_coalesce():
+    flights = SingleFlight()
+    assert flights.do("a", lambda: 1) == 1
+    assert flights.do("b", lambda: 2) == 2
+
+
+def test_leader_error_propagates_and_key_is_released():
+    flights = SingleFlight()
+
+    def boom():
+        raise RuntimeError("fetch failed")
+
+    with pytest.raises(RuntimeError):
+        flights.do("key", boom)
+    assert flights.do("key", lambda: "retry") == "retry"
+
+
+def test_follower_fetches_itself_when_leader_fails():
+    flights = SingleFlight()
+    flight, leader = flights.begin("key")
+    assert leader
+    follower = []
+    t = threading.Thread(target=lambda: follower.append(flights.do("key", lambda: "own", timeout=5)))
+    t.start()
+    time.sleep(0.05)
+    flights.finish("key", flight, ok=False)
+    t.join()
+    assert follower == ["own"]
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 1}
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from firebase_database import site_cache
+
+LOCATION = "Austin, TX"
+
+
+@pytest.fixture
+def llm(db, monkeypatch):
+    """Records calls to the URL-finding LLM helpers and returns canned answers."""
+    calls = {"find": 0, "fallback": 0}
+    answers = {"find": {"url": "https://first.example"}, "fallback": {"url": "https://second.example"}}
+
+    def find(location):
+        calls["find"] += 1
+        return dict(answers["find"], location=location)
+
+    def fallback(location, failed_url, reason):
+        calls["fallback"] += 1
+        return dict(answers["fallback"])
+
+    monkeypatch.setattr(site_cache, "find_event_site_url", find)
+    monkeypatch.setattr(site_cache, "find_fallback_event_site_url", fallback)
+    site_cache._lru.clear()
+    yield calls, answers
+    site_cache._lru.clear()
+
+
+def _fail(url, times, reason="blocked"):
+    for _ in range(times):
+        site_cache.record_scrape_result(LOCATION, url, reason)
+
+
+def test_miss_asks_once_then_serves_from_cache(db, llm):
+    calls, _ = llm
+    assert site_cache.resolve_event_site_url(LOCATION)["url"] == "https://first.example"
+    site_cache._lru.clear()  # the next read comes from Firestore
+    result = site_cache.resolve_event_site_url(LOCATION)
+    assert result == {"location": LOCATION, "url": "https://first.example", "from_cache": True}
+    assert calls["find"] == 1
+
+
+def test_failing_url_is_replaced_at_threshold(db, llm):
+    calls, _ = llm
+    site_cache.resolve_event_site_url(LOCATION)
+    _fail("https://first.example", site_cache.SITE_FAILURE_THRESHOLD - 1)
+    assert site_cache.resolve_event_site_url(LOCATION)["url"] == "https://first.example"
+    assert calls["fallback"] == 0
+
+    _fail("https://first.example", 1)
+    result = site_cache.resolve_event_site_url(LOCATION)
+    assert result == {"location": LOCATION, "url": "https://second.example", "from_cache": False}
+    entry = site_cache.get_site_entry(LOCATION)
+    assert entry["found_by"] == "fallback"
+    assert entry["consecutive_failures"] == 0
+
+
+def test_fallback_backs_off_after_an_attempt(db, llm, monkeypatch):
+    calls, answers = llm
+    answers["fallback"] = {"error": "no alternative"}
+    site_cache.resolve_event_site_url(LOCATION)
+    _fail("https://first.example", site_cache.SITE_FAILURE_THRESHOLD)
+
+    for _ in range(3):
+        assert site_cache.resolve_event_site_url(LOCATION)["url"] == "https://first.example"
+    assert calls["fallback"] == 1
+    assert site_cache.get_site_entry(LOCATION)["fallback_attempted_at"] is not None
+
+    monkeypatch.setattr(site_cache, "SITE_FALLBACK_RETRY_S", 0)
+    site_cache.resolve_event_site_url(LOCATION)
+    assert calls["fallback"] == 2
+
+
+def test_success_writes_are_throttled(db, llm, monkeypatch):
+    site_cache.resolve_event_site_url(LOCATION)
+    site_cache.record_scrape_result(LOCATION, "https://first.example")
+    writes = db.writes
+    site_cache.record_scrape_result(LOCATION, "https://first.example")
+    assert db.writes == writes
+
+    # a success that ends a failure streak is always written
+    _fail("https://first.example", 1)
+    writes = db.writes
+    site_cache.record_scrape_result(LOCATION, "https://first.example")
+    assert db.writes == writes + 1
+    assert site_cache.get_site_entry(LOCATION)["consecutive_failures"] == 0
+
+    # and last_success_at is refreshed once it is old enough
+    entry = site_cache.get_site_entry(LOCATION)
+    entry["last_success_at"] = datetime.now(timezone.utc) - timedelta(seconds=site_cache.SITE_SUCCESS_WRITE_INTERVAL_S + 1)
+    site_cache.record_scrape_result(LOCATION, "https://first.example")
+    assert db.writes == writes + 2
+
+
+def test_results_for_another_url_are_ignored(db, llm):
+    site_cache.resolve_event_site_url(LOCATION)
+    writes = db.writes
+    _fail("https://other.example", 5)
+    assert db.writes == writes
+    assert site_cache.get_site_entry(LOCATION)["consecutive_failures"] == 0
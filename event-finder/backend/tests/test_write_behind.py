@@ -0,0 +1,103 @@
+import threading
+import time
+
+from api.write_behind import WriteBehindQueue
+
+
+class Transient(Exception):
+    pass
+
+
+def _queue(write_fn, **kwargs):
+    kwargs.setdefault("backoff_s", 0.001)
+    return WriteBehindQueue(write_fn, retry_on=(Transient,), **kwargs)
+
+
+def test_pending_writes_for_a_key_are_coalesced():
+    gate = threading.Event()
+    written = []
+
+    def write(key, version):
+        if key == "block":
+            gate.wait(2)
+        written.append((key, version))
+        return True
+
+    queue = _queue(write)
+    queue.submit("block", "block", 0)
+    for version in range(1, 4):
+        queue.submit("k", "k", version)
+    gate.set()
+    assert queue.flush(5)
+    assert written == [("block", 0), ("k", 3)]
+    assert queue.stats()["coalesced"] == 2
+
+
+def test_full_queue_drops_new_keys():
+    gate = threading.Event()
+    queue = _queue(lambda key: gate.wait(2), max_pending=1)
+    queue.submit("a", "a")
+    while queue.stats()["pending"] != 1 or not queue._active:
+        time.sleep(0.001)  # wait until "a" is being written
+    assert queue.submit("b", "b")
+    assert not queue.submit("c", "c")
+    gate.set()
+    assert queue.flush(5)
+    assert queue.stats()["dropped"] == 1
+
+
+def test_transient_errors_are_retried():
+    attempts = []
+
+    def write(key):
+        attempts.append(key)
+        if len(attempts) < 3:
+            raise Transient("try again")
+        return True
+
+    queue = _queue(write, max_retries=3)
+    queue.submit("k", "k")
+    assert queue.flush(5)
+    assert len(attempts) == 3
+    assert queue.stats()["written"] == 1
+
+
+def test_retries_give_up_after_max_retries():
+    attempts = []
+
+    def write(key):
+        attempts.append(key)
+        raise Transient("still down")
+
+    queue = _queue(write, max_retries=2)
+    queue.submit("k", "k")
+    assert queue.flush(5)
+    assert len(attempts) == 3
+    assert queue.stats()["failed"] == 1
+
+
+def test_rejected_and_non_transient_writes_are_not_retried():
+    attempts = []
+
+    def write(key):
+        attempts.append(key)
+        if key == "bad":
+            raise ValueError("corrupt")
+        return False
+
+    queue = _queue(write, max_retries=3)
+    queue.submit("rejected", "rejected")
+    queue.submit("bad", "bad")
+    assert queue.flush(5)
+    assert attempts == ["rejected", "bad"]
+    assert queue.stats()["failed"] == 2
+    assert queue.stats()["written"] == 0
+
+
+def test_flush_times_out_while_a_write_is_running():
+    gate = threading.Event()
+    queue = _queue(lambda key: gate.wait(2))
+    queue.submit("k", "k")
+    assert not queue.flush(0.05)
+    gate.set()
+    assert queue.flush(5)